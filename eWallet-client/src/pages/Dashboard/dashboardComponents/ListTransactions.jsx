@@ -10,7 +10,7 @@ const TransactionsList = () => {
     const fetchTransactions = async () => {
       try {
         const data = await TransactionService.getTransactions();
-        setTransactions(data);
+        setTransactions(data.results);
       } catch (err) {
         setError(err);
       }
@@ -3,9 +3,9 @@ import { API } from '../api/apiEndpoints';
 
 const TransactionService = {
 
-    getTransactions: async () => {
+    getTransactions: async (params = {}) => {
     try {
-      const response = await axiosInstance.get(API.TRANSACTIONS.LIST);
+      const response = await axiosInstance.get(API.TRANSACTIONS.LIST, { params });
       return response.data;
     } catch (error) {
       throw error.response?.data || "Failed to fetch transactions.";
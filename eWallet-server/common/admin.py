@@ -1,3 +1,194 @@
+import datetime
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import F, Max, Min, Q, QuerySet
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact, GreaterThanOrEqual, LessThan
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from common.filters import prefix_range
+from common.pagination import bounded_count
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator whose count comes from bounded_count(): exact up to ADMIN_EXACT_COUNT_LIMIT
+    rows, then the table estimate for an unfiltered list or the limit for a filtered one,
+    so a filtered list pages through its first ADMIN_EXACT_COUNT_LIMIT rows.
+    """
+
+    @cached_property
+    def count(self):
+        count, _ = bounded_count(self.object_list, limit=getattr(settings, "ADMIN_EXACT_COUNT_LIMIT", 10000))
+        return count
+
+
+class CalendarQuerySet(QuerySet):
+    """
+    The change list's queryset as seen by the date hierarchy.
+
+    SQLite only answers MIN() or MAX() from an index when it is the query's sole
+    aggregate, so the hierarchy's combined MIN/MAX becomes two ordered LIMIT 1 lookups.
+    dates()/datetimes() list every period between the first and last row rather than
+    scanning the rows for the periods that have any, so a drill-down may show empty
+    months or days.
+    """
+
+    def aggregate(self, *args, **kwargs):
+        if args or not kwargs or not all(self._is_extreme(aggregate) for aggregate in kwargs.values()):
+            return super().aggregate(*args, **kwargs)
+        return {name: self._extreme(aggregate) for name, aggregate in kwargs.items()}
+
+    @staticmethod
+    def _is_extreme(aggregate):
+        source = aggregate.source_expressions
+        return (
+            type(aggregate) in (Min, Max)
+            and aggregate.filter is None
+            and len(source) == 1
+            and isinstance(source[0], F)
+        )
+
+    def _extreme(self, aggregate):
+        field_name = aggregate.source_expressions[0].name
+        ordering = field_name if isinstance(aggregate, Min) else f"-{field_name}"
+        return (
+            self.filter(**{f"{field_name}__isnull": False})
+            .order_by(ordering)
+            .values_list(field_name, flat=True)
+            .first()
+        )
+
+    def dates(self, field_name, kind, order="ASC"):
+        return [value.date() for value in self._calendar(field_name, kind, order, aware=False)]
+
+    def datetimes(self, field_name, kind, order="ASC", tzinfo=None, is_dst=None):
+        return self._calendar(field_name, kind, order, aware=settings.USE_TZ, tzinfo=tzinfo)
+
+    def _calendar(self, field_name, kind, order, aware, tzinfo=None):
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds["first"] is None:
+            return []
+        first, last = bounds["first"], bounds["last"]
+        if isinstance(first, datetime.datetime) and timezone.is_aware(first):
+            first, last = timezone.localtime(first, tzinfo), timezone.localtime(last, tzinfo)
+
+        periods = []
+        current = datetime.date(
+            first.year, first.month if kind != "year" else 1, first.day if kind == "day" else 1
+        )
+        end = last.date() if isinstance(last, datetime.datetime) else last
+        while current <= end:
+            period = datetime.datetime(current.year, current.month, current.day)
+            periods.append(timezone.make_aware(period, tzinfo) if aware else period)
+            if kind == "year":
+                current = current.replace(year=current.year + 1)
+            elif kind == "month":
+                current = (current.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+            else:
+                current += datetime.timedelta(days=1)
+        return periods if order == "ASC" else periods[::-1]
+
+
+class LargeTableChangeList(ChangeList):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Read only by the date hierarchy; the page itself is already evaluated.
+        queryset = self.queryset
+        self.queryset = CalendarQuerySet(
+            model=queryset.model, query=queryset.query.chain(), using=queryset._db, hints=queryset._hints
+        )
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin for tables with millions of rows.
+
+    Counts are bounded (see EstimatedCountPaginator); the unfiltered total and filter
+    facet counts are not shown. ``search_fields`` entries must be ``"=field"`` (exact) or ``"^field"``
+    (prefix); the whole search term is compared with equality or a range instead of
+    LIKE, so each entry can use an index, and a path across a relation becomes an
+    ``__in`` subquery on the related table's own index. Fields listed in
+    ``case_insensitive_search_fields`` are compared lower-cased and need an index on
+    Lower(field). The date hierarchy is answered from index lookups (see CalendarQuerySet).
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Facet counts are a full COUNT per filter choice.
+    show_facets = admin.ShowFacets.NEVER
+    list_per_page = 50
+    case_insensitive_search_fields = ()
+
+    def get_changelist(self, request, **kwargs):
+        return LargeTableChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        conditions = Q()
+        for entry in self.get_search_fields(request):
+            mode, path = entry[:1], entry[1:]
+            if mode not in ("=", "^"):
+                raise ImproperlyConfigured(
+                    f"{type(self).__name__}.search_fields entry {entry!r} must start with '=' or '^'."
+                )
+            condition = self._search_condition(
+                self.model, path, mode, term, path in self.case_insensitive_search_fields
+            )
+            if condition is not None:
+                conditions |= condition
+
+        if not conditions:
+            return queryset.none(), False
+        return queryset.filter(conditions), False
+
+    def _search_condition(self, model, path, mode, term, case_insensitive):
+        """A Q matching term against path, or None when term is not a valid value for the field."""
+        name, _, rest = path.partition(LOOKUP_SEP)
+        field = model._meta.get_field(name)
+        if rest:
+            related = field.related_model
+            inner = self._search_condition(related, rest, mode, term, case_insensitive)
+            if inner is None:
+                return None
+            return Q(**{f"{name}__in": related._base_manager.filter(inner).values("pk")})
+
+        try:
+            value = field.to_python(term)
+        except ValidationError:
+            return None
+        column = F(name)
+        if case_insensitive:
+            column, value = Lower(name), value.lower()
+
+        if mode == "=":
+            return Q(Exact(column, value))
+        if not isinstance(value, str):
+            raise ImproperlyConfigured(f"Prefix search needs a text field, not {model.__name__}.{name}.")
+        lower, upper = prefix_range(value)
+        condition = Q(GreaterThanOrEqual(column, lower))
+        if upper is not None:
+            condition &= Q(LessThan(column, upper))
+        return condition
+
+
+class ReadOnlyLargeTableAdmin(LargeTableAdmin):
+    """LargeTableAdmin for append-only records: rows can be viewed but not added, edited or deleted."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
-# Register your models here.
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,114 @@
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from common.lru import TTLCache
+from common.revocation import RevocableRefreshToken
+from common.versioned_cache import VersionCounters
+
+# Bumped whenever a user row changes; part of every resolved-user cache key.
+user_versions = VersionCounters("auth:user")
+
+resolved_users = TTLCache(
+    ttl=getattr(settings, "AUTH_USER_CACHE_TTL", 30),
+    max_entries=getattr(settings, "AUTH_USER_CACHE_SIZE", 10000),
+)
+
+
+def get_cached_user(user_id):
+    """
+    Return the user with this id, or None. Rows are kept in a per-process TTL cache
+    keyed on (user id, version); the version lives in the shared Django cache, so a
+    bump from any process makes every process reload the row on its next request.
+    Each caller gets its own copy of the instance.
+    """
+    user_id = str(user_id)
+    key = (user_id, user_versions.get_many([user_id])[user_id])
+    user = resolved_users.get(key)
+    if user is None:
+        user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is None:
+            return None
+        resolved_users.set(key, user)
+    return copy.copy(user)
+
+
+def forget_cached_user(user_id):
+    """
+    Invalidate the cached user once the surrounding transaction commits. Bumping
+    earlier would let a concurrent request cache the not yet committed old row
+    under the new version.
+    """
+    user_id = str(user_id)
+    transaction.on_commit(lambda: user_versions.bump([user_id]))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    SimpleJWT authentication that resolves the token's user through get_cached_user
+    instead of querying on every request. Applies the same checks as JWTAuthentication
+    and also rejects blocked users.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if getattr(user, "is_blocked", False):
+            raise AuthenticationFailed(_("User is blocked"), code="user_blocked")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+class RevokingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    TokenRefreshSerializer that rejects revoked refresh tokens and, with
+    BLACKLIST_AFTER_ROTATION, revokes the token it rotates, so each refresh token
+    works once. The user comes from get_cached_user.
+    """
+
+    token_class = RevocableRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None:
+            user = get_cached_user(user_id)
+            if not api_settings.USER_AUTHENTICATION_RULE(user) or getattr(user, "is_blocked", False):
+                raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data["refresh"] = str(refresh)
+
+        return data
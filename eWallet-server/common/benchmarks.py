@@ -0,0 +1,74 @@
+import os
+import statistics
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """
+    Run the block against a freshly migrated throwaway database.
+
+    SQLite test databases default to in-memory, which hides the locking behaviour
+    benchmarks are meant to measure, so the copy is placed in a temporary file.
+    The configured database is never touched.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if connection.vendor == "sqlite":
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = str(Path(tmpdir) / "benchmark.sqlite3")
+
+        old_config = setup_databases(verbosity=verbosity, interactive=False)
+        try:
+            yield
+        finally:
+            teardown_databases(old_config, verbosity=verbosity)
+
+
+@contextmanager
+def explicit_timestamps(model, *field_names):
+    """
+    Let seeders write their own values into auto_now/auto_now_add fields,
+    so generated history can be spread over time.
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of samples (nearest-rank), or 0.0 when empty."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+def resident_memory():
+    """This process's resident set size in bytes, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
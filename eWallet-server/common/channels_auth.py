@@ -0,0 +1,48 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from common.authentication import get_cached_user
+
+
+def _raw_token(scope):
+    """Read the access token from ``?token=`` or an ``Authorization: Bearer`` header."""
+    token = parse_qs(scope.get("query_string", b"").decode()).get("token", [None])[0]
+    if token:
+        return token
+
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0] in api_settings.AUTH_HEADER_TYPES:
+                return parts[1]
+    return None
+
+
+@database_sync_to_async
+def _user_for_token(raw_token):
+    try:
+        token = AccessToken(raw_token)
+    except TokenError:
+        return AnonymousUser()
+
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    user = get_cached_user(user_id) if user_id is not None else None
+    if user is None or not user.is_active or getattr(user, "is_blocked", False):
+        return AnonymousUser()
+    return user
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Populate ``scope["user"]`` for WebSocket connections from a SimpleJWT access token."""
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        raw_token = _raw_token(scope)
+        scope["user"] = await _user_for_token(raw_token) if raw_token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
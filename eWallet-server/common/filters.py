@@ -1,6 +1,5 @@
 from datetime import timedelta
 from django.utils.timezone import now
-from django.db.models import Sum, Q
 from django.apps import apps
 
 
@@ -24,28 +23,47 @@ def filter_transactions_by_duration(user, duration):
     else:
         start_date = None 
 
-    Transaction = apps.get_model("eWallet", "Transaction")
-
-    transactions = Transaction.objects.filter(account__user=user)
+    DailyTransactionSummary = apps.get_model("eWallet", "DailyTransactionSummary")
 
+    filters = {"account__user": user}
     if start_date:
-        transactions = transactions.filter(created_at__date__gte=start_date)
+        filters["date__gte"] = start_date
 
-    monthly_data = (
-        transactions.values("created_at__year", "created_at__month")
-        .annotate(
-            total_deposits=Sum("amount", filter=Q(transaction_type="deposit")),
-            total_debits=Sum("amount", filter=Q(transaction_type="debit")),
-        )
-        .order_by("created_at__year", "created_at__month")
-    )
+    monthly_data = DailyTransactionSummary.objects.monthly_totals(**filters)
 
     return [
         {
-            "year": entry["created_at__year"],
-            "month": entry["created_at__month"],
+            "year": entry["date__year"],
+            "month": entry["date__month"],
             "total_deposits": entry["total_deposits"] or 0.00,
             "total_debits": entry["total_debits"] or 0.00,
         }
         for entry in monthly_data
     ]
+
+
+def filter_transactions_by_type(transactions, query_params):
+    """
+    Narrow a transaction queryset with the optional ``type`` and ``subtype`` query parameters.
+    """
+    transaction_type = query_params.get("type")
+    subtype = query_params.get("subtype")
+
+    if transaction_type:
+        transactions = transactions.filter(transaction_type=transaction_type)
+    if subtype:
+        transactions = transactions.filter(subtype=subtype)
+
+    return transactions
+
+
+def prefix_range(prefix):
+    """
+    Bounds (lower, upper) such that lower <= value < upper holds exactly for the strings
+    starting with prefix. Unlike LIKE 'prefix%', the comparison can use a plain index.
+    upper is None when prefix ends in the highest code point.
+    """
+    last = ord(prefix[-1])
+    if last == 0x10FFFF:
+        return prefix, None
+    return prefix, prefix[:-1] + chr(last + 1)
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from common.lru import TTLCache
+from common.models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# Completed responses, so replays inside one process skip the database. Values are
+# (expires_at, fingerprint, status_code, body) tuples; expires_at is the key's own expiry.
+recent_keys = TTLCache(
+    ttl=_setting("IDEMPOTENCY_KEY_TTL", 24 * 60 * 60), max_entries=_setting("IDEMPOTENCY_CACHE_SIZE", 1024)
+)
+
+
+def _recent(cache_key):
+    entry = recent_keys.get(cache_key)
+    if entry is not None and entry[0] <= now():
+        recent_keys.discard(cache_key)
+        return None
+    return entry
+
+
+# Requests currently running in this process, so same-process duplicates wait on an
+# Event instead of polling the database.
+_inflight = {}
+_inflight_lock = threading.Lock()
+_last_purge = 0.0
+
+
+def fingerprint_request(request):
+    payload = json.dumps(request.data, sort_keys=True, cls=JSONEncoder)
+    digest = hashlib.sha256()
+    for part in (request.method, request.path, payload):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def purge_expired_keys(batch_size=1000, max_batches=None):
+    """
+    Delete expired keys in primary-key batches so no single DELETE holds locks for long.
+    Returns the number of rows removed.
+    """
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=now()).values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+        batches += 1
+    return deleted
+
+
+def _maybe_purge():
+    """Evict one batch of expired keys at most once per IDEMPOTENCY_PURGE_INTERVAL seconds."""
+    global _last_purge
+    interval = _setting("IDEMPOTENCY_PURGE_INTERVAL", 300)
+    if time.monotonic() - _last_purge < interval:
+        return
+    _last_purge = time.monotonic()
+    purge_expired_keys(batch_size=_setting("IDEMPOTENCY_PURGE_BATCH_SIZE", 1000), max_batches=1)
+
+
+class _LeaseLost(Exception):
+    """Rolls back the handler's writes when another request reclaimed the key meanwhile."""
+
+
+class _ServerError(Exception):
+    """Rolls back the handler's writes when it answered with a 5xx, so the key can be retried."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+def _replay(entry, fingerprint):
+    _, stored_fingerprint, status_code, body = entry
+    if stored_fingerprint != fingerprint:
+        return Response(
+            {"error": f"{HEADER} was already used with a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(json.loads(body) if body else None, status=status_code)
+    response[REPLAY_HEADER] = "true"
+    return response
+
+
+def _conflict():
+    """409 for a duplicate of a request that did not finish within the wait; the client retries later."""
+    response = Response(
+        {"error": f"A request with this {HEADER} is still being processed."},
+        status=status.HTTP_409_CONFLICT,
+    )
+    response["Retry-After"] = str(_setting("IDEMPOTENCY_RETRY_AFTER", 1))
+    return response
+
+
+def _is_stale(row):
+    """An in-progress row older than the lease belongs to a request that crashed or hung."""
+    lease = timedelta(seconds=_setting("IDEMPOTENCY_LEASE_TIMEOUT", 60))
+    return row.state == IdempotencyKey.IN_PROGRESS and row.created_at <= now() - lease
+
+
+def _claim(user, key, fingerprint, expires_at):
+    """
+    Insert the in-progress row, taking over an expired key or a stale in-progress one.
+    Returns (row, True) when this request owns the key, otherwise (existing row, False).
+    """
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                row = IdempotencyKey.objects.create(user=user, key=key, fingerprint=fingerprint, expires_at=expires_at)
+            return row, True
+        except IntegrityError:
+            existing = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if existing is None:
+                continue
+            if existing.expires_at <= now() or _is_stale(existing):
+                # Only the row we looked at: a concurrent reclaimer may already have replaced it.
+                IdempotencyKey.objects.filter(pk=existing.pk, state=existing.state).delete()
+                continue
+            return existing, False
+    return IdempotencyKey.objects.filter(user=user, key=key).first(), False
+
+
+def _wait_for_completion(user, key):
+    """
+    Poll a key owned by another process until it completes, goes stale or the wait times out.
+    """
+    deadline = time.monotonic() + _setting("IDEMPOTENCY_WAIT_TIMEOUT", 10)
+    while True:
+        row = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if row is None or row.state == IdempotencyKey.COMPLETED or _is_stale(row) or time.monotonic() >= deadline:
+            return row
+        time.sleep(0.05)
+
+
+def idempotent(handler):
+    """
+    Make an APIView handler safe to retry with an ``Idempotency-Key`` header.
+
+    The first request with a key runs the handler and stores its response in the
+    same transaction as the handler's writes. Replays return the stored response
+    without running the handler. A concurrent duplicate waits once, up to
+    IDEMPOTENCY_WAIT_TIMEOUT, for the first request to finish and replays its
+    response; if it has not finished the duplicate gets 409 with Retry-After.
+    A key left in progress for longer than IDEMPOTENCY_LEASE_TIMEOUT (its request
+    crashed or hung) is taken over by the next request that uses it; should the
+    original request still finish afterwards, its writes are rolled back.
+    Requests without the header are handled normally.
+    """
+
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return handler(view, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"error": f"{HEADER} is too long."}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        cache_key = (user.pk, key)
+        fingerprint = fingerprint_request(request)
+
+        entry = _recent(cache_key)
+        if entry is not None:
+            return _replay(entry, fingerprint)
+
+        with _inflight_lock:
+            event = _inflight.get(cache_key)
+            owner = event is None
+            if owner:
+                event = _inflight[cache_key] = threading.Event()
+
+        if not owner:
+            event.wait(_setting("IDEMPOTENCY_WAIT_TIMEOUT", 10))
+            entry = _recent(cache_key)
+            return _replay(entry, fingerprint) if entry is not None else _conflict()
+
+        try:
+            return _run_once(handler, view, request, user, key, fingerprint, args, kwargs)
+        finally:
+            with _inflight_lock:
+                _inflight.pop(cache_key, None)
+            event.set()
+
+    return wrapper
+
+
+def _run_once(handler, view, request, user, key, fingerprint, args, kwargs):
+    expires_at = now() + timedelta(seconds=_setting("IDEMPOTENCY_KEY_TTL", 24 * 60 * 60))
+    cache_key = (user.pk, key)
+
+    row, owned = _claim(user, key, fingerprint, expires_at)
+    if not owned and row is not None and row.state == IdempotencyKey.IN_PROGRESS:
+        row = _wait_for_completion(user, key)
+        if row is None or _is_stale(row):
+            row, owned = _claim(user, key, fingerprint, expires_at)
+
+    if not owned:
+        if row is None or row.state != IdempotencyKey.COMPLETED:
+            return _conflict()
+        entry = (row.expires_at, row.fingerprint, row.status_code, row.response_body)
+        recent_keys.set(cache_key, entry)
+        return _replay(entry, fingerprint)
+
+    try:
+        with transaction.atomic():
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code >= 500:
+                raise _ServerError(response)
+            body = json.dumps(response.data, cls=JSONEncoder) if response.data is not None else ""
+            completed = IdempotencyKey.objects.filter(pk=row.pk, state=IdempotencyKey.IN_PROGRESS).update(
+                state=IdempotencyKey.COMPLETED, status_code=response.status_code, response_body=body
+            )
+            if not completed:
+                raise _LeaseLost()
+    except _LeaseLost:
+        return _conflict()
+    except _ServerError as e:
+        IdempotencyKey.objects.filter(pk=row.pk, state=IdempotencyKey.IN_PROGRESS).delete()
+        return e.response
+    except BaseException:
+        IdempotencyKey.objects.filter(pk=row.pk, state=IdempotencyKey.IN_PROGRESS).delete()
+        raise
+
+    recent_keys.set(cache_key, (expires_at, fingerprint, response.status_code, body))
+    _maybe_purge()
+    return response
@@ -0,0 +1,224 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.renderers import JSONRenderer
+
+# Timings of the request being handled on this thread/task, or None outside a request.
+_current = ContextVar("request_timings", default=None)
+
+
+def _geometric_bounds(start, stop, factor):
+    bounds = []
+    value = start
+    while value < stop:
+        bounds.append(value)
+        value *= factor
+    bounds.append(stop)
+    return bounds
+
+
+# Seconds: 0.1 ms to 60 s in 10% steps, so a percentile is off by at most one step.
+DURATION_BOUNDS = _geometric_bounds(0.0001, 60.0, 1.1)
+QUERY_BOUNDS = [0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 75, 100, 200, 500, 1000]
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Observing is a bisect and an increment, memory does not
+    grow with traffic, and percentiles are read from the bucket upper bounds.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, pct):
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                return min(upper, self.max)
+        return self.max
+
+
+class RequestTimings:
+    __slots__ = ("queries", "db", "serialize")
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+
+
+METRICS = (
+    ("total", "ewallet_request_duration_seconds", "Time spent handling the request.", DURATION_BOUNDS),
+    ("db", "ewallet_request_db_seconds", "Time spent executing SQL.", DURATION_BOUNDS),
+    ("serialize", "ewallet_request_serialize_seconds", "Time spent encoding rows and rendering JSON.", DURATION_BOUNDS),
+    ("queries", "ewallet_request_queries", "SQL queries executed.", QUERY_BOUNDS),
+)
+QUANTILES = (50, 95, 99)
+# Any other method name a client sends is recorded as "other", so it cannot add label values.
+STANDARD_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+class EndpointMetrics:
+    """Per-process histograms per (view, method)."""
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, values):
+        with self._lock:
+            histograms = self._endpoints.get(endpoint)
+            if histograms is None:
+                histograms = self._endpoints[endpoint] = {
+                    name: Histogram(bounds) for name, _, _, bounds in METRICS
+                }
+            for name, value in values.items():
+                histograms[name].observe(value)
+
+    def snapshot(self):
+        """{(view, method): {metric: {"count", "sum", "p50", "p95", "p99"}}}"""
+        with self._lock:
+            return {
+                endpoint: {
+                    name: {
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        **{f"p{pct}": histogram.percentile(pct) for pct in QUANTILES},
+                    }
+                    for name, histogram in histograms.items()
+                }
+                for endpoint, histograms in self._endpoints.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+endpoint_metrics = EndpointMetrics()
+
+
+@contextmanager
+def timed_serialization():
+    """Count the block's duration as serializer time for the current request."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.serialize += time.perf_counter() - started
+
+
+class InstrumentedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed_serialization():
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+def _endpoint(request):
+    method = request.method if request.method in STANDARD_METHODS else "other"
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return ("unresolved", method)
+    view_class = getattr(match.func, "view_class", None) or getattr(match.func, "cls", None)
+    return (view_class.__name__ if view_class else match.view_name or match.func.__name__, method)
+
+
+class PerformanceMiddleware:
+    """
+    Record total time, SQL query count, SQL time and serializer time for each request,
+    add them as a Server-Timing header and fold them into per-view histograms served
+    by MetricsAPIView. Place it first so it sees the whole middleware stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, "SERVER_TIMING_HEADER", True)
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+
+        def record_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                timings.db += time.perf_counter() - started
+                timings.queries += 1
+
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        endpoint_metrics.observe(
+            _endpoint(request),
+            {"total": total, "db": timings.db, "serialize": timings.serialize, "queries": timings.queries},
+        )
+        if self.server_timing:
+            response["Server-Timing"] = (
+                f'db;dur={timings.db * 1000:.2f};desc="{timings.queries} queries", '
+                f"serialize;dur={timings.serialize * 1000:.2f}, "
+                f"total;dur={total * 1000:.2f}"
+            )
+        return response
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(snapshot, cache_stats=None):
+    """Render endpoint histograms (and optional cache counters) as Prometheus summaries."""
+    lines = []
+    for name, metric, help_text, _ in METRICS:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} summary")
+        for (view, method), metrics in sorted(snapshot.items()):
+            values = metrics[name]
+            labels = f'view="{_label(view)}",method="{_label(method)}"'
+            for pct in QUANTILES:
+                lines.append(f'{metric}{{{labels},quantile="{pct / 100}"}} {values[f"p{pct}"]:.6g}')
+            lines.append(f"{metric}_sum{{{labels}}} {values['sum']:.6g}")
+            lines.append(f"{metric}_count{{{labels}}} {values['count']}")
+
+    if cache_stats:
+        for outcome in ("hits", "misses"):
+            metric = f"ewallet_cache_{outcome}_total"
+            lines.append(f"# HELP {metric} Response cache {outcome}.")
+            lines.append(f"# TYPE {metric} counter")
+            for cache_name, counts in sorted(cache_stats.items()):
+                lines.append(f'{metric}{{cache="{_label(cache_name)}"}} {counts[outcome]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,36 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto every configured replica file. "
+        "Stands in for replication when running with local SQLite replicas."
+    )
+
+    def handle(self, *args, **options):
+        aliases = getattr(settings, "DATABASE_REPLICAS", [])
+        if not aliases:
+            self.stdout.write("No replicas configured (set DATABASE_REPLICAS).")
+            return
+
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict
+        if primary["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("sync_replicas only copies SQLite databases.")
+
+        for alias in aliases:
+            replica = connections[alias].settings_dict
+            connections[alias].close()
+            # The backup API takes a consistent snapshot even while the primary is being written.
+            source = sqlite3.connect(primary["NAME"])
+            target = sqlite3.connect(replica["NAME"])
+            try:
+                with target:
+                    source.backup(target)
+            finally:
+                source.close()
+                target.close()
+            self.stdout.write(self.style.SUCCESS(f"Copied {primary['NAME']} to {alias} ({replica['NAME']})."))
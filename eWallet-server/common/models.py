@@ -1,3 +1,48 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a money-moving request sent with an ``Idempotency-Key`` header.
+    A row is written as ``in_progress`` before the view runs and completed with the
+    response in the same database transaction as the view's writes.
+    """
+
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    STATE_CHOICES = [
+        (IN_PROGRESS, "In progress"),
+        (COMPLETED, "Completed"),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="idempotency_keys")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    state = models.CharField(max_length=15, choices=STATE_CHOICES, default=IN_PROGRESS)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="unique_idempotency_key_per_user"),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.state})"
+
+
+class RevokedToken(models.Model):
+    """
+    A refresh token that may not be used again, kept until the token would have
+    expired anyway. Checked through the in-memory filter in common.revocation.
+    """
+
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
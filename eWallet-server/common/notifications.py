@@ -1,12 +1,203 @@
+import atexit
+import logging
+import queue
 import threading
-from django.core.mail import send_mail
+import time
+
 from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class NotificationQueueFull(Exception):
+    """Raised when the delivery queue stayed full for the whole submit timeout."""
+
+
+class EmailDeliveryPool:
+    """
+    Fixed set of worker threads sending queued emails.
+
+    Each worker keeps one backend connection open while there is work, drains up
+    to ``batch_size`` queued messages and sends them over that connection, and
+    retries failed messages with exponential backoff. The queue is bounded, so a
+    burst blocks producers (up to ``put_timeout``) instead of growing without limit.
+    Uses whatever EMAIL_BACKEND is configured, including locmem and file backends.
+    """
+
+    def __init__(
+        self,
+        workers=2,
+        queue_size=1000,
+        batch_size=50,
+        max_retries=3,
+        retry_backoff=1.0,
+        put_timeout=5.0,
+        idle_timeout=30.0,
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.put_timeout = put_timeout
+        self.idle_timeout = idle_timeout
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        with self._lock:
+            if self._threads or self._closed:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"email-delivery-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, message, timeout=None):
+        """Queue an EmailMessage, blocking while the queue is full."""
+        if self._closed:
+            raise RuntimeError("Email delivery pool is shut down.")
+        self.start()
+        try:
+            self.queue.put(message, timeout=self.put_timeout if timeout is None else timeout)
+        except queue.Full:
+            raise NotificationQueueFull("Email delivery queue is full.")
+
+    def flush(self, timeout=None):
+        """Wait until every queued message was sent or given up on. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def shutdown(self, wait=True, timeout=None):
+        """Stop accepting mail, let workers drain what is queued, then stop them."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            threads = list(self._threads)
+
+        for _ in threads:
+            self.queue.put(_STOP)
+        if wait:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            for thread in threads:
+                thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+
+    def _run(self):
+        connection = None
+        while True:
+            try:
+                item = self.queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                connection = self._close(connection)
+                continue
+
+            stop = item is _STOP
+            batch = [] if stop else [item]
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            try:
+                if batch:
+                    connection = self._send(connection, batch)
+            finally:
+                for _ in range(len(batch) + stop):
+                    self.queue.task_done()
+
+            if stop:
+                self._close(connection)
+                return
+
+    def _send(self, connection, batch):
+        """
+        Send batch over one connection in a single send_messages() call. If that call
+        fails, the messages are retried one at a time with backoff, so only a message
+        that still fails after max_retries retries is given up on. A message the failed
+        call had already sent may be delivered twice. Returns the connection to reuse.
+        """
+        connection, error = self._deliver(connection, batch)
+        pending = [] if error is None else list(batch)
+        for attempt in range(1, self.max_retries + 1):
+            if not pending:
+                return connection
+            logger.warning("Email delivery failed for %d message(s), retrying (attempt %d)",
+                           len(pending), attempt, exc_info=error)
+            time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            failed = []
+            for message in pending:
+                connection, failure = self._deliver(connection, [message])
+                if failure is not None:
+                    failed.append(message)
+                    error = failure
+            pending = failed
+
+        for message in pending:
+            logger.error("Giving up on email to %s after %d attempts",
+                         ", ".join(message.recipients()), self.max_retries + 1, exc_info=error)
+        return connection
+
+    def _deliver(self, connection, messages):
+        """One send_messages() call. Returns (connection, None), or (None, error) after closing it."""
+        try:
+            if connection is None:
+                connection = get_connection(fail_silently=False)
+                connection.open()
+            connection.send_messages(messages)
+            return connection, None
+        except Exception as error:
+            return self._close(connection), error
+
+    @staticmethod
+    def _close(connection):
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                logger.warning("Error closing email connection", exc_info=True)
+        return None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_delivery_pool():
+    """The process-wide pool, configured from the EMAIL_POOL_* settings on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = EmailDeliveryPool(
+                workers=getattr(settings, "EMAIL_POOL_WORKERS", 2),
+                queue_size=getattr(settings, "EMAIL_POOL_QUEUE_SIZE", 1000),
+                batch_size=getattr(settings, "EMAIL_POOL_BATCH_SIZE", 50),
+                max_retries=getattr(settings, "EMAIL_POOL_MAX_RETRIES", 3),
+                retry_backoff=getattr(settings, "EMAIL_POOL_RETRY_BACKOFF", 1.0),
+                put_timeout=getattr(settings, "EMAIL_POOL_PUT_TIMEOUT", 5.0),
+            )
+            atexit.register(_pool.shutdown, wait=True, timeout=getattr(settings, "EMAIL_POOL_DRAIN_TIMEOUT", 30))
+        return _pool
+
 
 class Notification:
     @staticmethod
-    def send_email(subject, message, recipient_list, from_email=settings.DEFAULT_FROM_EMAIL):
-        def send():
-            send_mail(subject, message, from_email, recipient_list)
-        
-        email_thread = threading.Thread(target=send)
-        email_thread.start()
\ No newline at end of file
+    def send_email(subject, message, recipient_list, from_email=None):
+        """Queue an email for background delivery through the shared pool."""
+        email = EmailMessage(subject, message, from_email or settings.DEFAULT_FROM_EMAIL, recipient_list)
+        get_delivery_pool().submit(email)
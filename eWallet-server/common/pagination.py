@@ -0,0 +1,152 @@
+import base64
+import json
+import uuid
+from collections import OrderedDict
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimated_row_count(model, using="default"):
+    """
+    Approximate number of rows in the model's table without scanning it, or None
+    when the database keeps no cheap estimate. PostgreSQL reports the planner's
+    statistics; SQLite reports the highest rowid, which overcounts by the rows deleted.
+    """
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+            row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == "sqlite":
+            cursor.execute(f"SELECT MAX(rowid) FROM {table}")
+            return cursor.fetchone()[0] or 0
+    return None
+
+
+def bounded_count(queryset, limit=1000):
+    """
+    Return (count, exact) without a full COUNT(*) over a large table. Up to ``limit``
+    matching rows are counted exactly; past that an unfiltered queryset reports the
+    table estimate and a filtered one reports ``limit`` as a lower bound.
+    """
+    counted = queryset.order_by()[: limit + 1].count()
+    if counted <= limit:
+        return counted, True
+    if not queryset.query.where:
+        estimate = estimated_row_count(queryset.model, using=queryset.db)
+        if estimate is not None:
+            return max(estimate, counted), False
+    return limit, False
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only cursor pagination on a (ordering_field, id) key, newest first
+    unless ``descending`` is False.
+
+    Each page is a range scan that starts right after the last row of the
+    previous page, so fetching page 1000 costs the same as page 1 as long as
+    the queryset is backed by an index ending in (ordering_field, id).
+    Pages may hold model instances or ``.values()`` dicts that include both keys.
+    Subclasses ordering on something other than a timestamp override
+    parse_position() and format_position(); those on non-UUID keys override parse_pk().
+    """
+
+    ordering_field = "created_at"
+    descending = True
+    cursor_query_param = "cursor"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        position = self.decode_cursor(request)
+        prefix, after = ("-", "lt") if self.descending else ("", "gt")
+        queryset = queryset.order_by(f"{prefix}{self.ordering_field}", f"{prefix}id")
+        if position is not None:
+            value, pk = position
+            # The redundant inclusive bound lets SQLite seek into the index; with bound
+            # parameters it cannot derive a range from the OR alone and scans instead.
+            queryset = queryset.filter(
+                Q(**{f"{self.ordering_field}__{after}e": value}),
+                Q(**{f"{self.ordering_field}__{after}": value})
+                | Q(**{self.ordering_field: value, f"id__{after}": pk}),
+            )
+
+        rows = list(queryset[: self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            parsed, pk = self.parse_position(value), self.parse_pk(pk)
+        except (TypeError, ValueError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+        if parsed is None:
+            raise NotFound(self.invalid_cursor_message)
+        return parsed, pk
+
+    def parse_position(self, value):
+        """Turn the cursor's JSON value back into an ordering_field value; None if invalid."""
+        return parse_datetime(value)
+
+    def parse_pk(self, pk):
+        """Turn the cursor's id back into a primary key; raise ValueError if invalid."""
+        return uuid.UUID(pk)
+
+    def format_position(self, value):
+        return value.isoformat()
+
+    def encode_cursor(self, row):
+        if isinstance(row, dict):
+            value, pk = row[self.ordering_field], row["id"]
+        else:
+            value, pk = getattr(row, self.ordering_field), row.pk
+        position = [self.format_position(value), str(pk)]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
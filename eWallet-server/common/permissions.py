@@ -0,0 +1,9 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsSelfOrStaff(BasePermission):
+    """Object-level check for user records: only the user themselves or staff."""
+
+    def has_object_permission(self, request, view, obj):
+        user = request.user
+        return bool(user and user.is_authenticated and (user.is_staff or obj.pk == user.pk))
@@ -0,0 +1,119 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from common.versioned_cache import shared_cache
+
+# Alias reads are sent to inside a read_replica()/use_replica() block, or None.
+_read_alias = ContextVar("read_alias", default=None)
+# Set by the router when the current request wrote to the primary.
+_wrote = ContextVar("wrote", default=False)
+
+STICKY_KEY = "db:sticky:{}"
+# The next request may land on another worker, so the flag lives in the shared cache.
+STICKY_CACHE = "versions"
+
+
+def replica_aliases():
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def mark_sticky(user_id):
+    """Pin user_id's reads to the primary for DATABASE_REPLICA_STICKY_SECONDS."""
+    timeout = getattr(settings, "DATABASE_REPLICA_STICKY_SECONDS", 10)
+    if user_id is not None and timeout and replica_aliases():
+        shared_cache(STICKY_CACHE).set(STICKY_KEY.format(user_id), True, timeout)
+
+
+def is_sticky(user_id):
+    return user_id is not None and shared_cache(STICKY_CACHE).get(STICKY_KEY.format(user_id), False)
+
+
+def choose_replica(user_id=None):
+    """A random replica alias, or the primary when there are none or user_id wrote recently."""
+    aliases = replica_aliases()
+    if not aliases or is_sticky(user_id):
+        return DEFAULT_DB_ALIAS
+    return random.choice(aliases)
+
+
+@contextmanager
+def use_replica(user_id=None):
+    """Route ORM reads in the block to a replica (see choose_replica)."""
+    token = _read_alias.set(choose_replica(user_id))
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def read_replica(handler):
+    """
+    Run a read-only APIView handler against a replica. Users who wrote within the
+    stickiness window keep reading from the primary, so they see their own changes.
+    """
+
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        with use_replica(getattr(request.user, "pk", None)):
+            return handler(view, request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Reads go to a replica only inside use_replica()/read_replica and never while the
+    primary is inside a transaction; every write goes to the primary. Replicas are
+    copies of the primary, so migrations only run there.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or alias == DEFAULT_DB_ALIAS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaStickinessMiddleware:
+    """
+    After a request that wrote (or used an unsafe method), pin the user's reads to the
+    primary for a short window to give read-your-writes consistency.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            user = getattr(request, "user", None)
+            if (_wrote.get() or request.method not in ("GET", "HEAD", "OPTIONS")) and getattr(
+                user, "is_authenticated", False
+            ):
+                mark_sticky(user.pk)
+            return response
+        finally:
+            _wrote.reset(token)
@@ -0,0 +1,155 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from common.models import RevokedToken
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings. Membership tests never miss an added key and
+    report a key that was not added with probability about ``error_rate`` while the
+    filter holds at most ``capacity`` keys.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: k positions from two 64-bit halves of one digest.
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return ((first + index * second) % self.size for index in range(self.hash_count))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+def purge_expired_tokens(batch_size=1000, max_batches=None):
+    """
+    Delete revocations of tokens that have expired anyway, in primary-key batches.
+    Returns the number of rows removed.
+    """
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(RevokedToken.objects.filter(expires_at__lte=now()).values_list("id", flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += RevokedToken.objects.filter(id__in=ids).delete()[0]
+        batches += 1
+    return deleted
+
+
+class RevocationStore:
+    """
+    Answers "was this refresh token revoked?" mostly from memory.
+
+    The Bloom filter holds every unexpired revoked JTI loaded from the database plus
+    those revoked since, and ``recent`` holds the latter exactly. A token missing from
+    the filter is certainly not revoked (as of the last rebuild), one in ``recent``
+    certainly is, and only the remaining filter hits (older revocations and false
+    positives) cost a database lookup. The filter is rebuilt from the unexpired rows
+    every JWT_REVOCATION_REBUILD_INTERVAL seconds, which drops expired JTIs and picks
+    up revocations made by other processes.
+
+    Revocations made elsewhere since the last rebuild are not seen here, so the store
+    is a fast path, not the guarantee: revoke() is a unique INSERT, and a second use
+    of the same token fails there in any process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Forget everything; the next check reloads from the database."""
+        with self._lock:
+            self._filter = None
+            self._recent = {}
+            self._built_at = 0.0
+
+    def _rebuild(self):
+        purge_expired_tokens(batch_size=_setting("JWT_REVOCATION_PURGE_BATCH_SIZE", 1000), max_batches=1)
+        jtis = list(RevokedToken.objects.filter(expires_at__gt=now()).values_list("jti", flat=True))
+        capacity = max(_setting("JWT_REVOCATION_FILTER_CAPACITY", 100000), 2 * len(jtis))
+        bloom = BloomFilter(capacity, _setting("JWT_REVOCATION_FILTER_ERROR_RATE", 0.001))
+        for jti in jtis:
+            bloom.add(jti)
+        return bloom
+
+    def _current_filter(self):
+        with self._lock:
+            interval = _setting("JWT_REVOCATION_REBUILD_INTERVAL", 3600)
+            if self._filter is None or time.monotonic() - self._built_at >= interval:
+                bloom = self._rebuild()
+                current = now()
+                self._recent = {jti: expires for jti, expires in self._recent.items() if expires > current}
+                for jti in self._recent:
+                    bloom.add(jti)
+                self._filter, self._built_at = bloom, time.monotonic()
+            return self._filter
+
+    def is_revoked(self, jti):
+        if jti not in self._current_filter():
+            return False
+        if jti in self._recent:
+            return True
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def _remember(self, jti, expires_at):
+        bloom = self._current_filter()
+        with self._lock:
+            bloom.add(jti)
+            self._recent[jti] = expires_at
+
+    def revoke(self, jti, expires_at):
+        """Persist the revocation. Returns False when the token had already been revoked."""
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+        except IntegrityError:
+            self._remember(jti, expires_at)
+            return False
+        transaction.on_commit(lambda: self._remember(jti, expires_at))
+        return True
+
+
+revocation_store = RevocationStore()
+
+
+class RevocableRefreshToken(RefreshToken):
+    """
+    Refresh token checked against and revoked through revocation_store, standing in for
+    SimpleJWT's blacklist app, which costs several queries per refresh.
+    """
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if revocation_store.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        expires_at = datetime.fromtimestamp(self.payload["exp"], tz=dt_timezone.utc)
+        if not revocation_store.revoke(self.payload[api_settings.JTI_CLAIM], expires_at):
+            raise TokenError(_("Token is blacklisted"))
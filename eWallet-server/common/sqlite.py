@@ -0,0 +1,37 @@
+"""
+Connection profiles for the SQLite backend. Imported by settings, so nothing
+here may touch the app registry.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+SQLITE_PROFILES = ("default", "production")
+
+
+def sqlite_options(profile="default", busy_timeout=20, mmap_size=256 * 1024 * 1024, cache_size_kib=64 * 1024):
+    """
+    Return DATABASES OPTIONS for an SQLite profile.
+
+    "default" is SQLite's stock behaviour: rollback journal, deferred transactions
+    and a 5 second busy timeout. "production" switches to WAL so readers never
+    wait for a writer, relaxes fsyncs to synchronous=NORMAL (safe under WAL), maps
+    the file into memory, and opens every atomic block with BEGIN IMMEDIATE so
+    writers queue on the busy timeout instead of failing with "database is locked"
+    when a read transaction tries to upgrade.
+    """
+    if profile not in SQLITE_PROFILES:
+        raise ImproperlyConfigured(f"Unknown SQLite profile {profile!r}; use one of {', '.join(SQLITE_PROFILES)}.")
+    if profile == "default":
+        return {}
+
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={int(mmap_size)}",
+        f"PRAGMA cache_size=-{int(cache_size_kib)}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    return {
+        "timeout": busy_timeout,
+        "transaction_mode": "IMMEDIATE",
+        "init_command": ";".join(pragmas),
+    }
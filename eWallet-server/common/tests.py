@@ -1,3 +1,157 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import EmailMessage
+from django.core.mail.backends import filebased, locmem
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+
+from .notifications import EmailDeliveryPool
+from .replicas import ReplicaRouter, ReplicaStickinessMiddleware, choose_replica, is_sticky, use_replica
+
+
+class FlakyBackendMixin:
+    """Records the size of every send_messages() call and fails the ones set up to fail."""
+
+    calls = []
+    # Calls that fail outright, then addresses whose messages always fail.
+    failing_calls = 0
+    refused = set()
+
+    def send_messages(self, messages):
+        FlakyBackendMixin.calls.append(len(messages))
+        if FlakyBackendMixin.failing_calls:
+            FlakyBackendMixin.failing_calls -= 1
+            raise ConnectionError("connection reset")
+        if any(set(message.recipients()) & FlakyBackendMixin.refused for message in messages):
+            raise ValueError("recipient refused")
+        return super().send_messages(messages)
+
+
+class FlakyLocmemBackend(FlakyBackendMixin, locmem.EmailBackend):
+    pass
+
+
+class FlakyFileBackend(FlakyBackendMixin, filebased.EmailBackend):
+    pass
+
+
+class EmailDeliveryPoolTests(SimpleTestCase):
+    """Batching, retries and give-up of the background email pool."""
+
+    def deliver_emails(self, backend, recipients, **pool_options):
+        """
+        Hand one message per recipient to a single-worker pool as one batch, through
+        backend ("locmem" or "file"), and return the recipients that received mail.
+        """
+        FlakyBackendMixin.calls = []
+        mail.outbox = []
+        outbox = tempfile.mkdtemp(prefix="ewallet-mail-")
+        self.addCleanup(shutil.rmtree, outbox, ignore_errors=True)
+        backends = {"locmem": "common.tests.FlakyLocmemBackend", "file": "common.tests.FlakyFileBackend"}
+
+        with override_settings(EMAIL_BACKEND=backends[backend], EMAIL_FILE_PATH=outbox):
+            pool = EmailDeliveryPool(workers=1, retry_backoff=0, **pool_options)
+            for recipient in recipients:
+                pool.queue.put(EmailMessage("Receipt", "Paid.", "wallet@example.com", [recipient]))
+            pool.start()
+            self.assertTrue(pool.flush(timeout=5))
+            pool.shutdown(timeout=5)
+
+        # Each connection writes its own file, so across reconnects the file order is arbitrary.
+        if backend == "locmem":
+            return [message.to[0] for message in mail.outbox]
+        delivered = []
+        for name in sorted(os.listdir(outbox)):
+            with open(os.path.join(outbox, name)) as written:
+                delivered += [line[4:].strip() for line in written if line.startswith("To: ")]
+        return delivered
+
+    def test_email_pool_sends_a_batch_in_one_call(self):
+        recipients = [f"user{n}@example.com" for n in range(5)]
+        for backend in ("locmem", "file"):
+            with self.subTest(backend=backend):
+                self.assertEqual(self.deliver_emails(backend, recipients), recipients)
+                self.assertEqual(FlakyBackendMixin.calls, [5])
+
+    def test_email_pool_retries_after_a_failed_batch(self):
+        recipients = ["a@example.com", "b@example.com", "c@example.com"]
+        for backend in ("locmem", "file"):
+            with self.subTest(backend=backend), self.assertLogs("common.notifications", "WARNING"):
+                FlakyBackendMixin.failing_calls = 2
+                self.assertEqual(sorted(self.deliver_emails(backend, recipients)), recipients)
+                # The batch and the first single retry fail; the remaining messages go through.
+                self.assertEqual(FlakyBackendMixin.calls, [3, 1, 1, 1, 1])
+
+    def test_email_pool_gives_up_only_on_the_failing_message(self):
+        recipients = ["a@example.com", "bad@example.com", "c@example.com"]
+        FlakyBackendMixin.refused = {"bad@example.com"}
+        self.addCleanup(setattr, FlakyBackendMixin, "refused", set())
+        for backend in ("locmem", "file"):
+            with self.subTest(backend=backend), self.assertLogs("common.notifications", "ERROR") as logs:
+                delivered = self.deliver_emails(backend, recipients, max_retries=2)
+                self.assertEqual(sorted(delivered), ["a@example.com", "c@example.com"])
+                self.assertEqual(FlakyBackendMixin.calls, [3, 1, 1, 1, 1])
+                self.assertIn("Giving up on email to bad@example.com after 3 attempts", logs.output[0])
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"], DATABASE_REPLICA_STICKY_SECONDS=10)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Which alias the router picks, and read-your-writes stickiness after a write."""
+
+    user = SimpleNamespace(pk="user-1", is_authenticated=True)
+
+    def setUp(self):
+        caches["versions"].clear()
+
+    def handle(self, method, writes=False):
+        def get_response(request):
+            if writes:
+                ReplicaRouter().db_for_write(None)
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)("/")
+        request.user = self.user
+        ReplicaStickinessMiddleware(get_response)(request)
+
+    def test_reads_use_a_replica_only_inside_use_replica_and_outside_transactions(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(None))
+        with use_replica():
+            self.assertEqual(router.db_for_read(None), "replica1")
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(None), DEFAULT_DB_ALIAS)
+        self.assertEqual(router.db_for_write(None), DEFAULT_DB_ALIAS)
+        self.assertFalse(router.allow_migrate("replica1", "eWallet"))
+        self.assertIsNone(router.allow_migrate(DEFAULT_DB_ALIAS, "eWallet"))
+
+    def test_writes_pin_the_user_to_the_primary(self):
+        self.handle("get")
+        self.assertFalse(is_sticky(self.user.pk))
+        self.assertEqual(choose_replica(self.user.pk), "replica1")
+
+        for method, writes in (("get", True), ("post", False)):
+            with self.subTest(method=method, writes=writes):
+                caches["versions"].clear()
+                self.handle(method, writes)
+                # Another worker sees the flag: it is not in the per-process default cache.
+                cache.clear()
+                self.assertTrue(is_sticky(self.user.pk))
+                self.assertEqual(choose_replica(self.user.pk), DEFAULT_DB_ALIAS)
+                self.assertEqual(choose_replica("someone-else"), "replica1")
+
+    @override_settings(DATABASE_REPLICA_STICKY_SECONDS=0)
+    def test_stickiness_can_be_turned_off(self):
+        self.handle("post")
+        self.assertFalse(is_sticky(self.user.pk))
+
+    @override_settings(WEB_CONCURRENCY=2)
+    def test_stickiness_needs_a_shared_cache_with_several_workers(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.handle("post")
@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """
+    Parse ``"<requests>/<period>[:<burst>]"``, e.g. ``"5/min"`` or ``"30/hour:10"``, into
+    (capacity, tokens per second). The bucket holds ``burst`` tokens (default: the
+    request count) and refills at requests / period.
+    """
+    try:
+        sustained, _, burst = rate.partition(":")
+        count, period = sustained.split("/")
+        count = int(count)
+        seconds = PERIODS[period.strip()[0]]
+        capacity = int(burst) if burst else count
+    except (AttributeError, KeyError, IndexError, ValueError):
+        raise ImproperlyConfigured(f"Invalid throttle rate {rate!r}; use '<requests>/<s|m|h|d>[:<burst>]'.")
+    if count <= 0 or capacity <= 0:
+        raise ImproperlyConfigured(f"Invalid throttle rate {rate!r}; counts must be positive.")
+    return capacity, count / seconds
+
+
+def _take(state, capacity, refill_rate, now):
+    """
+    Refill a (tokens, updated_at) bucket up to now and take one token.
+    Returns (allowed, new_state, seconds until a token is available).
+    """
+    tokens, updated_at = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+    if tokens >= 1:
+        return True, (tokens - 1, now), 0.0
+    return False, (tokens, now), (1 - tokens) / refill_rate
+
+
+class LocalBuckets:
+    """
+    Token buckets in this process's memory, bounded by least recently used eviction.
+    Limits apply per worker process.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate):
+        with self._lock:
+            allowed, state, wait = _take(self._buckets.get(key), capacity, refill_rate, time.monotonic())
+            self._buckets[key] = state
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBuckets:
+    """
+    Token buckets in a Django cache, shared by every process using that cache. The
+    read-modify-write is not atomic, so concurrent requests for one key can overshoot
+    the limit by a request or two; it never blocks a request that should pass.
+    """
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    def take(self, key, capacity, refill_rate):
+        cache = caches[self.alias]
+        cache_key = f"throttle:{key}"
+        allowed, state, wait = _take(cache.get(cache_key), capacity, refill_rate, time.time())
+        # Kept until a full bucket would have refilled, after which a missing entry is equivalent.
+        cache.set(cache_key, state, timeout=max(1, int(capacity / refill_rate) + 1))
+        return allowed, wait
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_buckets():
+    """The bucket store selected by THROTTLE_BACKEND ("local" or "cache")."""
+    name = getattr(settings, "THROTTLE_BACKEND", "local")
+    with _backends_lock:
+        if name not in _backends:
+            if name == "local":
+                _backends[name] = LocalBuckets(getattr(settings, "THROTTLE_LOCAL_MAX_KEYS", 100000))
+            elif name == "cache":
+                _backends[name] = CacheBuckets(getattr(settings, "THROTTLE_CACHE_ALIAS", "default"))
+            else:
+                raise ImproperlyConfigured(f"Unknown THROTTLE_BACKEND {name!r}; use 'local' or 'cache'.")
+        return _backends[name]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token-bucket throttle for views with a ``throttle_scope``. The rate comes from
+    DEFAULT_THROTTLE_RATES under ``"<scope>.<kind>"``, e.g. ``"login.ip"``; a view with
+    no rate for this kind is not throttled by it. Subclasses choose what a request is
+    keyed on. Runs in APIView.initial(), before the handler touches the database.
+    """
+
+    kind = None
+
+    def get_key(self, request, view):
+        raise NotImplementedError(".get_key() must be overridden")
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        scope = getattr(view, "throttle_scope", None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(f"{scope}.{self.kind}") if scope else None
+        if rate is None:
+            return True
+
+        key = self.get_key(request, view)
+        if key is None:
+            return True
+
+        capacity, refill_rate = parse_rate(rate)
+        allowed, wait = get_buckets().take(f"{scope}:{self.kind}:{key}", capacity, refill_rate)
+        if not allowed:
+            self.retry_after = wait
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class IPThrottle(TokenBucketThrottle):
+    kind = "ip"
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+
+class EmailThrottle(TokenBucketThrottle):
+    """Keyed on the ``email`` field of the request body, normalised to lower case."""
+
+    kind = "email"
+
+    def get_key(self, request, view):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return email.strip().lower()
+
+
+class UserThrottle(TokenBucketThrottle):
+    kind = "user"
+
+    def get_key(self, request, view):
+        return request.user.pk if request.user and request.user.is_authenticated else None
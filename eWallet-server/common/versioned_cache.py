@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+
+class CacheStats:
+    """Thread-safe per-process hit/miss counters, keyed by cache name."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, name, hit):
+        with self._lock:
+            self._counts[(name, "hits" if hit else "misses")] += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        names = sorted({name for name, _ in counts})
+        return {
+            name: {
+                "hits": counts.get((name, "hits"), 0),
+                "misses": counts.get((name, "misses"), 0),
+            }
+            for name in names
+        }
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+cache_stats = CacheStats()
+
+
+def shared_cache(alias):
+    """
+    caches[alias], refused when it is a per-process LocMemCache while WEB_CONCURRENCY
+    says several workers serve the site: each would keep its own counters, and a bump
+    in one would not invalidate what the others cached.
+    """
+    cache = caches[alias]
+    if isinstance(cache, LocMemCache) and getattr(settings, "WEB_CONCURRENCY", 1) > 1:
+        raise ImproperlyConfigured(
+            f"CACHES[{alias!r}] is a per-process LocMemCache but WEB_CONCURRENCY is "
+            f"{settings.WEB_CONCURRENCY}; configure a backend shared by every worker."
+        )
+    return cache
+
+
+class VersionCounters:
+    """
+    Version numbers kept in a Django cache, one per object id. Bumping is a single
+    ``incr`` per id, so everything keyed on the old version is invalidated at once
+    without finding or deleting it.
+
+    A counter that is missing (never set, evicted or lost with a cache restart) is
+    recreated from the clock instead of from 1, so it can never come back to a value
+    that older cached entries were stored under. The cache must be shared by every
+    worker process (see shared_cache()).
+    """
+
+    def __init__(self, namespace, cache_alias="versions"):
+        self.namespace = namespace
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return shared_cache(self.cache_alias)
+
+    def key(self, object_id):
+        return f"{self.namespace}:version:{object_id}"
+
+    def get_many(self, object_ids):
+        """Return {object_id: version}, initialising counters that are missing."""
+        keys = {self.key(object_id): object_id for object_id in object_ids}
+        found = self.cache.get_many(keys)
+        versions = {keys[key]: version for key, version in found.items()}
+        for key, object_id in keys.items():
+            if object_id not in versions:
+                self.cache.add(key, time.time_ns(), timeout=None)
+                versions[object_id] = self.cache.get(key)
+        return versions
+
+    def bump(self, object_ids):
+        for object_id in set(object_ids):
+            key = self.key(object_id)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, time.time_ns(), timeout=None)
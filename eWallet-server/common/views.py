@@ -1,3 +1,28 @@
-from django.shortcuts import render
+from django.http import HttpResponse
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from common.instrumentation import endpoint_metrics, render_prometheus
+from common.versioned_cache import cache_stats
+
+
+class CacheStatsAPIView(APIView):
+    """Per-process response cache hit/miss counters, for staff monitoring."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        stats = cache_stats.snapshot()
+        for counts in stats.values():
+            lookups = counts["hits"] + counts["misses"]
+            counts["hit_ratio"] = round(counts["hits"] / lookups, 4) if lookups else 0.0
+        return Response(stats)
+
+
+class MetricsAPIView(APIView):
+    """Per-endpoint latency, SQL and serializer percentiles in Prometheus text format, for staff."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        body = render_prometheus(endpoint_metrics.snapshot(), cache_stats.snapshot())
+        return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -13,7 +13,9 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from datetime import timedelta
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
+
+from common.sqlite import sqlite_options
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -55,12 +57,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'common.instrumentation.PerformanceMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'common.replicas.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -84,17 +88,65 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLITE_PROFILE=production enables WAL, synchronous=NORMAL, mmap, a busy timeout
+# and BEGIN IMMEDIATE for writes (see common/sqlite.py). The "default" profile keeps
+# SQLite's deferred transactions, under which concurrent transfers fail with
+# "database is locked"; use it only for single-process development.
+SQLITE_PROFILE = config('SQLITE_PROFILE', default='default')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': sqlite_options(
+            SQLITE_PROFILE,
+            busy_timeout=config('SQLITE_BUSY_TIMEOUT', default=20, cast=float),
+            mmap_size=config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+        ),
+    }
+}
+
+# Read replicas for analytics and list endpoints (see common/replicas.py). Locally each
+# entry is an SQLite file refreshed from the primary with `manage.py sync_replicas`.
+DATABASE_REPLICAS = []
+for index, replica_name in enumerate(config('DATABASE_REPLICA_FILES', default='', cast=Csv()), start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / replica_name,
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['common.replicas.ReplicaRouter']
+
+# Number of worker processes serving the site (the variable gunicorn reads too).
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1, cast=int)
+
+# "versions" holds the invalidation counters for cached accounts and authenticated users
+# (see common/versioned_cache.py). Every worker must bump and read the same counters, so
+# with WEB_CONCURRENCY > 1 it has to be a shared backend (file, Redis, Memcached); the
+# per-process LocMemCache is then refused with ImproperlyConfigured.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='ewallet'),
+    },
+    'versions': {
+        'BACKEND': config('VERSION_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('VERSION_CACHE_LOCATION', default='ewallet-versions'),
+    },
 }
+# Seconds a cached analytics response may live; it is invalidated sooner by any new transaction.
+ANALYTICS_CACHE_TIMEOUT = config('ANALYTICS_CACHE_TIMEOUT', default=300, cast=int)
+# After a write, the user's reads stay on the primary for this many seconds (flag kept in CACHES['versions']).
+DATABASE_REPLICA_STICKY_SECONDS = config('DATABASE_REPLICA_STICKY_SECONDS', default=10, cast=int)
 
 
 # Password validation
@@ -146,8 +198,27 @@ AUTH_USER_MODEL = 'eWallet.CustomUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'common.authentication.CachedJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'common.instrumentation.InstrumentedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ),
+    # Token buckets for the views that set throttle_scope (see common/throttling.py), as
+    # "<scope>.<key>": "<requests>/<period>[:<burst>]". Remove an entry to lift that limit.
+    'DEFAULT_THROTTLE_RATES': {
+        'login.ip': config('THROTTLE_LOGIN_IP', default='30/min'),
+        'login.email': config('THROTTLE_LOGIN_EMAIL', default='5/min'),
+        'pay-customer.user': config('THROTTLE_PAYMENTS_USER', default='60/min:20'),
+        'pay-customer.ip': config('THROTTLE_PAYMENTS_IP', default='300/min'),
+        'send-money-via-qr.user': config('THROTTLE_PAYMENTS_USER', default='60/min:20'),
+        'send-money-via-qr.ip': config('THROTTLE_PAYMENTS_IP', default='300/min'),
+        'pay-customers.user': config('THROTTLE_PAYOUTS_USER', default='10/min'),
+        'pay-customers.ip': config('THROTTLE_PAYMENTS_IP', default='300/min'),
+    },
+    # Proxies in front of the app; 0 keys throttles on REMOTE_ADDR and ignores the
+    # client-supplied X-Forwarded-For.
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
 SIMPLE_JWT = {
@@ -156,6 +227,7 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'common.authentication.RevokingTokenRefreshSerializer',
 }
 
 
@@ -171,3 +243,82 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL')
 
 
+# Idempotency-Key handling for money-moving endpoints (see common/idempotency.py)
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=24 * 60 * 60, cast=int)
+IDEMPOTENCY_CACHE_SIZE = 1024
+IDEMPOTENCY_WAIT_TIMEOUT = 10
+IDEMPOTENCY_RETRY_AFTER = 1
+# Seconds after which an in-progress key is presumed abandoned (its request crashed) and may be reclaimed.
+IDEMPOTENCY_LEASE_TIMEOUT = config('IDEMPOTENCY_LEASE_TIMEOUT', default=60, cast=int)
+IDEMPOTENCY_PURGE_INTERVAL = 300
+IDEMPOTENCY_PURGE_BATCH_SIZE = 1000
+
+# QR codes are rendered on first access ("lazy") or on a worker thread after signup ("background").
+QR_CODE_GENERATION = config('QR_CODE_GENERATION', default='lazy')
+QR_CODE_WORKERS = 1
+QR_CODE_CACHE_BYTES = 16 * 1024 * 1024
+# QR payloads are HMAC-signed with QR_SIGNING_KEY (falls back to SECRET_KEY).
+QR_SIGNING_KEY = config('QR_SIGNING_KEY', default=None)
+# Unsigned "User ID: ..." payloads from before signing. Turn off once
+# `manage.py backfill_qr_codes --reissue` has replaced every stored image and old prints are withdrawn.
+QR_ACCEPT_LEGACY_PAYLOADS = config('QR_ACCEPT_LEGACY_PAYLOADS', default=True, cast=bool)
+QR_PROFILE_CACHE_TTL = 60
+QR_PROFILE_CACHE_SIZE = 4096
+
+# Background email delivery (see common/notifications.py)
+EMAIL_POOL_WORKERS = config('EMAIL_POOL_WORKERS', default=2, cast=int)
+EMAIL_POOL_QUEUE_SIZE = 1000
+EMAIL_POOL_BATCH_SIZE = 50
+EMAIL_POOL_MAX_RETRIES = 3
+EMAIL_POOL_RETRY_BACKOFF = 1.0
+EMAIL_POOL_PUT_TIMEOUT = 5.0
+EMAIL_POOL_DRAIN_TIMEOUT = 30
+
+# Real-time wallet pushes over WebSockets (see eWallet/consumers.py). The in-memory
+# layer only reaches clients connected to the same process; set CHANNEL_REDIS_URL
+# to fan out across workers with channels_redis.
+CHANNEL_REDIS_URL = config('CHANNEL_REDIS_URL', default='')
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [CHANNEL_REDIS_URL]},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
+    }
+REALTIME_PUSH_ENABLED = config('REALTIME_PUSH_ENABLED', default=True, cast=bool)
+
+# Per-request timings (see common/instrumentation.py); set to False to stop sending Server-Timing.
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=True, cast=bool)
+
+# Number of recent transactions embedded in the dashboard response.
+DASHBOARD_RECENT_TRANSACTIONS = config('DASHBOARD_RECENT_TRANSACTIONS', default=10, cast=int)
+
+# Per-process cache of users resolved from JWTs (see common/authentication.py).
+# Entries are dropped at once when the user row changes; the TTL bounds memory only.
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=30, cast=int)
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=10000, cast=int)
+
+# Refresh-token revocation (see common/revocation.py). The filter is sized for CAPACITY
+# revoked tokens at ERROR_RATE false positives and rebuilt from the database every
+# REBUILD_INTERVAL seconds, dropping tokens past their natural expiry.
+JWT_REVOCATION_FILTER_CAPACITY = config('JWT_REVOCATION_FILTER_CAPACITY', default=100000, cast=int)
+JWT_REVOCATION_FILTER_ERROR_RATE = config('JWT_REVOCATION_FILTER_ERROR_RATE', default=0.001, cast=float)
+JWT_REVOCATION_REBUILD_INTERVAL = config('JWT_REVOCATION_REBUILD_INTERVAL', default=3600, cast=int)
+
+# Where throttle buckets live: "local" (per process) or "cache" (the THROTTLE_CACHE_ALIAS
+# cache, shared by every process using it, e.g. Redis or the file backend).
+THROTTLE_BACKEND = config('THROTTLE_BACKEND', default='local')
+THROTTLE_CACHE_ALIAS = config('THROTTLE_CACHE_ALIAS', default='default')
+
+# User directory (GET /users/): result counts are exact up to this many rows, past which
+# the response reports a table estimate (unfiltered) or this limit as a lower bound.
+USER_DIRECTORY_EXACT_COUNT_LIMIT = config('USER_DIRECTORY_EXACT_COUNT_LIMIT', default=1000, cast=int)
+# Non-staff users may only search the directory, with at least this many characters.
+USER_DIRECTORY_MIN_SEARCH_LENGTH = config('USER_DIRECTORY_MIN_SEARCH_LENGTH', default=3, cast=int)
+
+# Django admin change lists (see common/admin.py) count at most this many rows exactly.
+ADMIN_EXACT_COUNT_LIMIT = config('ADMIN_EXACT_COUNT_LIMIT', default=10000, cast=int)
@@ -17,7 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from common.views import CacheStatsAPIView, MetricsAPIView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/', include('eWallet.urls')),
+    path('api/v1/metrics/', MetricsAPIView.as_view()),
+    path('api/v1/metrics/cache/', CacheStatsAPIView.as_view()),
 ]
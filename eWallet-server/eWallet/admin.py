@@ -1,18 +1,49 @@
 from django.contrib import admin
 
-from eWallet.models import Account, CustomUser
+from common.admin import LargeTableAdmin, ReadOnlyLargeTableAdmin
+from eWallet.models import Account, Card, CustomUser, SpendingLog, Transaction
 
 # Register your models here.
+# Search entries are index-backed exact ("=") or prefix ("^") matches; see LargeTableAdmin.
 @admin.register(CustomUser)
-class CustomUserAdmin(admin.ModelAdmin):
+class CustomUserAdmin(LargeTableAdmin):
     list_display = ['id', 'full_name', 'email', 'phone_number', 'is_verified', 'is_blocked']
-    search_fields = ['full_name', 'email', 'phone_number']
+    search_fields = ['=id', '^full_name', '^email', '^phone_number']
+    case_insensitive_search_fields = ['full_name', 'email']
     list_filter = ['is_verified', 'is_blocked']
     ordering = ['id']
 
 @admin.register(Account)
-class AccountAdmin(admin.ModelAdmin):
+class AccountAdmin(LargeTableAdmin):
     list_display = ['id', 'user', 'account_name', 'account_number', 'balance']
-    search_fields = ['account_name', 'account_number', 'balance']
-    list_filter = ['account_name']
-    ordering = ['id']
\ No newline at end of file
+    list_select_related = ['user']
+    raw_id_fields = ['user']
+    search_fields = ['=id', '^account_number', '^user__email', '^user__phone_number']
+    case_insensitive_search_fields = ['user__email']
+    ordering = ['id']
+
+@admin.register(Card)
+class CardAdmin(LargeTableAdmin):
+    list_display = ['id', 'account', 'card_holder_name', 'card_type', 'card_issuer', 'card_balance', 'expiry_date']
+    list_select_related = ['account']
+    raw_id_fields = ['account']
+    search_fields = ['=id', '^card_number', '^account__account_number', '^account__user__email']
+    case_insensitive_search_fields = ['account__user__email']
+    list_filter = ['card_type', 'card_issuer']
+    ordering = ['id']
+
+@admin.register(Transaction)
+class TransactionAdmin(ReadOnlyLargeTableAdmin):
+    list_display = ['id', 'account', 'transaction_type', 'subtype', 'description', 'amount', 'amount_after', 'created_at']
+    list_select_related = ['account']
+    search_fields = ['=id', '^account__account_number', '^account__user__email']
+    case_insensitive_search_fields = ['account__user__email']
+    list_filter = ['transaction_type', 'subtype', 'description']
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
+
+@admin.register(SpendingLog)
+class SpendingLogAdmin(ReadOnlyLargeTableAdmin):
+    list_display = ['id', 'transaction', 'category', 'timestamp']
+    list_select_related = ['transaction']
+    search_fields = ['=id', '=transaction__id']
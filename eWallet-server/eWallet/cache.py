@@ -0,0 +1,152 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from common.versioned_cache import VersionCounters, cache_stats
+from .models import Account, Transaction
+
+account_versions = VersionCounters("eWallet:account")
+
+USER_ACCOUNTS_KEY = "eWallet:user-accounts:{}"
+RESPONSE_KEY = "eWallet:response:{name}:{user_id}:{version}:{params}"
+
+
+def user_account_ids(user_id):
+    """
+    The user's account ids, cached until an account is created or deleted. Kept next to
+    the version counters, since every worker has to see the invalidation.
+    """
+    key = USER_ACCOUNTS_KEY.format(user_id)
+    account_ids = account_versions.cache.get(key)
+    if account_ids is None:
+        account_ids = sorted(str(pk) for pk in Account.objects.filter(user_id=user_id).values_list("id", flat=True))
+        account_versions.cache.set(key, account_ids, timeout=None)
+    return account_ids
+
+
+def forget_user_accounts(user_id):
+    account_versions.cache.delete(USER_ACCOUNTS_KEY.format(user_id))
+
+
+def bump_account_versions(account_ids):
+    """Invalidate every cached response built from these accounts. Call after the write commits."""
+    account_versions.bump(str(account_id) for account_id in account_ids)
+
+
+def bump_on_commit(account_ids):
+    """Bump the accounts' versions once the surrounding database transaction commits."""
+    account_ids = list(account_ids)
+    transaction.on_commit(lambda: bump_account_versions(account_ids))
+
+
+def user_version(user_id):
+    """A token that changes whenever any of the user's accounts changes."""
+    account_ids = user_account_ids(user_id)
+    versions = account_versions.get_many(account_ids)
+    return ".".join(str(versions[account_id]) for account_id in account_ids) or "0"
+
+
+def _params_digest(query_params):
+    items = sorted((key, tuple(query_params.getlist(key))) for key in query_params)
+    return hashlib.sha256(repr(items).encode()).hexdigest()[:16]
+
+
+PROFILE_FIELDS = ("id", "full_name", "email", "phone_number", "is_verified", "is_blocked")
+
+
+def user_etag(name, request):
+    """
+    ETag for a per-user resource: the user's account versions, the query string and the
+    profile fields of the already authenticated user. Costs no queries once the user's
+    account ids are cached.
+    """
+    user = request.user
+    parts = [
+        name,
+        user_version(user.pk),
+        _params_digest(request.query_params),
+        *(str(getattr(user, field)) for field in PROFILE_FIELDS),
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()[:32]
+
+
+def cached_response(name):
+    """
+    Cache a read-only APIView handler's 200 response per user and query string.
+
+    The key carries the version of every account the user owns, and those versions
+    are bumped once each transaction commits and its aggregates are applied, so a
+    cached body is never served after the data it was built from changed.
+    Answers computed on a read replica are kept no longer than the stickiness window,
+    since the replica may not have caught up with the latest bump yet.
+    """
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            key = RESPONSE_KEY.format(
+                name=name,
+                user_id=request.user.pk,
+                version=user_version(request.user.pk),
+                params=_params_digest(request.query_params),
+            )
+            data = cache.get(key)
+            if data is not None:
+                cache_stats.record(name, hit=True)
+                return Response(data)
+
+            cache_stats.record(name, hit=False)
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                timeout = getattr(settings, "ANALYTICS_CACHE_TIMEOUT", 300)
+                if router.db_for_read(Transaction) != DEFAULT_DB_ALIAS:
+                    timeout = min(timeout, getattr(settings, "DATABASE_REPLICA_STICKY_SECONDS", 10))
+                cache.set(key, response.data, timeout)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def conditional_response(etag_func):
+    """
+    Answer If-None-Match on a read-only APIView handler.
+
+    etag_func(request) must be cheap, built from version counters rather than the data
+    itself, so a matching request gets a 304 without running the handler. The ETag is
+    computed before the handler reads anything, so a write landing in between only makes
+    the next request miss. Bodies read from a replica get no ETag, for the same reason
+    cached_response shortens their lifetime.
+    """
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            etag = quote_etag(etag_func(request))
+            candidates = parse_etags(request.headers.get("If-None-Match", ""))
+            if "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response["ETag"] = etag
+                return response
+
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK and router.db_for_read(Transaction) == DEFAULT_DB_ALIAS:
+                response["ETag"] = etag
+                response["Cache-Control"] = "private, no-cache"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def conditional_user_response(name):
+    """conditional_response for a per-user resource, keyed on user_etag(name, request)."""
+    return conditional_response(lambda request: user_etag(name, request))
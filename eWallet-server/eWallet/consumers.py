@@ -0,0 +1,34 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .realtime import group_name
+
+
+class WalletConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes the authenticated user's balance changes and new transactions.
+    Messages are ``{"type": "balance", ...}`` and ``{"type": "transaction", ...}``.
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.group = group_name(user.pk)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, "group"):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if content.get("type") == "ping":
+            await self.send_json({"type": "pong"})
+
+    async def wallet_balance(self, event):
+        await self.send_json({"type": "balance", "account": event["account"], "balance": event["balance"]})
+
+    async def wallet_transaction(self, event):
+        await self.send_json({"type": "transaction", "transaction": event["transaction"]})
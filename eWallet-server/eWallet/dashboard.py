@@ -0,0 +1,103 @@
+"""
+Everything the client shows on its home screen, in one response and a fixed number of
+queries: the account joined with its latest card, the most recent transactions, and one
+pass over the daily summaries that yields both the monthly comparison and the totals.
+"""
+from django.conf import settings
+from django.db.models import F, Sum
+from django.urls import reverse
+
+from common.encoders import row_encoder
+from .cache import user_etag
+from .models import Account, DailyTransactionSummary, Transaction
+from .qr import qr_payload
+from .serializers import (
+    CardSerializer,
+    DashboardAccountSerializer,
+    GetUserSerializer,
+    IncomeExpenditureSerializer,
+    TransactionSerializer,
+)
+
+# Bump when the response layout changes, so clients holding an old ETag refetch.
+DASHBOARD_SCHEMA = "1"
+CARD_PREFIX = "card_"
+
+
+def dashboard_etag(request):
+    """Changes whenever the user's accounts (balances, transactions, cards) or profile change."""
+    return user_etag(f"dashboard:{DASHBOARD_SCHEMA}", request)
+
+
+def _account_and_card(user):
+    """The user's account and its most recently created card (or None), from one joined query."""
+    account_encoder = row_encoder(DashboardAccountSerializer)
+    card_encoder = row_encoder(CardSerializer)
+    row = (
+        Account.objects.filter(user=user)
+        .values(
+            *account_encoder.columns,
+            **{f"{CARD_PREFIX}{column}": F(f"cards__{column}") for column in card_encoder.columns},
+        )
+        .order_by(F("cards__created_at").desc(nulls_last=True), F("cards__id").desc(nulls_last=True))
+        .first()
+    )
+    if row is None:
+        return None, None
+
+    account = account_encoder.encode(row)
+    if row[f"{CARD_PREFIX}id"] is None:
+        return account, None
+    card = card_encoder.encode({column: row[f"{CARD_PREFIX}{column}"] for column in card_encoder.columns})
+    return account, card
+
+
+def _recent_transactions(user, limit):
+    encoder = row_encoder(TransactionSerializer)
+    rows = (
+        Transaction.objects.filter(account__user=user)
+        .order_by("-created_at", "-id")
+        .values(*encoder.columns)[:limit]
+    )
+    return encoder.encode_many(rows)
+
+
+def _analytics(user):
+    """Monthly deposit/debit comparison and all-time income/expenditure totals, in one query."""
+    months = DailyTransactionSummary.objects.monthly_totals(account__user=user).annotate(
+        total_income=Sum("total_income"), total_expenditure=Sum("total_expenditure")
+    )
+
+    monthly, income, expenditure = [], 0, 0
+    for entry in months:
+        monthly.append({
+            "year": entry["date__year"],
+            "month": entry["date__month"],
+            "total_deposits": entry["total_deposits"] or 0.00,
+            "total_debits": entry["total_debits"] or 0.00,
+        })
+        income += entry["total_income"] or 0
+        expenditure += entry["total_expenditure"] or 0
+
+    totals = IncomeExpenditureSerializer({"total_income": income, "total_expenditure": expenditure}).data
+    return totals, monthly
+
+
+def build_dashboard(request):
+    user = request.user
+    account, card = _account_and_card(user)
+    totals, monthly = _analytics(user)
+    return {
+        "user": GetUserSerializer(user).data,
+        "account": account,
+        "card": card,
+        "recent_transactions": _recent_transactions(user, getattr(settings, "DASHBOARD_RECENT_TRANSACTIONS", 10)),
+        "income_expenditure": totals,
+        "monthly_comparison": monthly,
+        # The image endpoint renders and caches the PNG on first access, so the dashboard
+        # never has to wait for it or look up the stored file.
+        "qr_code": {
+            "qr_data": qr_payload(user),
+            "qr_image": request.build_absolute_uri(reverse("user-qr-code-image")),
+        },
+    }
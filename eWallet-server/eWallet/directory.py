@@ -0,0 +1,114 @@
+"""
+The user directory behind ``GET /users/``: cursor-paginated, projected to the serialized
+columns, and searchable by name, email or phone prefix.
+
+Every listing is ordered by one of three sort keys, each backed by an index (see
+CustomUser.Meta.indexes; phone numbers are unique, so their own index suffices). A prefix
+search is a range on the same key it is ordered by, so any page, filtered or not, is a
+single index range scan of page_size rows and its cost does not grow with the number of
+users.
+
+Only staff may list the whole directory; other users must search with a prefix of at
+least USER_DIRECTORY_MIN_SEARCH_LENGTH characters, and see only the public fields of the
+users they find (CustomUserSerializer.PUBLIC_FIELDS).
+"""
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Lower
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+
+from common.encoders import row_encoder
+from common.filters import prefix_range
+from common.pagination import KeysetPagination, bounded_count
+from .models import CustomUser
+from .serializers import CustomUserSerializer, PublicUserSerializer
+
+SORT_KEY = "directory_key"
+
+# search_by value -> (sort key expression, normalisation applied to the search prefix)
+SEARCH_KEYS = {
+    "name": (lambda: Lower("full_name"), str.lower),
+    "email": (lambda: Lower("email"), str.lower),
+    "phone": (lambda: F("phone_number"), lambda prefix: prefix.replace(" ", "")),
+}
+
+
+class DirectoryPagination(KeysetPagination):
+    """
+    Ascending keyset pagination on (directory_key, id). Responses also carry ``count``,
+    exact when ``count_exact`` is true and an estimate or lower bound otherwise.
+    """
+
+    ordering_field = SORT_KEY
+    descending = False
+    count = (0, True)
+
+    def parse_position(self, value):
+        return value if isinstance(value, str) else None
+
+    def format_position(self, value):
+        return value
+
+    def get_paginated_response(self, data):
+        count, exact = self.count
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("count", count),
+            ("count_exact", exact),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count"] = {"type": "integer"}
+        response_schema["properties"]["count_exact"] = {"type": "boolean"}
+        return response_schema
+
+
+def _search_by(query_params, search):
+    search_by = query_params.get("search_by")
+    if search_by is None:
+        if "@" in search:
+            return "email"
+        if search and search.lstrip("+").replace(" ", "").isdigit():
+            return "phone"
+        return "name"
+    if search_by not in SEARCH_KEYS:
+        raise ValidationError({"search_by": f"Must be one of: {', '.join(SEARCH_KEYS)}."})
+    return search_by
+
+
+def build_directory(request, view=None):
+    """
+    One page of users, ordered by name, or by the searched key when ``?search=`` is given.
+    ``?search_by=name|email|phone`` picks the key; without it an ``@`` means email and a
+    number means phone. Non-staff callers must search (see the module docstring). Returns
+    the paginator and the encoded rows of the page.
+    """
+    search = request.query_params.get("search", "").strip()
+    search_by = _search_by(request.query_params, search)
+    key, normalise = SEARCH_KEYS[search_by]
+
+    encoder = row_encoder(CustomUserSerializer if request.user.is_staff else PublicUserSerializer)
+    users = CustomUser.objects.values(*encoder.columns, **{SORT_KEY: key()})
+
+    search = normalise(search)
+    if not request.user.is_staff:
+        min_length = getattr(settings, "USER_DIRECTORY_MIN_SEARCH_LENGTH", 3)
+        if not search:
+            raise PermissionDenied("Only staff can list every user; pass ?search= to find someone.")
+        if len(search) < min_length:
+            raise PermissionDenied(f"Searches need at least {min_length} characters.")
+    if search:
+        lower, upper = prefix_range(search)
+        users = users.filter(**{f"{SORT_KEY}__gte": lower})
+        if upper is not None:
+            users = users.filter(**{f"{SORT_KEY}__lt": upper})
+
+    paginator = DirectoryPagination()
+    page = paginator.paginate_queryset(users, request, view=view)
+    paginator.count = bounded_count(users, limit=getattr(settings, "USER_DIRECTORY_EXACT_COUNT_LIMIT", 1000))
+    return paginator, encoder.encode_many(page)
@@ -0,0 +1,103 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from common.filters import filter_transactions_by_type
+from .models import Transaction
+
+EXPORT_FIELDS = [
+    "id",
+    "account_id",
+    "amount",
+    "amount_before",
+    "amount_after",
+    "transaction_type",
+    "subtype",
+    "description",
+    "created_at",
+]
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object that hands back what is written, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def parse_day(value, field):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Invalid {field}. Use YYYY-MM-DD.")
+
+
+def export_queryset(params, **filters):
+    """
+    Transactions to export, oldest first, narrowed by the optional start_date/end_date
+    (inclusive days) and type/subtype parameters. Raises ValueError for bad dates.
+    """
+    transactions = Transaction.objects.filter(**filters)
+    current_tz = timezone.get_current_timezone()
+
+    if params.get("start_date"):
+        start = parse_day(params["start_date"], "start_date")
+        transactions = transactions.filter(created_at__gte=datetime.combine(start, time.min, current_tz))
+    if params.get("end_date"):
+        end = parse_day(params["end_date"], "end_date") + timedelta(days=1)
+        transactions = transactions.filter(created_at__lt=datetime.combine(end, time.min, current_tz))
+
+    transactions = filter_transactions_by_type(transactions, params)
+    return transactions.order_by("created_at", "id").values_list(*EXPORT_FIELDS)
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def csv_chunks(rows, chunk_size=CHUNK_SIZE):
+    """Yield the export as CSV text, one chunk of rows at a time."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+
+    buffer = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        buffer.append(writer.writerow([_text(value) for value in row]))
+        if len(buffer) >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def ndjson_chunks(rows, chunk_size=CHUNK_SIZE):
+    """Yield the export as newline-delimited JSON, one chunk of rows at a time."""
+    buffer = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        record = {
+            field: None if value is None else _text(value)
+            for field, value in zip(EXPORT_FIELDS, row)
+        }
+        buffer.append(json.dumps(record) + "\n")
+        if len(buffer) >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+EXPORTERS = {
+    "csv": csv_chunks,
+    "ndjson": ndjson_chunks,
+}
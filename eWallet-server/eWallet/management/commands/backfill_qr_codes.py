@@ -0,0 +1,108 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from eWallet.models import CustomUser, QRCode
+from eWallet.qr import qr_payload, render_qr_png
+
+
+class Command(BaseCommand):
+    help = (
+        "Render QR codes for users that do not have one yet, encoding images on a process pool. "
+        "With --reissue, re-render stored codes that do not carry the signed payload instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes (defaults to CPU count).")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--reissue",
+            action="store_true",
+            help="Replace stored images that predate signed payloads, so QR_ACCEPT_LEGACY_PAYLOADS can be turned off.",
+        )
+
+    def handle(self, *args, **options):
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            if options["reissue"]:
+                self.reissue(pool, options["batch_size"])
+            else:
+                self.backfill(pool, options["batch_size"])
+
+    def render(self, pool, users):
+        payloads = [qr_payload(user) for user in users]
+        return list(pool.map(render_qr_png, payloads, chunksize=max(1, len(payloads) // 32)))
+
+    def store(self, user, png):
+        name = QRCode._meta.get_field("qr_image").generate_filename(None, f"qr_code_{user.id}.png")
+        return default_storage.save(name, ContentFile(png))
+
+    def backfill(self, pool, batch_size):
+        missing = CustomUser.objects.filter(qr_code__isnull=True).order_by("id")
+        created = 0
+
+        while True:
+            users = list(missing.only("id", "full_name", "email", "phone_number")[:batch_size])
+            if not users:
+                break
+
+            images = self.render(pool, users)
+            qr_codes = [QRCode(user=user, qr_image=self.store(user, png)) for user, png in zip(users, images)]
+
+            created += self.insert(qr_codes)
+            self.stdout.write(f"Rendered {created} QR codes")
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {created} QR codes."))
+
+    def insert(self, qr_codes):
+        """
+        Insert the rows, skipping users that got a code from another process meanwhile, and
+        delete the files written for the skipped rows. Files are written before the rows, as
+        the lazy path does, so a stored row never points at a missing image. Returns the
+        number of rows inserted.
+        """
+        QRCode.objects.bulk_create(qr_codes, ignore_conflicts=True)
+        inserted = set(QRCode.objects.filter(id__in=[qr_code.id for qr_code in qr_codes]).values_list("id", flat=True))
+        for qr_code in qr_codes:
+            if qr_code.id not in inserted:
+                default_storage.delete(qr_code.qr_image.name)
+        return len(inserted)
+
+    def reissue(self, pool, batch_size):
+        """
+        Rendering is deterministic, so a stored image that differs from a fresh render of
+        the signed payload was encoded from something else: the unsigned "User ID: ..." text.
+        Web processes keep serving cached images until restarted.
+        """
+        qr_codes = QRCode.objects.select_related("user").only("id", "qr_image", "user__id").order_by("id")
+        last_id, checked, reissued = None, 0, 0
+
+        while True:
+            batch = qr_codes if last_id is None else qr_codes.filter(id__gt=last_id)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            images = self.render(pool, [qr_code.user for qr_code in batch])
+            stale, replaced = [], []
+            for qr_code, png in zip(batch, images):
+                try:
+                    with qr_code.qr_image.open("rb") as image:
+                        if image.read() == png:
+                            continue
+                except FileNotFoundError:
+                    pass
+                replaced.append(qr_code.qr_image.name)
+                qr_code.qr_image = self.store(qr_code.user, png)
+                stale.append(qr_code)
+
+            QRCode.objects.bulk_update(stale, ["qr_image"])
+            for name in replaced:
+                default_storage.delete(name)
+            checked += len(batch)
+            reissued += len(stale)
+            self.stdout.write(f"Checked {checked} QR codes, reissued {reissued}")
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {reissued} QR codes reissued."))
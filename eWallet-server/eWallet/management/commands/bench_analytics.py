@@ -0,0 +1,92 @@
+import json
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from common.benchmarks import benchmark_database, explicit_timestamps, summarize
+from common.filters import filter_transactions_by_duration
+from eWallet.models import Account, CustomUser, DailyTransactionSummary, Transaction
+
+
+class Command(BaseCommand):
+    help = "Show analytics latency as transaction history grows, scanning transactions vs reading daily summaries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated history sizes.")
+        parser.add_argument("--days", type=int, default=365, help="Days the history is spread over.")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["sizes"].split(","))
+        report = []
+
+        with benchmark_database():
+            user = CustomUser.objects.bulk_create([CustomUser(
+                email="analytics@example.com", username="analytics", full_name="Analytics", phone_number="08000000000"
+            )])[0]
+            account = Account.objects.create(user=user, account_name="Analytics", account_number="8000000000")
+
+            seeded = 0
+            for size in sizes:
+                self.seed(account, size - seeded, options["days"])
+                seeded = size
+                DailyTransactionSummary.objects.rebuild([account.id])
+
+                report.append({
+                    "transactions": size,
+                    "scan": summarize(self.measure(lambda: self.scan(user), options["repeat"])),
+                    "summaries": summarize(self.measure(lambda: self.read(user), options["repeat"])),
+                })
+
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def seed(self, account, count, days):
+        rng = random.Random(count)
+        start = timezone.now() - timedelta(days=days)
+        rows = []
+        for _ in range(count):
+            is_deposit = rng.random() < 0.5
+            rows.append(Transaction(
+                account=account,
+                amount=Decimal(rng.randint(100, 100000)) / 100,
+                transaction_type="deposit" if is_deposit else "debit",
+                subtype="income" if is_deposit else "expenditure",
+                created_at=start + timedelta(seconds=rng.randint(0, days * 86400)),
+            ))
+        with explicit_timestamps(Transaction, "created_at"):
+            Transaction.objects.bulk_create(rows, batch_size=1000)
+
+    def measure(self, run, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - started)
+        return samples
+
+    def scan(self, user):
+        """The pre-summary queries: aggregate every transaction of the user."""
+        transactions = Transaction.objects.filter(account__user=user)
+        list(
+            transactions.values("created_at__year", "created_at__month")
+            .annotate(
+                total_deposits=Sum("amount", filter=Q(transaction_type="deposit")),
+                total_debits=Sum("amount", filter=Q(transaction_type="debit")),
+            )
+            .order_by("created_at__year", "created_at__month")
+        )
+        end = timezone.now()
+        transactions.filter(created_at__range=[end - timedelta(days=30), end]).aggregate(
+            total_income=Sum("amount", filter=Q(subtype="income")),
+            total_expenditure=Sum("amount", filter=Q(subtype="expenditure")),
+        )
+
+    def read(self, user):
+        filter_transactions_by_duration(user, "all")
+        end = timezone.now()
+        Transaction.objects.get_income_expenditure_by_date(user, end - timedelta(days=30), end)
@@ -0,0 +1,231 @@
+import json
+import random
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from common.benchmarks import benchmark_database, summarize
+from common.sqlite import SQLITE_PROFILES, sqlite_options
+from eWallet.models import Account, CustomUser
+from eWallet.qr import qr_payload
+from eWallet.seeding import SEED_PASSWORD, rebuild_derived, seed_transactions, seed_users
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def _date_range():
+    today = timezone.localdate()
+    return f"start_date={today - timedelta(days=30)}&end_date={today}"
+
+
+# name -> (method, path, body); path and body are called with (user, other_user).
+ENDPOINTS = {
+    "users-me": ("GET", lambda u, o: "/api/v1/users/me/", None),
+    "users": ("GET", lambda u, o: "/api/v1/users/", None),
+    "dashboard": ("GET", lambda u, o: "/api/v1/dashboard/", None),
+    "account": ("GET", lambda u, o: "/api/v1/account/", None),
+    "card": ("GET", lambda u, o: "/api/v1/card/", None),
+    "transactions": ("GET", lambda u, o: "/api/v1/transactions/?page_size=20", None),
+    "debits": ("GET", lambda u, o: "/api/v1/transactions/debit/?page_size=20", None),
+    "credits": ("GET", lambda u, o: "/api/v1/transactions/credit/?page_size=20", None),
+    "export": ("GET", lambda u, o: "/api/v1/transactions/export/ndjson/", None),
+    "income-expenditure": ("GET", lambda u, o: "/api/v1/transactions/income-expenditure/", None),
+    "income-expenditure-by-date": (
+        "GET", lambda u, o: f"/api/v1/transactions/income-expenditure-by-date/?{_date_range()}", None,
+    ),
+    "monthly-comparison": ("GET", lambda u, o: "/api/v1/transactions/monthly-comparison/?duration=all", None),
+    "qr-code": ("GET", lambda u, o: "/api/v1/qr-code/", None),
+    "qr-code-image": ("GET", lambda u, o: "/api/v1/qr-code/image/", None),
+    "scan-qr-code": ("POST", lambda u, o: "/api/v1/scan-qr-code/", lambda u, o: {"qr_data": qr_payload(o)}),
+    "pay-customer": ("POST", lambda u, o: f"/api/v1/pay-customer/{o.id}", lambda u, o: {"amount": "0.01"}),
+    "login": ("POST", lambda u, o: "/api/v1/login/", lambda u, o: {"email": u.email, "password": SEED_PASSWORD}),
+}
+
+
+class InProcessClient:
+    """Drives the app through the DRF test client; one instance per thread."""
+
+    def __init__(self):
+        self.client = APIClient(raise_request_exception=False)
+
+    def request(self, method, path, body, user):
+        self.client.force_authenticate(user)
+        response = getattr(self.client, method.lower())(path, body, format="json")
+        if getattr(response, "streaming", False):
+            b"".join(response.streaming_content)
+        return response.status_code, response.get("Server-Timing", "")
+
+
+class HTTPClient:
+    """Drives a running server over HTTP with SimpleJWT access tokens."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.tokens = {}
+
+    def request(self, method, path, body, user):
+        token = self.tokens.get(user.pk)
+        if token is None:
+            token = self.tokens[user.pk] = str(AccessToken.for_user(user))
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(body).encode() if body is not None else None,
+            method=method,
+            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                return response.status, response.headers.get("Server-Timing", "")
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, e.headers.get("Server-Timing", "")
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every API endpoint with concurrent clients and report latency percentiles, "
+        "throughput and SQL query counts as JSON. Seeds a throwaway database by default; "
+        "with --url it targets a running server and users already seeded with seed_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--transactions", type=int, default=20000)
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint.")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--endpoints", nargs="+", choices=sorted(ENDPOINTS), default=list(ENDPOINTS))
+        parser.add_argument("--url", help="Base URL of a running server, e.g. http://127.0.0.1:8000.")
+        parser.add_argument(
+            "--sqlite-profile", choices=SQLITE_PROFILES, default="production",
+            help="SQLite connection profile for the in-process database.",
+        )
+        parser.add_argument(
+            "--throttle", action="store_true",
+            help="Keep the configured throttle rates for in-process runs (they are lifted by default).",
+        )
+        parser.add_argument("--prefix", default="seed", help="Email prefix of seeded users (with --url).")
+        parser.add_argument("--output", help="Also write the JSON report to this file.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["url"]:
+            users = list(CustomUser.objects.filter(email__startswith=options["prefix"])[:options["users"]])
+            if len(users) < 2:
+                raise CommandError("Seed users first: manage.py seed_data --prefix " + options["prefix"])
+            results = self.run(users, lambda: HTTPClient(options["url"]), options)
+        else:
+            original_options = connection.settings_dict["OPTIONS"]
+            if connection.vendor == "sqlite":
+                connection.settings_dict["OPTIONS"] = sqlite_options(options["sqlite_profile"])
+            try:
+                overrides = {"ALLOWED_HOSTS": ["*"], "MEDIA_ROOT": tempfile.mkdtemp()}
+                if not options["throttle"]:
+                    overrides["REST_FRAMEWORK"] = {**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}}
+                with benchmark_database(), override_settings(**overrides):
+                    rng = random.Random(options["seed"])
+                    accounts = seed_users(options["users"], rng=rng)
+                    seed_transactions(accounts, options["transactions"], rng=rng)
+                    rebuild_derived(accounts)
+                    # Payers must not run dry part way through the write endpoints.
+                    Account.objects.update(balance=10 ** 6)
+                    results = self.run([account.user for account in accounts], InProcessClient, options)
+            finally:
+                connection.settings_dict["OPTIONS"] = original_options
+
+        report = {"meta": self.meta(options), "endpoints": results}
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        self.stdout.write(output)
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "timestamp": timezone.now().isoformat(),
+            "target": options["url"] or "in-process",
+            "sqlite_profile": None if options["url"] else options["sqlite_profile"],
+            **{key: options[key] for key in ("users", "transactions", "requests", "concurrency", "seed")},
+        }
+
+    def run(self, users, make_client, options):
+        results = {}
+        for name in options["endpoints"]:
+            results[name] = self.run_endpoint(name, users, make_client, options)
+            self.stderr.write(f"{name}: {results[name]['throughput_per_s']} req/s")
+        return results
+
+    def run_endpoint(self, name, users, make_client, options):
+        method, path, body = ENDPOINTS[name]
+        lock = threading.Lock()
+        latencies, query_counts, statuses = [], [], Counter()
+        per_thread = [options["requests"] // options["concurrency"]] * options["concurrency"]
+        for index in range(options["requests"] % options["concurrency"]):
+            per_thread[index] += 1
+
+        def worker(index, count):
+            rng = random.Random(options["seed"] * 1000 + index)
+            client = make_client()
+            local_latencies, local_queries, local_statuses = [], [], Counter()
+            try:
+                for _ in range(count):
+                    user, other = rng.sample(users, 2)
+                    started = time.perf_counter()
+                    status_code, timing = client.request(
+                        method, path(user, other), body(user, other) if body else None, user
+                    )
+                    local_latencies.append(time.perf_counter() - started)
+                    local_statuses[status_code] += 1
+                    match = QUERIES.search(timing)
+                    if match:
+                        local_queries.append(int(match.group(1)))
+            finally:
+                connection.close()
+
+            with lock:
+                latencies.extend(local_latencies)
+                query_counts.extend(local_queries)
+                statuses.update(local_statuses)
+
+        threads = [threading.Thread(target=worker, args=(i, count)) for i, count in enumerate(per_thread)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return {
+            "method": method,
+            "requests": len(latencies),
+            "errors": sum(count for status_code, count in statuses.items() if status_code >= 400),
+            "status_codes": {str(status_code): count for status_code, count in sorted(statuses.items())},
+            "elapsed_s": round(elapsed, 3),
+            "throughput_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            "latency": summarize(latencies),
+            "queries": {
+                "mean": round(sum(query_counts) / len(query_counts), 2) if query_counts else None,
+                "max": max(query_counts) if query_counts else None,
+            },
+        }
@@ -0,0 +1,71 @@
+import json
+import random
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from common.benchmarks import benchmark_database, explicit_timestamps
+from eWallet.exports import EXPORTERS, export_queryset
+from eWallet.models import Account, CustomUser, Transaction
+
+
+class Command(BaseCommand):
+    help = "Export a large account history through the streaming exporters and report time and peak memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per insert while seeding.")
+
+    def handle(self, *args, **options):
+        report = {"rows": options["rows"]}
+
+        with benchmark_database():
+            account = self.seed(options["rows"], options["batch_size"])
+            for export_format, exporter in EXPORTERS.items():
+                report[export_format] = self.measure(exporter, export_queryset({}, account=account))
+
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def seed(self, count, batch_size):
+        user = CustomUser.objects.bulk_create([CustomUser(
+            email="export@example.com", username="export", full_name="Export", phone_number="08099999999"
+        )])[0]
+        account = Account.objects.bulk_create([Account(user=user, account_name="Export", account_number="8099999999")])[0]
+
+        rng = random.Random(count)
+        start = timezone.now() - timedelta(days=3 * 365)
+        step = timedelta(days=3 * 365) / max(count, 1)
+        with explicit_timestamps(Transaction, "created_at"):
+            for offset in range(0, count, batch_size):
+                Transaction.objects.bulk_create(
+                    Transaction(
+                        account=account,
+                        amount=Decimal(rng.randint(100, 100000)) / 100,
+                        transaction_type="deposit" if i % 2 else "debit",
+                        subtype="income" if i % 2 else "expenditure",
+                        description="miscellaneous",
+                        created_at=start + step * i,
+                    )
+                    for i in range(offset, min(offset + batch_size, count))
+                )
+        return account
+
+    def measure(self, exporter, rows):
+        tracemalloc.start()
+        started = time.perf_counter()
+        written = 0
+        for chunk in exporter(rows):
+            written += len(chunk)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(rows.count() / elapsed) if elapsed else None,
+            "bytes": written,
+            "peak_memory_mb": round(peak / 1024 / 1024, 2),
+        }
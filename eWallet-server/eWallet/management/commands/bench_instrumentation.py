@@ -0,0 +1,79 @@
+import json
+import statistics
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from common.benchmarks import benchmark_database, summarize
+from common.instrumentation import endpoint_metrics
+from eWallet.models import Account, CustomUser, Transaction
+
+MIDDLEWARE = "common.instrumentation.PerformanceMiddleware"
+
+
+class Command(BaseCommand):
+    help = "Measure the per-request overhead of PerformanceMiddleware on real endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint and round.")
+        parser.add_argument("--rounds", type=int, default=5, help="Alternating on/off rounds, to even out drift.")
+        parser.add_argument("--rows", type=int, default=200, help="Transactions seeded for the list endpoint.")
+
+    def handle(self, *args, **options):
+        endpoints = ["/api/v1/account/", "/api/v1/transactions/?page_size=50"]
+        without = [name for name in settings.MIDDLEWARE if name != MIDDLEWARE]
+        with_middleware = [MIDDLEWARE, *without]
+
+        with benchmark_database(), override_settings(ALLOWED_HOSTS=["*"]):
+            client = APIClient()
+            client.force_authenticate(self.seed(options["rows"]))
+
+            samples = {endpoint: {"off": [], "on": []} for endpoint in endpoints}
+            for _ in range(options["rounds"]):
+                for label, middleware in (("off", without), ("on", with_middleware)):
+                    with override_settings(MIDDLEWARE=middleware):
+                        for endpoint in endpoints:
+                            samples[endpoint][label].extend(self.measure(client, endpoint, options["requests"]))
+            endpoint_metrics.clear()
+
+        report = {}
+        for endpoint, runs in samples.items():
+            off, on = statistics.fmean(runs["off"]), statistics.fmean(runs["on"])
+            report[endpoint] = {
+                "without": summarize(runs["off"]),
+                "with": summarize(runs["on"]),
+                "overhead_pct": round((on - off) / off * 100, 2) if off else 0.0,
+            }
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def seed(self, rows):
+        user = CustomUser.objects.create_user(
+            email="metrics@example.com", password="x", full_name="Metrics User", phone_number="08099999999"
+        )
+        account = Account.objects.get(user=user)
+        Transaction.objects.bulk_create(
+            Transaction(
+                account=account,
+                amount=Decimal("1.00"),
+                transaction_type="deposit",
+                subtype="income",
+                description="seed",
+                amount_before=Decimal(i),
+                amount_after=Decimal(i + 1),
+            )
+            for i in range(rows)
+        )
+        return user
+
+    def measure(self, client, endpoint, count):
+        latencies = []
+        for _ in range(count):
+            started = time.perf_counter()
+            response = client.get(endpoint)
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.status_code
+        return latencies
@@ -0,0 +1,66 @@
+import json
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from common.benchmarks import benchmark_database
+from eWallet.models import Account, CustomUser
+from eWallet.services import pay_customers, transfer_funds
+
+
+class Command(BaseCommand):
+    help = "Compare one bulk payout against the same payments made one transfer at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipients", type=int, default=500)
+        parser.add_argument("--amount", type=Decimal, default=Decimal("1.00"))
+
+    def handle(self, *args, **options):
+        count, amount = options["recipients"], options["amount"]
+
+        with benchmark_database():
+            sender_id, recipient_ids = self.seed(count, amount * count * 2)
+            payments = [(recipient_id, amount) for recipient_id in recipient_ids]
+
+            single = self.measure(lambda: [transfer_funds(sender_id, r, a) for r, a in payments])
+            bulk = self.measure(lambda: pay_customers(sender_id, payments))
+
+        report = {
+            "recipients": count,
+            "single_calls": single,
+            "bulk_payout": bulk,
+            "speedup": round(single["elapsed_s"] / bulk["elapsed_s"], 1) if bulk["elapsed_s"] else None,
+        }
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def seed(self, count, sender_balance):
+        users = [
+            CustomUser(
+                email=f"payee{i}@example.com",
+                username=f"payee{i}",
+                full_name=f"Payee {i}",
+                phone_number=f"081{i:08d}",
+            )
+            for i in range(count + 1)
+        ]
+        CustomUser.objects.bulk_create(users)
+        Account.objects.bulk_create(
+            Account(
+                user=user,
+                account_name=user.full_name,
+                account_number=user.phone_number[-10:],
+                balance=sender_balance if i == 0 else 0,
+            )
+            for i, user in enumerate(users)
+        )
+        return users[0].id, [user.id for user in users[1:]]
+
+    def measure(self, run):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+        return {"elapsed_s": round(elapsed, 4), "queries": len(queries)}
@@ -0,0 +1,97 @@
+import json
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from common.benchmarks import benchmark_database, explicit_timestamps
+from common.encoders import row_encoder
+from eWallet.models import Account, Card, CustomUser, Transaction
+from eWallet.serializers import CardSerializer, CustomUserSerializer, TransactionSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare DRF serializers with the .values() row encoders on list payloads, checking the JSON is identical."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        report = {"rows": options["rows"]}
+
+        with benchmark_database():
+            self.seed(options["rows"])
+            cases = {
+                "transactions": (TransactionSerializer, Transaction.objects.order_by("-created_at", "-id")),
+                "cards": (CardSerializer, Card.objects.order_by("id")),
+                "users": (CustomUserSerializer, CustomUser.objects.order_by("id")),
+            }
+            for name, (serializer_class, queryset) in cases.items():
+                report[name] = self.compare(serializer_class, queryset, options["repeat"])
+
+        self.stdout.write(json.dumps(report, indent=2))
+        if not all(case["identical"] for name, case in report.items() if name != "rows"):
+            self.stderr.write(self.style.ERROR("Fast path output differs from the serializers."))
+
+    def seed(self, count):
+        users = CustomUser.objects.bulk_create(
+            CustomUser(email=f"list{i}@example.com", username=f"list{i}", full_name=f"List {i}", phone_number=f"082{i:08d}")
+            for i in range(count)
+        )
+        accounts = Account.objects.bulk_create(
+            Account(user=user, account_name=user.full_name, account_number=user.phone_number[-10:], balance=Decimal("10.5"))
+            for user in users
+        )
+        Card.objects.bulk_create(
+            Card(account=account, card_number=f"4{i:015d}", card_holder_name="List", cvv="123",
+                 expiry_date=timezone.now().date(), card_balance=None if i % 3 else Decimal("1.10"))
+            for i, account in enumerate(accounts)
+        )
+
+        rng = random.Random(count)
+        start = timezone.now() - timedelta(days=90)
+        with explicit_timestamps(Transaction, "created_at"):
+            Transaction.objects.bulk_create(
+                Transaction(
+                    account=accounts[0],
+                    amount=Decimal(rng.randint(1, 10**6)) / 100,
+                    transaction_type=rng.choice(["deposit", "debit"]),
+                    subtype=rng.choice(["income", "expenditure", None]),
+                    description=rng.choice(["rent_payment", "Payment to customer", None, ""]),
+                    created_at=start + timedelta(seconds=rng.randint(0, 90 * 86400)),
+                )
+                for _ in range(count)
+            )
+
+    def compare(self, serializer_class, queryset, repeat):
+        renderer = JSONRenderer()
+        encoder = row_encoder(serializer_class)
+
+        def serializer_path():
+            return renderer.render(serializer_class(queryset.all(), many=True).data)
+
+        def fast_path():
+            return renderer.render(encoder.encode_many(queryset.values(*encoder.columns)))
+
+        slow_s, slow_body = self.best_of(serializer_path, repeat)
+        fast_s, fast_body = self.best_of(fast_path, repeat)
+        return {
+            "serializer_ms": round(slow_s * 1000, 2),
+            "fast_path_ms": round(fast_s * 1000, 2),
+            "speedup": round(slow_s / fast_s, 1) if fast_s else None,
+            "identical": slow_body == fast_body,
+        }
+
+    def best_of(self, run, repeat):
+        best, body = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
@@ -0,0 +1,156 @@
+import json
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Sum
+
+from common.benchmarks import benchmark_database, summarize
+from common.sqlite import SQLITE_PROFILES, sqlite_options
+from eWallet.models import Account, CustomUser, Transaction
+from eWallet.services import InsufficientFunds, transfer_funds
+
+
+class Command(BaseCommand):
+    help = (
+        "Run mixed read/transfer load from many threads under each SQLite profile and "
+        "report throughput and lock-error rates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profiles", nargs="+", choices=SQLITE_PROFILES, default=list(SQLITE_PROFILES))
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--operations", type=int, default=200, help="Operations per thread.")
+        parser.add_argument("--read-ratio", type=float, default=0.8, help="Share of operations that only read.")
+        parser.add_argument("--accounts", type=int, default=20)
+        parser.add_argument("--balance", type=Decimal, default=Decimal("1000.00"))
+        parser.add_argument("--busy-timeout", type=float, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("bench_sqlite only applies to the SQLite backend.")
+
+        original_options = connection.settings_dict["OPTIONS"]
+        reports = {}
+        try:
+            for profile in options["profiles"]:
+                # Every thread builds its connection from this shared settings dict.
+                connection.close()
+                connection.settings_dict["OPTIONS"] = sqlite_options(profile, busy_timeout=options["busy_timeout"])
+                with benchmark_database():
+                    user_ids = self.seed(options["accounts"], options["balance"])
+                    report = self.run(user_ids, options)
+                    report.update(self.check_ledger(options["accounts"] * options["balance"], report))
+                    with connection.cursor() as cursor:
+                        cursor.execute("PRAGMA journal_mode")
+                        report["journal_mode"] = cursor.fetchone()[0]
+                reports[profile] = report
+        finally:
+            connection.close()
+            connection.settings_dict["OPTIONS"] = original_options
+
+        self.stdout.write(json.dumps(reports, indent=2))
+        if not all(report["consistent"] for report in reports.values()):
+            self.stderr.write(self.style.ERROR("Ledger is inconsistent after the run."))
+
+    def seed(self, count, balance):
+        users = [
+            CustomUser(
+                email=f"bench{i}@example.com",
+                username=f"bench{i}",
+                full_name=f"Bench User {i}",
+                phone_number=f"080{i:08d}",
+            )
+            for i in range(count)
+        ]
+        CustomUser.objects.bulk_create(users)
+        Account.objects.bulk_create(
+            Account(user=user, account_name=user.full_name, account_number=user.phone_number[-10:], balance=balance)
+            for user in users
+        )
+        return [user.id for user in users]
+
+    def read(self, user_id):
+        """What the dashboard does: the balance plus the latest page of history."""
+        account = Account.objects.filter(user_id=user_id).values("id", "balance").first()
+        list(
+            Transaction.objects.filter(account_id=account["id"])
+            .order_by("-created_at", "-id")
+            .values("id", "amount", "transaction_type", "created_at")[:20]
+        )
+
+    def run(self, user_ids, options):
+        lock = threading.Lock()
+        read_latencies, write_latencies = [], []
+        counters = dict.fromkeys(
+            ["reads", "transfers", "insufficient_funds", "read_lock_errors", "write_lock_errors"], 0
+        )
+
+        def worker(index):
+            rng = random.Random(options["seed"] + index)
+            reads, writes, local = [], [], dict.fromkeys(counters, 0)
+            try:
+                for _ in range(options["operations"]):
+                    started = time.perf_counter()
+                    if rng.random() < options["read_ratio"]:
+                        try:
+                            self.read(rng.choice(user_ids))
+                            local["reads"] += 1
+                        except OperationalError:
+                            local["read_lock_errors"] += 1
+                        reads.append(time.perf_counter() - started)
+                        continue
+
+                    sender, receiver = rng.sample(user_ids, 2)
+                    try:
+                        transfer_funds(sender, receiver, Decimal(rng.randint(1, 5000)) / 100)
+                        local["transfers"] += 1
+                    except InsufficientFunds:
+                        local["insufficient_funds"] += 1
+                    except OperationalError:
+                        local["write_lock_errors"] += 1
+                    writes.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+            with lock:
+                read_latencies.extend(reads)
+                write_latencies.extend(writes)
+                for key, value in local.items():
+                    counters[key] += value
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options["threads"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        attempted = options["threads"] * options["operations"]
+        lock_errors = counters["read_lock_errors"] + counters["write_lock_errors"]
+        return {
+            "threads": options["threads"],
+            "attempted": attempted,
+            **counters,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_per_s": round((counters["reads"] + counters["transfers"]) / elapsed, 1) if elapsed else 0.0,
+            "lock_error_rate": round(lock_errors / attempted, 4) if attempted else 0.0,
+            "read_latency": summarize(read_latencies),
+            "transfer_latency": summarize(write_latencies),
+        }
+
+    def check_ledger(self, expected_total, report):
+        total = Account.objects.aggregate(total=Sum("balance"))["total"]
+        negative = Account.objects.filter(balance__lt=0).count()
+        ledger_rows = Transaction.objects.count()
+        return {
+            "total_balance": str(total),
+            "negative_balances": negative,
+            "ledger_rows": ledger_rows,
+            "consistent": total == expected_total and negative == 0 and ledger_rows == 2 * report["transfers"],
+        }
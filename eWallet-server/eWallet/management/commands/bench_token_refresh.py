@@ -0,0 +1,167 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, connection, transaction
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from common.authentication import RevokingTokenRefreshSerializer, resolved_users
+from common.benchmarks import benchmark_database, summarize
+from common.models import RevokedToken
+from common.revocation import revocation_store
+from common.sqlite import SQLITE_PROFILES, sqlite_options
+from eWallet.seeding import seed_users
+
+
+class DatabaseRevokedRefreshToken(RefreshToken):
+    """Baseline: the same revocation rules, checked with a query on every refresh."""
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if RevokedToken.objects.filter(jti=self.payload[api_settings.JTI_CLAIM]).exists():
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        expires_at = datetime.fromtimestamp(self.payload["exp"], tz=dt_timezone.utc)
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(jti=self.payload[api_settings.JTI_CLAIM], expires_at=expires_at)
+        except IntegrityError:
+            raise TokenError("Token is blacklisted")
+
+
+class DatabaseRevokingSerializer(TokenRefreshSerializer):
+    token_class = DatabaseRevokedRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        get_user_model().objects.get(**{api_settings.USER_ID_FIELD: refresh.payload[api_settings.USER_ID_CLAIM]})
+        data = {"access": str(refresh.access_token)}
+        refresh.blacklist()
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        data["refresh"] = str(refresh)
+        return data
+
+
+MODES = {
+    # SimpleJWT as configured before: rotation without any revocation.
+    "none": TokenRefreshSerializer,
+    "database": DatabaseRevokingSerializer,
+    "filter": RevokingTokenRefreshSerializer,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure refresh-token rotation throughput against a throwaway database: without "
+        "revocation, with a database check per refresh, and with the in-memory revocation "
+        "filter. A share of requests replays an already rotated token, which must be rejected."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--refreshes", type=int, default=2000, help="Refreshes per mode.")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--replay-ratio", type=float, default=0.1)
+        parser.add_argument("--revoked", type=int, default=20000, help="Pre-existing revocations in the table.")
+        parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=list(MODES))
+        parser.add_argument("--sqlite-profile", choices=SQLITE_PROFILES, default="production")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        original_options = connection.settings_dict["OPTIONS"]
+        if connection.vendor == "sqlite":
+            connection.settings_dict["OPTIONS"] = sqlite_options(options["sqlite_profile"])
+        try:
+            with benchmark_database():
+                users = [account.user for account in seed_users(options["users"], rng=random.Random(options["seed"]))]
+                self.seed_revocations(options["revoked"])
+                report = {mode: self.run_mode(mode, users, options) for mode in options["modes"]}
+        finally:
+            connection.settings_dict["OPTIONS"] = original_options
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def seed_revocations(self, count):
+        expires_at = datetime.fromtimestamp(time.time() + 86400, tz=dt_timezone.utc)
+        RevokedToken.objects.bulk_create(
+            (RevokedToken(jti=f"seed-{index:08d}", expires_at=expires_at) for index in range(count)),
+            batch_size=2000,
+        )
+
+    def run_mode(self, mode, users, options):
+        serializer_class = MODES[mode]
+        revocation_store.clear()
+        resolved_users.clear()
+        chains = {user.pk: [str(RefreshToken.for_user(user))] for user in users}
+
+        lock = threading.Lock()
+        latencies, outcomes = [], {"rotated": 0, "replay_rejected": 0, "replay_accepted": 0, "errors": 0}
+        query_counts = []
+        per_thread = [options["refreshes"] // options["concurrency"]] * options["concurrency"]
+        for index in range(options["refreshes"] % options["concurrency"]):
+            per_thread[index] += 1
+        groups = [users[index::options["concurrency"]] for index in range(options["concurrency"])]
+
+        def worker(index, count):
+            rng = random.Random(options["seed"] * 1000 + index)
+            local_latencies, local_outcomes, queries = [], dict.fromkeys(outcomes, 0), [0]
+
+            def count_query(execute, sql, params, many, context):
+                queries[0] += 1
+                return execute(sql, params, many, context)
+
+            try:
+                with connection.execute_wrapper(count_query):
+                    for _ in range(count):
+                        chain = chains[rng.choice(groups[index]).pk]
+                        replay = len(chain) > 1 and rng.random() < options["replay_ratio"]
+                        token = rng.choice(chain[:-1]) if replay else chain[-1]
+
+                        started = time.perf_counter()
+                        serializer = serializer_class(data={"refresh": token})
+                        try:
+                            valid = serializer.is_valid()
+                        except TokenError:
+                            valid = False
+                        local_latencies.append(time.perf_counter() - started)
+
+                        if replay:
+                            local_outcomes["replay_accepted" if valid else "replay_rejected"] += 1
+                        elif valid:
+                            local_outcomes["rotated"] += 1
+                            chain.append(serializer.validated_data["refresh"])
+                        else:
+                            local_outcomes["errors"] += 1
+            finally:
+                connection.close()
+
+            with lock:
+                latencies.extend(local_latencies)
+                query_counts.append(queries[0])
+                for key, value in local_outcomes.items():
+                    outcomes[key] += value
+
+        threads = [threading.Thread(target=worker, args=(i, count)) for i, count in enumerate(per_thread)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return {
+            "refreshes": len(latencies),
+            "throughput_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            "queries_per_refresh": round(sum(query_counts) / len(latencies), 2) if latencies else 0.0,
+            **outcomes,
+            "latency": summarize(latencies),
+        }
@@ -0,0 +1,132 @@
+import json
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Sum
+
+from common.benchmarks import benchmark_database, summarize
+from common.sqlite import SQLITE_PROFILES, sqlite_options
+from eWallet.models import Account, CustomUser, Transaction
+from eWallet.services import InsufficientFunds, transfer_funds
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent transfers against a throwaway database and check the ledger stays consistent. "
+        "Fails when the ledger is inconsistent or any transfer failed with a database error."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--transfers", type=int, default=200, help="Transfers per thread.")
+        parser.add_argument("--accounts", type=int, default=10)
+        parser.add_argument("--balance", type=Decimal, default=Decimal("1000.00"))
+        parser.add_argument("--seed", type=int, default=0)
+        # The "default" profile keeps SQLite's deferred transactions: a transfer's read
+        # lock cannot be upgraded while another writer holds the database, so concurrent
+        # transfers fail with "database is locked" instead of waiting their turn.
+        parser.add_argument("--sqlite-profile", choices=SQLITE_PROFILES, default="production")
+
+    def handle(self, *args, **options):
+        original_options = connection.settings_dict["OPTIONS"]
+        if connection.vendor == "sqlite":
+            connection.settings_dict["OPTIONS"] = sqlite_options(options["sqlite_profile"])
+        try:
+            with benchmark_database():
+                user_ids = self.seed(options["accounts"], options["balance"])
+                report = self.run(user_ids, options)
+                report.update(self.check_ledger(options["accounts"] * options["balance"], report))
+        finally:
+            connection.settings_dict["OPTIONS"] = original_options
+        report["sqlite_profile"] = options["sqlite_profile"] if connection.vendor == "sqlite" else None
+
+        self.stdout.write(json.dumps(report, indent=2))
+        problems = []
+        if not report["consistent"]:
+            problems.append("the ledger is inconsistent after the run")
+        if report["lock_errors"]:
+            problems.append(
+                f"{report['lock_errors']} of {report['attempted']} transfers failed with a database error "
+                f"(lock_error_rate {report['lock_error_rate']})"
+            )
+        if problems:
+            raise CommandError("; ".join(problems).capitalize() + ".")
+
+    def seed(self, count, balance):
+        users = [
+            CustomUser(
+                email=f"bench{i}@example.com",
+                username=f"bench{i}",
+                full_name=f"Bench User {i}",
+                phone_number=f"080{i:08d}",
+            )
+            for i in range(count)
+        ]
+        CustomUser.objects.bulk_create(users)
+        Account.objects.bulk_create(
+            Account(user=user, account_name=user.full_name, account_number=user.phone_number[-10:], balance=balance)
+            for user in users
+        )
+        return [user.id for user in users]
+
+    def run(self, user_ids, options):
+        lock = threading.Lock()
+        latencies, counters = [], {"succeeded": 0, "insufficient_funds": 0, "lock_errors": 0}
+
+        def worker(index):
+            rng = random.Random(options["seed"] + index)
+            local_latencies, local = [], dict.fromkeys(counters, 0)
+            try:
+                for _ in range(options["transfers"]):
+                    sender, receiver = rng.sample(user_ids, 2)
+                    amount = Decimal(rng.randint(1, 5000)) / 100
+                    started = time.perf_counter()
+                    try:
+                        transfer_funds(sender, receiver, amount)
+                        local["succeeded"] += 1
+                    except InsufficientFunds:
+                        local["insufficient_funds"] += 1
+                    except OperationalError:
+                        local["lock_errors"] += 1
+                    local_latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+            with lock:
+                latencies.extend(local_latencies)
+                for key, value in local.items():
+                    counters[key] += value
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options["threads"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        attempted = options["threads"] * options["transfers"]
+        return {
+            "threads": options["threads"],
+            "attempted": attempted,
+            **counters,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_per_s": round(counters["succeeded"] / elapsed, 1) if elapsed else 0.0,
+            "lock_error_rate": round(counters["lock_errors"] / attempted, 4) if attempted else 0.0,
+            "latency": summarize(latencies),
+        }
+
+    def check_ledger(self, expected_total, report):
+        total = Account.objects.aggregate(total=Sum("balance"))["total"]
+        negative = Account.objects.filter(balance__lt=0).count()
+        ledger_rows = Transaction.objects.count()
+        return {
+            "total_balance": str(total),
+            "negative_balances": negative,
+            "ledger_rows": ledger_rows,
+            "consistent": total == expected_total and negative == 0 and ledger_rows == 2 * report["succeeded"],
+        }
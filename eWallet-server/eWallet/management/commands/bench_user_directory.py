@@ -0,0 +1,106 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models.functions import Lower
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from common.benchmarks import benchmark_database, summarize
+from common.encoders import row_encoder
+from common.sqlite import SQLITE_PROFILES, sqlite_options
+from eWallet.directory import SORT_KEY, DirectoryPagination
+from eWallet.models import CustomUser
+from eWallet.serializers import CustomUserSerializer
+from eWallet.seeding import seed_users
+
+PATH = "/api/v1/users/"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure GET /users/ latency as the user table grows, against a throwaway database: "
+        "the first page, a page from the middle of the directory, and name, email and phone "
+        "prefix searches. With --legacy, also time the previous unpaginated listing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+        parser.add_argument("--samples", type=int, default=50, help="Requests per scenario and size.")
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--legacy", action="store_true", help="Also time the unpaginated listing.")
+        parser.add_argument("--sqlite-profile", choices=SQLITE_PROFILES, default="production")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        original_options = connection.settings_dict["OPTIONS"]
+        if connection.vendor == "sqlite":
+            connection.settings_dict["OPTIONS"] = sqlite_options(options["sqlite_profile"])
+        report = {}
+        try:
+            with benchmark_database(), override_settings(ALLOWED_HOSTS=["*"]):
+                rng = random.Random(options["seed"])
+                for size in sorted(options["sizes"]):
+                    missing = size - CustomUser.objects.count()
+                    if missing > 0:
+                        seed_users(missing, rng=rng)
+                    report[size] = self.measure(size, options)
+                    self.stderr.write(f"{size} users measured")
+        finally:
+            connection.settings_dict["OPTIONS"] = original_options
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def middle_cursor(self, size):
+        """The cursor for the page that starts halfway through the name ordering."""
+        row = (
+            CustomUser.objects.values("id", **{SORT_KEY: Lower("full_name")})
+            .order_by(SORT_KEY, "id")[size // 2]
+        )
+        return DirectoryPagination().encode_cursor(row)
+
+    def measure(self, size, options):
+        page_size = options["page_size"]
+        sample = CustomUser.objects.order_by("?").values("full_name", "email", "phone_number").first()
+        scenarios = {
+            "first-page": {},
+            "middle-page": {"cursor": self.middle_cursor(size)},
+            "search-name": {"search": sample["full_name"][:-1]},
+            "search-email": {"search": sample["email"].split("@")[0][:-1], "search_by": "email"},
+            "search-phone": {"search": sample["phone_number"][:-2]},
+        }
+
+        # The unfiltered listing is staff-only; authenticating in memory adds no queries.
+        staff = CustomUser.objects.order_by("pk").first()
+        staff.is_staff = True
+        client = APIClient()
+        client.force_authenticate(staff)
+        results = {}
+        for name, params in scenarios.items():
+            params = {**params, "page_size": page_size}
+            latencies = []
+            for _ in range(options["samples"]):
+                started = time.perf_counter()
+                response = client.get(PATH, params)
+                latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f"{name}: GET {PATH} returned {response.status_code}")
+            body = response.json()
+            results[name] = {
+                "rows": len(body["results"]),
+                "count": body["count"],
+                "count_exact": body["count_exact"],
+                "latency": summarize(latencies),
+            }
+
+        if options["legacy"]:
+            encoder = row_encoder(CustomUserSerializer)
+            latencies = []
+            for _ in range(max(1, options["samples"] // 10)):
+                started = time.perf_counter()
+                rows = encoder.encode_many(CustomUser.objects.values(*encoder.columns))
+                json.dumps(rows)
+                latencies.append(time.perf_counter() - started)
+            results["legacy-unpaginated"] = {"rows": len(rows), "latency": summarize(latencies)}
+        return results
@@ -0,0 +1,181 @@
+import asyncio
+import gc
+import json
+import random
+import time
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from common.benchmarks import benchmark_database, resident_memory, summarize
+from eWallet.models import Account, CustomUser
+from eWallet.services import InsufficientFunds, transfer_funds
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many wallet WebSocket connections against a throwaway database, run transfers "
+        "and measure how long pushes take to reach every connected client. First ramps up "
+        "idle connections and reports the resident memory each one costs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=200, help="WebSocket connections to open.")
+        parser.add_argument("--accounts", type=int, default=50)
+        parser.add_argument("--transfers", type=int, default=500)
+        parser.add_argument("--balance", type=Decimal, default=Decimal("100000.00"))
+        parser.add_argument("--timeout", type=float, default=10.0, help="Seconds to wait for outstanding pushes.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--idle-ramp", type=int, nargs="*", default=[100, 500, 1000],
+            help="Idle connection counts to measure RSS at; pass no values to skip the ramp.",
+        )
+
+    def handle(self, *args, **options):
+        from core.asgi import application
+
+        with benchmark_database():
+            users = self.seed(options["accounts"], options["balance"])
+            idle = async_to_sync(self.idle_ramp)(application, users, sorted(options["idle_ramp"]))
+            report = async_to_sync(self.run)(application, users, options)
+            report["idle_ramp"] = idle
+
+        self.stdout.write(json.dumps(report, indent=2))
+        if report["missing"]:
+            self.stderr.write(self.style.ERROR(f"{report['missing']} pushes were not delivered."))
+
+    def seed(self, count, balance):
+        users = [
+            CustomUser(
+                email=f"bench{i}@example.com",
+                username=f"bench{i}",
+                full_name=f"Bench User {i}",
+                phone_number=f"080{i:08d}",
+            )
+            for i in range(count)
+        ]
+        CustomUser.objects.bulk_create(users)
+        Account.objects.bulk_create(
+            Account(user=user, account_name=user.full_name, account_number=user.phone_number[-10:], balance=balance)
+            for user in users
+        )
+        return users
+
+    async def connect(self, application, user):
+        token = str(AccessToken.for_user(user))
+        communicator = ApplicationCommunicator(application, {
+            "type": "websocket",
+            "path": "/ws/wallet/",
+            "query_string": f"token={token}".encode(),
+            "headers": [(b"origin", b"http://localhost")],
+            "subprotocols": [],
+        })
+        await communicator.send_input({"type": "websocket.connect"})
+        message = await communicator.receive_output(timeout=5)
+        if message["type"] != "websocket.accept":
+            raise RuntimeError(f"Connection for {user.email} was rejected: {message}")
+        return communicator
+
+    async def disconnect(self, communicators):
+        for communicator in communicators:
+            await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+            await communicator.wait(timeout=5)
+
+    async def idle_ramp(self, application, users, steps):
+        """
+        Open idle connections up to each count in steps and report the process RSS
+        at each, and its growth per connection over the RSS before the first one.
+        """
+        if not steps:
+            return []
+        gc.collect()
+        baseline = resident_memory()
+        if baseline is None:
+            self.stderr.write("Resident memory is not available on this platform; skipping the idle ramp.")
+            return []
+
+        communicators, report = [], []
+        for step in steps:
+            while len(communicators) < step:
+                communicators.append(await self.connect(application, users[len(communicators) % len(users)]))
+            gc.collect()
+            rss = resident_memory()
+            report.append({
+                "connections": step,
+                "rss_mb": round(rss / 2 ** 20, 1),
+                "bytes_per_connection": round((rss - baseline) / step) if step else 0,
+            })
+            self.stderr.write(f"{step} idle connections: {report[-1]['rss_mb']} MB RSS")
+
+        await self.disconnect(communicators)
+        return report
+
+    async def run(self, application, users, options):
+        rng = random.Random(options["seed"])
+        connected_users = [users[i % len(users)] for i in range(options["clients"])]
+
+        started = time.perf_counter()
+        communicators = [await self.connect(application, user) for user in connected_users]
+        connect_elapsed = time.perf_counter() - started
+
+        sent_at, latencies, received = {}, [], {"transaction": 0, "balance": 0}
+
+        async def read(communicator):
+            while True:
+                message = await communicator.output_queue.get()
+                if message["type"] != "websocket.send":
+                    continue
+                payload = json.loads(message["text"])
+                received[payload["type"]] = received.get(payload["type"], 0) + 1
+                if payload["type"] == "transaction":
+                    latencies.append(time.perf_counter() - sent_at[payload["transaction"]["id"]])
+
+        readers = [asyncio.create_task(read(communicator)) for communicator in communicators]
+        connections_per_user = {}
+        for user in connected_users:
+            connections_per_user[user.id] = connections_per_user.get(user.id, 0) + 1
+
+        expected, insufficient = 0, 0
+        transfer = sync_to_async(transfer_funds)
+        started = time.perf_counter()
+        for _ in range(options["transfers"]):
+            sender, receiver = rng.sample(users, 2)
+            amount = Decimal(rng.randint(1, 5000)) / 100
+            pushed_at = time.perf_counter()
+            try:
+                debit, credit = await transfer(sender.id, receiver.id, amount)
+            except InsufficientFunds:
+                insufficient += 1
+                continue
+            # Pushes are queued on commit, before transfer_funds returns; the
+            # readers only run once this coroutine yields, so the ids are known in time.
+            sent_at[str(debit.id)] = sent_at[str(credit.id)] = pushed_at
+            expected += connections_per_user.get(sender.id, 0) + connections_per_user.get(receiver.id, 0)
+
+        deadline = time.monotonic() + options["timeout"]
+        while received["transaction"] < expected and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - started
+
+        for reader in readers:
+            reader.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+        await self.disconnect(communicators)
+
+        return {
+            "clients": options["clients"],
+            "accounts": len(users),
+            "connect_s": round(connect_elapsed, 3),
+            "transfers": options["transfers"] - insufficient,
+            "insufficient_funds": insufficient,
+            "expected_pushes": expected,
+            "delivered_pushes": received["transaction"],
+            "balance_pushes": received["balance"],
+            "missing": expected - received["transaction"],
+            "elapsed_s": round(elapsed, 3),
+            "pushes_per_s": round(received["transaction"] / elapsed, 1) if elapsed else 0.0,
+            "delivery_latency": summarize(latencies),
+        }
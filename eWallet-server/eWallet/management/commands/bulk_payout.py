@@ -0,0 +1,52 @@
+import csv
+import json
+import sys
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from eWallet.models import CustomUser
+from eWallet.services import PayoutRejected, TransferError, pay_customers
+
+
+class Command(BaseCommand):
+    help = "Pay many customers from one account. Reads customer_id,amount rows from a CSV file (or - for stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("sender", help="Email of the paying user.")
+        parser.add_argument("csv_file", help="CSV with customer_id and amount columns, or - for stdin.")
+        parser.add_argument("--description", default="Payment to customer")
+
+    def handle(self, *args, **options):
+        try:
+            sender = CustomUser.objects.only("id").get(email=options["sender"])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No user with email {options['sender']}")
+
+        payments = self.read_payments(options["csv_file"])
+
+        try:
+            results = pay_customers(sender.id, payments, debit_description=options["description"])
+        except PayoutRejected as e:
+            self.stdout.write(json.dumps(e.results, cls=DjangoJSONEncoder, indent=2))
+            raise CommandError(str(e))
+        except TransferError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(json.dumps(results, cls=DjangoJSONEncoder, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Paid {len(results)} customers."))
+
+    def read_payments(self, path):
+        handle = sys.stdin if path == "-" else open(path, newline="")
+        try:
+            payments = []
+            for line, row in enumerate(csv.DictReader(handle), start=2):
+                try:
+                    payments.append((uuid.UUID(row["customer_id"].strip()), row["amount"].strip()))
+                except (KeyError, AttributeError, ValueError):
+                    raise CommandError(f"Line {line}: expected a customer_id UUID and an amount")
+            return payments
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
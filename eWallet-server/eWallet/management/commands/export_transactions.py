@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from eWallet.exports import EXPORTERS, export_queryset
+
+
+class Command(BaseCommand):
+    help = "Stream transactions to a file or stdout as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group()
+        scope.add_argument("--user", help="Only export transactions of the user with this email.")
+        scope.add_argument("--account", help="Only export transactions of this account id.")
+        parser.add_argument("--format", choices=sorted(EXPORTERS), default="csv", dest="export_format")
+        parser.add_argument("--output", "-o", help="File to write to. Defaults to stdout.")
+        parser.add_argument("--start-date", help="First day to include, YYYY-MM-DD.")
+        parser.add_argument("--end-date", help="Last day to include, YYYY-MM-DD.")
+        parser.add_argument("--type", help="Only export this transaction_type.")
+        parser.add_argument("--subtype", help="Only export this subtype.")
+
+    def handle(self, *args, **options):
+        filters = {}
+        if options["user"]:
+            filters["account__user__email"] = options["user"]
+        if options["account"]:
+            filters["account_id"] = options["account"]
+
+        params = {
+            "start_date": options["start_date"],
+            "end_date": options["end_date"],
+            "type": options["type"],
+            "subtype": options["subtype"],
+        }
+
+        try:
+            rows = export_queryset(params, **filters)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        output = open(options["output"], "w", newline="") if options["output"] else sys.stdout
+        try:
+            for chunk in EXPORTERS[options["export_format"]](rows):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
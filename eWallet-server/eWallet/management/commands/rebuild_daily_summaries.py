@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from eWallet.cache import bump_account_versions
+from eWallet.models import Account, DailyTransactionSummary
+
+
+class Command(BaseCommand):
+    help = "Recompute DailyTransactionSummary rows from the transaction ledger, a chunk of accounts at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=200, help="Accounts rebuilt per database transaction.")
+        parser.add_argument("--account", action="append", dest="accounts", help="Only rebuild this account id (repeatable).")
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.order_by("id").values_list("id", flat=True)
+        if options["accounts"]:
+            accounts = accounts.filter(id__in=options["accounts"])
+
+        chunk_size = options["chunk_size"]
+        last_id, rebuilt_accounts, rebuilt_rows = None, 0, 0
+        while True:
+            chunk = accounts.filter(id__gt=last_id) if last_id else accounts
+            account_ids = list(chunk[:chunk_size])
+            if not account_ids:
+                break
+
+            rebuilt_rows += DailyTransactionSummary.objects.rebuild(account_ids)
+            bump_account_versions(account_ids)
+            rebuilt_accounts += len(account_ids)
+            last_id = account_ids[-1]
+            self.stdout.write(f"Rebuilt {rebuilt_accounts} accounts ({rebuilt_rows} daily rows)")
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {rebuilt_accounts} accounts, {rebuilt_rows} daily rows."))
@@ -0,0 +1,45 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from eWallet.seeding import SEED_PASSWORD, rebuild_derived, seed_transactions, seed_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic users (with account, card and QR code) and a transaction history spread "
+        "over time into the configured database, using bulk inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--transactions", type=int, default=100000, help="Total transactions across all users.")
+        parser.add_argument("--days", type=int, default=365, help="Days the history is spread over.")
+        parser.add_argument("--balance", type=Decimal, default=Decimal("500.00"), help="Opening balance per account.")
+        parser.add_argument("--prefix", default="seed", help="Email prefix, so repeated runs add new users.")
+        parser.add_argument("--no-qr-codes", action="store_true", help="Leave QR codes to be rendered on first access.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        started = time.perf_counter()
+
+        accounts = seed_users(options["users"], prefix=options["prefix"], balance=options["balance"], rng=rng)
+        self.stdout.write(f"Created {len(accounts)} users with accounts and cards")
+
+        written = seed_transactions(accounts, options["transactions"], days=options["days"], rng=rng)
+        self.stdout.write(f"Created {written} transactions over {options['days']} days")
+
+        rebuild_derived(accounts)
+        self.stdout.write("Rebuilt daily summaries and income/expenditure totals")
+
+        if not options["no_qr_codes"]:
+            call_command("backfill_qr_codes", stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded in {time.perf_counter() - started:.1f}s. "
+            f"Users log in as {options['prefix']}<n>@example.com / {SEED_PASSWORD}."
+        ))
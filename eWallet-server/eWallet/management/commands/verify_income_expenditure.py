@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+
+from eWallet.cache import bump_account_versions, user_account_ids
+from eWallet.models import CustomUser, IncomeExpenditureAnalysis
+
+
+class Command(BaseCommand):
+    help = "Compare IncomeExpenditureAnalysis totals with the ledger, a chunk of users at a time, and optionally repair them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--repair", action="store_true", help="Overwrite wrong totals with the recomputed values.")
+
+    def handle(self, *args, **options):
+        users = CustomUser.objects.order_by("id").values_list("id", flat=True)
+        chunk_size = options["chunk_size"]
+        last_id, checked, mismatched = None, 0, 0
+
+        while True:
+            chunk = users.filter(id__gt=last_id) if last_id else users
+            user_ids = list(chunk[:chunk_size])
+            if not user_ids:
+                break
+
+            expected = IncomeExpenditureAnalysis.objects.recompute(user_ids)
+            stored = {
+                row["user_id"]: row
+                for row in IncomeExpenditureAnalysis.objects.filter(user_id__in=user_ids).values(
+                    "user_id", "total_income", "total_expenditure"
+                )
+            }
+
+            for user_id, totals in expected.items():
+                current = stored.get(user_id)
+                if current is None and not any(totals.values()):
+                    continue
+                if current is not None and all(current[field] == value for field, value in totals.items()):
+                    continue
+
+                mismatched += 1
+                self.stdout.write(
+                    f"User {user_id}: stored {current and {f: current[f] for f in totals}}, expected {totals}"
+                )
+                if options["repair"]:
+                    IncomeExpenditureAnalysis.objects.update_or_create(user_id=user_id, defaults=totals)
+                    bump_account_versions(user_account_ids(user_id))
+
+            checked += len(user_ids)
+            last_id = user_ids[-1]
+
+        action = "repaired" if options["repair"] else "found"
+        style = self.style.SUCCESS if not mismatched or options["repair"] else self.style.WARNING
+        self.stdout.write(style(f"Checked {checked} users, {action} {mismatched} mismatches."))
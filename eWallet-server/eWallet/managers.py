@@ -1,7 +1,53 @@
 from django.contrib.auth.models import BaseUserManager
-from django.db import models
-from django.db.models import Sum
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
 from django.apps import apps
+from django.utils import timezone
+
+
+INCREMENT_CHUNK_SIZE = 200
+
+
+def increment_rows(manager, key_fields, deltas, chunk_size=INCREMENT_CHUNK_SIZE):
+    """
+    Add {key: {field: delta}} to the rows identified by key_fields, creating missing rows
+    first. Each chunk of keys costs one INSERT ... ON CONFLICT DO NOTHING and one UPDATE
+    with a CASE per field, so the query count does not grow with the number of rows touched.
+    Only the rows of the given keys are written. Returns the number of rows updated.
+    """
+    model = manager.model
+    items = list(deltas.items())
+    updated = 0
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        manager.bulk_create(
+            [model(**dict(zip(key_fields, key))) for key, _ in chunk],
+            ignore_conflicts=True,
+        )
+
+        updates = {}
+        for field in sorted({field for _, delta in chunk for field in delta}):
+            output_field = model._meta.get_field(field)
+            updates[field] = F(field) + Case(
+                *(
+                    When(Q(**dict(zip(key_fields, key))), then=Value(delta[field], output_field=output_field))
+                    for key, delta in chunk
+                    if field in delta
+                ),
+                default=Value(0, output_field=output_field),
+                output_field=output_field,
+            )
+        if len(key_fields) == 1:
+            rows = Q(**{f"{key_fields[0]}__in": [key[0] for key, _ in chunk]})
+        else:
+            # Per-column IN lists would also match the cross product of the key values.
+            rows = Q()
+            for key, _ in chunk:
+                rows |= Q(**dict(zip(key_fields, key)))
+        updated += manager.filter(rows).update(**updates)
+    return updated
+
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -30,30 +76,28 @@ class IncomeExpenditureAnalysisManager(models.Manager):
         """
         Get total income and expenditure for a given user.
         """
-        total_income = user.account.transactions.filter(subtype="income").aggregate(
-            total=Sum("amount")
-        )["total"] or 0.00
+        IncomeExpenditureAnalysis = apps.get_model('eWallet', 'IncomeExpenditureAnalysis')
+        totals = IncomeExpenditureAnalysis.objects.filter(user=user).values(
+            "total_income", "total_expenditure"
+        ).first()
 
-        total_expenditure = user.account.transactions.filter(subtype="expenditure").aggregate(
-            total=Sum("amount")
-        )["total"] or 0.00
-
-        return {"total_income": total_income, "total_expenditure": total_expenditure}
+        return totals or {"total_income": 0.00, "total_expenditure": 0.00}
 
     @staticmethod
     def get_income_expenditure_by_date(user, start_date, end_date):
         """
         Get total income and expenditure for a given user within a date range.
+        Both ends are inclusive days and are read from the daily summaries.
         """
-        total_income = user.account.transactions.filter(
-            subtype="income", created_at__range=[start_date, end_date]
-        ).aggregate(total=Sum("amount"))["total"] or 0.00
-
-        total_expenditure = user.account.transactions.filter(
-            subtype="expenditure", created_at__range=[start_date, end_date]
-        ).aggregate(total=Sum("amount"))["total"] or 0.00
+        DailyTransactionSummary = apps.get_model('eWallet', 'DailyTransactionSummary')
+        totals = DailyTransactionSummary.objects.filter(
+            account__user=user, date__range=[_as_date(start_date), _as_date(end_date)]
+        ).aggregate(total_income=Sum("total_income"), total_expenditure=Sum("total_expenditure"))
 
-        return {"total_income": total_income, "total_expenditure": total_expenditure}
+        return {
+            "total_income": totals["total_income"] or 0.00,
+            "total_expenditure": totals["total_expenditure"] or 0.00,
+        }
     
 
     @staticmethod
@@ -63,25 +107,161 @@ class IncomeExpenditureAnalysisManager(models.Manager):
         Returns a dictionary with month-wise totals.
         """
 
-        Transaction = apps.get_model('eWallet', 'Transaction')
-        transactions = Transaction.objects.filter(account__user=user)
-
-        monthly_data = (
-            transactions.values("created_at__year", "created_at__month")
-            .annotate(
-                total_deposits=Sum("amount", filter=models.Q(transaction_type="deposit")),
-                total_debits=Sum("amount", filter=models.Q(transaction_type="debit")),
-            )
-            .order_by("created_at__year", "created_at__month")
-        )
+        DailyTransactionSummary = apps.get_model('eWallet', 'DailyTransactionSummary')
+        monthly_data = DailyTransactionSummary.objects.monthly_totals(account__user=user)
 
         return [
             {
-                "year": entry["created_at__year"],
-                "month": entry["created_at__month"],
+                "year": entry["date__year"],
+                "month": entry["date__month"],
                 "total_credits": entry["total_deposits"] or 0.00,
                 "total_debits": entry["total_debits"] or 0.00,
             }
             for entry in monthly_data
         ]
 
+
+def _as_date(value):
+    return value.date() if hasattr(value, "date") else value
+
+
+class DailyTransactionSummaryManager(models.Manager):
+    AMOUNT_FIELDS = ("total_deposits", "total_debits", "total_income", "total_expenditure")
+    COUNT_FIELDS = ("deposit_count", "debit_count")
+
+    def monthly_totals(self, **filters):
+        """Deposit and debit totals grouped by year and month for the summaries matching filters."""
+        return (
+            self.filter(**filters)
+            .values("date__year", "date__month")
+            .annotate(total_deposits=Sum("total_deposits"), total_debits=Sum("total_debits"))
+            .order_by("date__year", "date__month")
+        )
+
+    @staticmethod
+    def summary_deltas(transactions, sign=1):
+        """
+        Fold transactions into {(account_id, date): {field: delta}} so a batch
+        touches each summary row once. Pass sign=-1 to remove transactions.
+        """
+        deltas = {}
+        for instance in transactions:
+            created_at = instance.created_at or timezone.now()
+            day = timezone.localtime(created_at).date() if timezone.is_aware(created_at) else created_at.date()
+            delta = deltas.setdefault((instance.account_id, day), {})
+
+            if instance.transaction_type == "deposit":
+                delta["total_deposits"] = delta.get("total_deposits", 0) + sign * instance.amount
+                delta["deposit_count"] = delta.get("deposit_count", 0) + sign
+            elif instance.transaction_type == "debit":
+                delta["total_debits"] = delta.get("total_debits", 0) + sign * instance.amount
+                delta["debit_count"] = delta.get("debit_count", 0) + sign
+
+            if instance.subtype == "income":
+                delta["total_income"] = delta.get("total_income", 0) + sign * instance.amount
+            elif instance.subtype == "expenditure":
+                delta["total_expenditure"] = delta.get("total_expenditure", 0) + sign * instance.amount
+
+        return {key: delta for key, delta in deltas.items() if delta}
+
+    def apply_deltas(self, deltas):
+        """
+        Add the deltas to the summary rows with database-side increments,
+        creating rows for days that have no summary yet.
+        """
+        increment_rows(self, ("account_id", "date"), deltas)
+
+    def apply_transactions(self, transactions, sign=1):
+        self.apply_deltas(self.summary_deltas(transactions, sign))
+
+    def rebuild(self, account_ids):
+        """
+        Recompute the summaries of the given accounts from their transactions.
+        """
+        Transaction = apps.get_model('eWallet', 'Transaction')
+        deposit, debit = Q(transaction_type="deposit"), Q(transaction_type="debit")
+
+        rows = (
+            Transaction.objects.filter(account_id__in=account_ids)
+            .annotate(day=TruncDate("created_at"))
+            .values("account_id", "day")
+            .annotate(
+                total_deposits=Sum("amount", filter=deposit),
+                total_debits=Sum("amount", filter=debit),
+                total_income=Sum("amount", filter=Q(subtype="income")),
+                total_expenditure=Sum("amount", filter=Q(subtype="expenditure")),
+                deposit_count=Count("id", filter=deposit),
+                debit_count=Count("id", filter=debit),
+            )
+            .order_by()
+        )
+
+        summaries = [
+            self.model(
+                account_id=row["account_id"],
+                date=row["day"],
+                **{field: row[field] or 0 for field in self.AMOUNT_FIELDS + self.COUNT_FIELDS},
+            )
+            for row in rows
+        ]
+
+        with transaction.atomic():
+            self.filter(account_id__in=account_ids).delete()
+            self.bulk_create(summaries, batch_size=500)
+
+        return len(summaries)
+
+
+class IncomeExpenditureTotalsManager(models.Manager):
+
+    @staticmethod
+    def totals_deltas(transactions, sign=1):
+        """
+        Fold transactions into {account_id: {"total_income": x, "total_expenditure": y}}, keyed on subtype.
+        """
+        deltas = {}
+        for instance in transactions:
+            if instance.subtype not in ("income", "expenditure"):
+                continue
+            field = f"total_{instance.subtype}"
+            delta = deltas.setdefault(instance.account_id, {})
+            delta[field] = delta.get(field, 0) + sign * instance.amount
+        return deltas
+
+    def apply_deltas(self, deltas):
+        """
+        Add per-account deltas to the owning users' totals with database-side increments.
+        """
+        if not deltas:
+            return
+
+        Account = apps.get_model('eWallet', 'Account')
+        by_user = {}
+        for account_id, user_id in Account.objects.filter(id__in=deltas).values_list("id", "user_id"):
+            user_delta = by_user.setdefault(user_id, {})
+            for field, value in deltas[account_id].items():
+                user_delta[field] = user_delta.get(field, 0) + value
+
+        increment_rows(self, ("user_id",), {(user_id,): delta for user_id, delta in by_user.items()})
+
+    def recompute(self, user_ids):
+        """
+        Return the true totals for the given users, computed from their transactions.
+        """
+        Transaction = apps.get_model('eWallet', 'Transaction')
+        rows = (
+            Transaction.objects.filter(account__user_id__in=user_ids)
+            .values("account__user_id")
+            .annotate(
+                total_income=Sum("amount", filter=Q(subtype="income")),
+                total_expenditure=Sum("amount", filter=Q(subtype="expenditure")),
+            )
+            .order_by()
+        )
+        totals = {user_id: {"total_income": 0, "total_expenditure": 0} for user_id in user_ids}
+        for row in rows:
+            totals[row["account__user_id"]] = {
+                "total_income": row["total_income"] or 0,
+                "total_expenditure": row["total_expenditure"] or 0,
+            }
+        return totals
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_summaries(apps, schema_editor):
+    Transaction = apps.get_model('eWallet', 'Transaction')
+    DailyTransactionSummary = apps.get_model('eWallet', 'DailyTransactionSummary')
+    deposit, debit = Q(transaction_type='deposit'), Q(transaction_type='debit')
+
+    rows = (
+        Transaction.objects.annotate(day=TruncDate('created_at'))
+        .values('account_id', 'day')
+        .annotate(
+            total_deposits=Sum('amount', filter=deposit),
+            total_debits=Sum('amount', filter=debit),
+            total_income=Sum('amount', filter=Q(subtype='income')),
+            total_expenditure=Sum('amount', filter=Q(subtype='expenditure')),
+            deposit_count=Count('id', filter=deposit),
+            debit_count=Count('id', filter=debit),
+        )
+        .order_by()
+    )
+    DailyTransactionSummary.objects.bulk_create(
+        (
+            DailyTransactionSummary(
+                account_id=row['account_id'],
+                date=row['day'],
+                total_deposits=row['total_deposits'] or 0,
+                total_debits=row['total_debits'] or 0,
+                total_income=row['total_income'] or 0,
+                total_expenditure=row['total_expenditure'] or 0,
+                deposit_count=row['deposit_count'],
+                debit_count=row['debit_count'],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eWallet', '0017_transaction_amount_after_transaction_amount_before'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTransactionSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total_deposits', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('total_debits', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('total_income', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('total_expenditure', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('deposit_count', models.PositiveIntegerField(default=0)),
+                ('debit_count', models.PositiveIntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries', to='eWallet.account')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('account', 'date'), name='unique_daily_summary_per_account')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_summaries, migrations.RunPython.noop),
+    ]
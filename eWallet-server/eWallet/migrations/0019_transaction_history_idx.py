@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eWallet', '0018_dailytransactionsummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'created_at', 'id'], name='transaction_history_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:38
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('eWallet', '0019_transaction_history_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Lower('full_name'), models.F('id'), name='user_directory_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Lower('email'), models.F('id'), name='user_directory_email_idx'),
+        ),
+    ]
@@ -3,12 +3,14 @@ import random
 import uuid
 from django.conf import settings
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import Permission, Group
 from uuid import uuid4
 
-from eWallet.managers import CustomUserManager, IncomeExpenditureAnalysisManager
+from eWallet.managers import CustomUserManager, DailyTransactionSummaryManager, IncomeExpenditureAnalysisManager, IncomeExpenditureTotalsManager
 
 
 class CustomUser(AbstractUser):
@@ -39,6 +41,12 @@ class CustomUser(AbstractUser):
     class Meta:
         verbose_name = "Custom User"
         verbose_name_plural = "Custom Users"
+        # Directory orderings and prefix searches (see eWallet/directory.py); the
+        # phone number's unique index already serves the phone ordering.
+        indexes = [
+            models.Index(Lower("full_name"), F("id"), name="user_directory_name_idx"),
+            models.Index(Lower("email"), F("id"), name="user_directory_email_idx"),
+        ]
 
     def __str__(self):
         return self.email
@@ -51,8 +59,13 @@ class Account(models.Model):
     account_number = models.CharField(max_length=20)
     balance = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["account_number"], name="account_number_idx"),
+        ]
+
     def __str__(self):
-        return f"{self.bank_name} - {self.account_name}"
+        return f"{self.account_number} - {self.account_name}"
 
 
 class Card(models.Model):
@@ -74,6 +87,7 @@ class Card(models.Model):
     cvv = models.CharField(max_length=4, blank=True)
     card_type = models.CharField(max_length=50, choices=[("debit", "Debit"), ("credit", "Credit")], db_default="debit")
     card_issuer = models.CharField(max_length=50, choices=CARD_ISSUERS, default="visa")
+    created_at = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
         """Generate card details before saving if not already set."""
@@ -185,6 +199,13 @@ class Transaction(models.Model):
 
     objects = IncomeExpenditureAnalysisManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["account", "created_at", "id"], name="transaction_history_idx"),
+            # Admin ordering and date hierarchy across all accounts.
+            models.Index(fields=["created_at", "id"], name="transaction_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.transaction_type.capitalize()} - {self.amount}"
 
@@ -215,10 +236,32 @@ class IncomeExpenditureAnalysis(models.Model):
     total_expenditure = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = IncomeExpenditureTotalsManager()
+
     def __str__(self):
         return f"Analysis for {self.user.email}"
 
 
+class DailyTransactionSummary(models.Model):
+    """
+    Per-account, per-day totals maintained as transactions commit, so analytics
+    read one row per day instead of every transaction.
+    """
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="daily_summaries")
+    date = models.DateField()
+    total_deposits = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    total_debits = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    total_income = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    total_expenditure = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    deposit_count = models.PositiveIntegerField(default=0)
+    debit_count = models.PositiveIntegerField(default=0)
 
+    objects = DailyTransactionSummaryManager()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["account", "date"], name="unique_daily_summary_per_account"),
+        ]
 
+    def __str__(self):
+        return f"Summary for {self.account_id} on {self.date}"
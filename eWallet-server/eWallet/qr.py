@@ -0,0 +1,253 @@
+import base64
+import binascii
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+
+import qrcode
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, connection, transaction
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from common.lru import TTLCache
+from .models import CustomUser, QRCode
+
+QR_PAYLOAD_VERSION = "EW1"
+SIGNATURE_BYTES = 12
+LEGACY_PAYLOAD = re.compile(r"User ID:\s*([0-9a-fA-F-]{32,36})")
+
+
+class InvalidQRCode(ValueError):
+    pass
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _signature(raw):
+    return salted_hmac(
+        "eWallet.qr.payload", raw, secret=getattr(settings, "QR_SIGNING_KEY", None), algorithm="sha256"
+    ).digest()[:SIGNATURE_BYTES]
+
+
+def qr_payload(user):
+    """
+    Text encoded into a user's QR code: ``EW1.<user id>.<hmac>``, both parts base64url.
+    Only the user id is embedded; display fields are looked up when the code is scanned.
+    """
+    raw = user.id.bytes
+    return f"{QR_PAYLOAD_VERSION}.{_b64encode(raw)}.{_b64encode(_signature(raw))}"
+
+
+def parse_qr_payload(data):
+    """
+    Return the user id carried by a scanned QR payload, without touching the database.
+    Signed payloads are verified. Unsigned "User ID: ..." codes issued before signing
+    existed can be forged by anyone, so they are only accepted while
+    QR_ACCEPT_LEGACY_PAYLOADS is on (see backfill_qr_codes --reissue). Raises
+    InvalidQRCode for forged or malformed data.
+    """
+    if not isinstance(data, str) or len(data) > 512:
+        raise InvalidQRCode("Invalid QR data")
+    data = data.strip()
+
+    if data.startswith(f"{QR_PAYLOAD_VERSION}."):
+        parts = data.split(".")
+        if len(parts) != 3:
+            raise InvalidQRCode("Invalid QR data")
+        try:
+            raw, signature = _b64decode(parts[1]), _b64decode(parts[2])
+        except (binascii.Error, ValueError):
+            raise InvalidQRCode("Invalid QR data")
+        if len(raw) != 16 or not constant_time_compare(signature, _signature(raw)):
+            raise InvalidQRCode("Invalid QR data")
+        return uuid.UUID(bytes=raw)
+
+    if not getattr(settings, "QR_ACCEPT_LEGACY_PAYLOADS", True):
+        raise InvalidQRCode("Invalid QR data")
+    match = LEGACY_PAYLOAD.search(data)
+    if match is None:
+        raise InvalidQRCode("Invalid QR data")
+    try:
+        return uuid.UUID(match.group(1))
+    except ValueError:
+        raise InvalidQRCode("Invalid QR data")
+
+
+scanned_profiles = TTLCache(
+    ttl=getattr(settings, "QR_PROFILE_CACHE_TTL", 60),
+    max_entries=getattr(settings, "QR_PROFILE_CACHE_SIZE", 4096),
+)
+
+
+def scanned_profile(user_id):
+    """
+    Display fields for a scanned user, served from a per-process TTL cache.
+    Returns None when the user does not exist.
+    """
+    profile = scanned_profiles.get(user_id)
+    if profile is None:
+        profile = CustomUser.objects.filter(pk=user_id).values("id", "email", "full_name").first()
+        if profile is None:
+            return None
+        profile = {"user_id": profile["id"], "email": profile["email"], "name": profile["full_name"]}
+        scanned_profiles.set(user_id, profile)
+    return profile
+
+
+def render_qr_png(payload):
+    """
+    Encode payload as a PNG. Kept free of Django state so it can run in a worker process.
+    """
+    buffer = BytesIO()
+    qrcode.make(payload).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class PNGCache:
+    """Thread-safe LRU of encoded QR images, bounded by total size in bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+            return png
+
+    def set(self, key, png):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            if len(png) > self.max_bytes:
+                return
+            self._entries[key] = png
+            self.size += len(png)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def discard(self, key):
+        with self._lock:
+            png = self._entries.pop(key, None)
+            if png is not None:
+                self.size -= len(png)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+png_cache = PNGCache(getattr(settings, "QR_CODE_CACHE_BYTES", 16 * 1024 * 1024))
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+@contextmanager
+def single_flight(key):
+    """
+    Serialize work on one key inside this process, so concurrent first requests
+    for the same QR code render it once; later callers find the result cached.
+    """
+    with _flights_lock:
+        flight = _flights.setdefault(key, [threading.RLock(), 0])
+        flight[1] += 1
+    try:
+        with flight[0]:
+            yield
+    finally:
+        with _flights_lock:
+            flight[1] -= 1
+            if not flight[1]:
+                _flights.pop(key, None)
+
+
+def save_qr_code(user, png):
+    """
+    Store an already-rendered image for user. Returns the QRCode, or the existing
+    one when another process stored it first.
+    """
+    image = ContentFile(png, name=f"qr_code_{user.id}.png")
+    try:
+        with transaction.atomic():
+            return QRCode.objects.create(user=user, qr_image=image)
+    except IntegrityError:
+        return QRCode.objects.get(user=user)
+
+
+def get_or_create_qr_code(user):
+    """
+    Return the user's QRCode, rendering and storing it on first access.
+    """
+    qr_code = QRCode.objects.filter(user=user).first()
+    if qr_code is not None:
+        return qr_code
+
+    with single_flight(user.pk):
+        qr_code = QRCode.objects.filter(user=user).first()
+        if qr_code is not None:
+            return qr_code
+
+        png = png_cache.get(user.pk) or render_qr_png(qr_payload(user))
+        png_cache.set(user.pk, png)
+        return save_qr_code(user, png)
+
+
+def get_qr_png(user):
+    """
+    Return the user's QR image bytes from the LRU, the stored file or a fresh render, in that order.
+    """
+    png = png_cache.get(user.pk)
+    if png is not None:
+        return png
+
+    with single_flight(user.pk):
+        png = png_cache.get(user.pk)
+        if png is None:
+            qr_code = get_or_create_qr_code(user)
+            with qr_code.qr_image.open("rb") as image:
+                png = image.read()
+            png_cache.set(user.pk, png)
+    return png
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _generate_in_background(user_id):
+    try:
+        user = CustomUser.objects.filter(pk=user_id).first()
+        if user is not None:
+            get_or_create_qr_code(user)
+    finally:
+        connection.close()
+
+
+def schedule_qr_code(user_id):
+    """Render a user's QR code on a background thread, off the request path."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "QR_CODE_WORKERS", 1), thread_name_prefix="qr-code"
+            )
+    _executor.submit(_generate_in_background, user_id)
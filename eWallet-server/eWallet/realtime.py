@@ -0,0 +1,92 @@
+import json
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from common.encoders import row_encoder
+from .models import Account
+
+logger = logging.getLogger(__name__)
+
+
+def group_name(user_id):
+    return f"wallet.{user_id}"
+
+
+def _json_safe(payload):
+    """
+    Reduce payload to JSON primitives. channels_redis packs messages with msgpack,
+    which cannot carry the UUIDs that RowEncoder keeps for related keys, like DRF does.
+    """
+    return json.loads(json.dumps(payload, cls=JSONEncoder))
+
+
+def _send(messages):
+    if not getattr(settings, "REALTIME_PUSH_ENABLED", True):
+        return
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    send = async_to_sync(channel_layer.group_send)
+    for user_id, message in messages:
+        try:
+            send(group_name(user_id), message)
+        except Exception:
+            logger.exception("Could not push %s to user %s", message["type"], user_id)
+
+
+def push_balances(account_ids):
+    """Push the current balance of each account to its owner. Call after commit."""
+    rows = Account.objects.filter(id__in=account_ids).values_list("id", "user_id", "balance")
+    _send(
+        (user_id, {"type": "wallet.balance", "account": str(account_id), "balance": f"{balance:f}"})
+        for account_id, user_id, balance in rows
+    )
+
+
+def push_transactions(transactions):
+    """
+    Push committed transactions and the resulting balances to their owners,
+    with one query for the account owners and balances.
+    """
+    from .serializers import TransactionSerializer
+
+    encoder = row_encoder(TransactionSerializer)
+    accounts = {
+        account_id: (user_id, balance)
+        for account_id, user_id, balance in Account.objects.filter(
+            id__in={instance.account_id for instance in transactions}
+        ).values_list("id", "user_id", "balance")
+    }
+
+    messages = []
+    for instance in transactions:
+        owner = accounts.get(instance.account_id)
+        if owner is None:
+            continue
+        row = {column: getattr(instance, "account_id" if column == "account" else column) for column in encoder.columns}
+        messages.append((owner[0], {"type": "wallet.transaction", "transaction": _json_safe(encoder.encode(row))}))
+
+    for account_id, (user_id, balance) in accounts.items():
+        messages.append((user_id, {"type": "wallet.balance", "account": str(account_id), "balance": f"{balance:f}"}))
+
+    _send(messages)
+
+
+def push_on_commit(transactions=(), account_ids=()):
+    """Schedule pushes for when the surrounding database transaction commits."""
+    transactions, account_ids = list(transactions), set(account_ids)
+    if not getattr(settings, "REALTIME_PUSH_ENABLED", True) or not (transactions or account_ids):
+        return
+
+    def push():
+        if transactions:
+            push_transactions(transactions)
+        if account_ids:
+            push_balances(account_ids)
+
+    transaction.on_commit(push)
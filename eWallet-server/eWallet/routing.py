@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .consumers import WalletConsumer
+
+websocket_urlpatterns = [
+    path("ws/wallet/", WalletConsumer.as_asgi()),
+]
@@ -0,0 +1,149 @@
+"""
+Synthetic data for load tests: users with their account and card, and a ledger
+spread over time, written with bulk inserts. Signals are bypassed, so the derived
+tables (summaries, totals, spending logs) are filled in directly at the end.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from common.benchmarks import explicit_timestamps
+from .models import (
+    Account,
+    Card,
+    CustomUser,
+    DailyTransactionSummary,
+    IncomeExpenditureAnalysis,
+    SpendingLog,
+    Transaction,
+)
+
+SEED_PASSWORD = "seed-password"
+# Seeded phone numbers are SEED_PHONE_PREFIX followed by a 9-digit serial shared by every prefix.
+SEED_PHONE_PREFIX = "07"
+DESCRIPTIONS = [value for value, _ in Transaction.TRANSACTION_DESCRIPTION_CHOICES]
+
+
+def next_seed_phone_serial():
+    """The serial after the highest seeded phone number, read from the phone number index."""
+    last = (
+        CustomUser.objects.filter(
+            phone_number__gte=SEED_PHONE_PREFIX + "0" * 9, phone_number__lte=SEED_PHONE_PREFIX + "9" * 9
+        )
+        .order_by("-phone_number")
+        .values_list("phone_number", flat=True)
+        .first()
+    )
+    return int(last[len(SEED_PHONE_PREFIX):]) + 1 if last else 0
+
+
+def seed_users(count, prefix="seed", balance=Decimal("0.00"), batch_size=1000, rng=None):
+    """
+    Create count users named ``<prefix><n>@example.com``, each with one account and one card.
+    All share the password SEED_PASSWORD. Phone numbers continue after the highest seeded
+    one, so runs with different prefixes do not collide. Returns the accounts with ``user``
+    populated.
+    """
+    rng = rng or random.Random(0)
+    password = make_password(SEED_PASSWORD)
+    start = CustomUser.objects.filter(email__startswith=prefix).count()
+    phone_start = next_seed_phone_serial()
+
+    users = [
+        CustomUser(
+            email=f"{prefix}{n}@example.com",
+            username=f"{prefix}{n}@example.com",
+            full_name=f"{prefix.title()} User {n}",
+            phone_number=f"{SEED_PHONE_PREFIX}{phone_start + offset:09d}",
+            password=password,
+        )
+        for offset, n in enumerate(range(start, start + count))
+    ]
+    accounts = [
+        Account(
+            user=user,
+            account_name=f"{user.full_name}'s Account",
+            account_number=user.phone_number[-10:],
+            balance=balance,
+        )
+        for user in users
+    ]
+    cards = []
+    for account in accounts:
+        issuer = rng.choice(Card.CARD_ISSUERS)[0]
+        card = Card(account=account, card_holder_name=account.user.full_name, card_issuer=issuer)
+        card.card_number = card.generate_card_number(issuer)
+        card.expiry_date = card.generate_expiry_date()
+        card.cvv = card.generate_cvv(issuer)
+        cards.append(card)
+
+    with transaction.atomic():
+        CustomUser.objects.bulk_create(users, batch_size=batch_size)
+        Account.objects.bulk_create(accounts, batch_size=batch_size)
+        Card.objects.bulk_create(cards, batch_size=batch_size)
+    return accounts
+
+
+def seed_transactions(accounts, count, days=365, batch_size=2000, rng=None):
+    """
+    Spread count deposits and debits over the accounts and the last ``days`` days.
+    Each account's ledger is consistent: amounts before/after chain in time order, debits
+    never overdraw, and the account balance ends at the last amount_after.
+    Returns the number of transactions written.
+    """
+    rng = rng or random.Random(1)
+    if not accounts or count <= 0:
+        return 0
+
+    now = timezone.now()
+    start = now - timedelta(days=days)
+    per_account = {account.pk: [] for account in accounts}
+    for _ in range(count):
+        per_account[rng.choice(accounts).pk].append(start + timedelta(seconds=rng.randint(0, days * 86400)))
+
+    rows, logs = [], []
+    for account in accounts:
+        balance = account.balance
+        for created_at in sorted(per_account[account.pk]):
+            amount = Decimal(rng.randint(100, 50000)) / 100
+            is_deposit = balance < amount or rng.random() < 0.45
+            before, balance = balance, balance + amount if is_deposit else balance - amount
+            row = Transaction(
+                account=account,
+                amount=amount,
+                amount_before=before,
+                amount_after=balance,
+                transaction_type="deposit" if is_deposit else "debit",
+                subtype="income" if is_deposit else "expenditure",
+                description="salary_payment" if is_deposit else rng.choice(DESCRIPTIONS),
+                created_at=created_at,
+            )
+            rows.append(row)
+            if not is_deposit:
+                logs.append(SpendingLog(transaction=row, category=row.description, timestamp=created_at))
+        account.balance = balance
+
+    with transaction.atomic(), explicit_timestamps(Transaction, "created_at"):
+        Transaction.objects.bulk_create(rows, batch_size=batch_size)
+        SpendingLog.objects.bulk_create(logs, batch_size=batch_size)
+        Account.objects.bulk_update(accounts, ["balance"], batch_size=batch_size)
+    return len(rows)
+
+
+def rebuild_derived(accounts, chunk_size=500):
+    """Recompute daily summaries and income/expenditure totals for the seeded accounts."""
+    for start in range(0, len(accounts), chunk_size):
+        chunk = accounts[start:start + chunk_size]
+        DailyTransactionSummary.objects.rebuild([account.pk for account in chunk])
+
+        user_ids = [account.user_id for account in chunk]
+        totals = IncomeExpenditureAnalysis.objects.recompute(user_ids)
+        with transaction.atomic():
+            IncomeExpenditureAnalysis.objects.filter(user_id__in=user_ids).delete()
+            IncomeExpenditureAnalysis.objects.bulk_create(
+                IncomeExpenditureAnalysis(user_id=user_id, **values) for user_id, values in totals.items()
+            )
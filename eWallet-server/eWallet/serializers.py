@@ -1,15 +1,16 @@
 from django.forms import ValidationError
 from rest_framework import serializers
-from common.notifications import Notification
 from .models import Card, CustomUser, Account, Transaction, QRCode
 from django.contrib.auth import authenticate
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .services import TransferError, credit_account, debit_account, fund_card
+
 
 class GetUserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -19,6 +20,11 @@ class GetUserSerializer(serializers.ModelSerializer):
 
 
 class CustomUserSerializer(serializers.ModelSerializer):
+    # Only staff may change these; for everyone else they are read-only.
+    STAFF_ONLY_FIELDS = ['is_verified', 'is_blocked']
+    # All that non-staff users see of other users (see PublicUserSerializer).
+    PUBLIC_FIELDS = ['id', 'full_name']
+
     class Meta:
         model = CustomUser
         fields = ['id', 'full_name', 'email', 'phone_number', 'is_verified', 'is_blocked', 'password']
@@ -26,6 +32,14 @@ class CustomUserSerializer(serializers.ModelSerializer):
             'password': {'write_only': True},
         }
 
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if not (request and request.user and request.user.is_staff):
+            for name in self.STAFF_ONLY_FIELDS:
+                fields[name].read_only = True
+        return fields
+
     def create(self, validated_data):
         password = validated_data.pop('password', None)  
         email = validated_data.get("email", "").strip().lower()  
@@ -66,6 +80,22 @@ class AccountSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'account_name', 'account_number', 'balance']
 
 
+class PublicUserSerializer(serializers.ModelSerializer):
+    """Another user as a non-staff caller sees them in the directory."""
+
+    class Meta:
+        model = CustomUser
+        fields = CustomUserSerializer.PUBLIC_FIELDS
+        read_only_fields = CustomUserSerializer.PUBLIC_FIELDS
+
+
+class DashboardAccountSerializer(serializers.ModelSerializer):
+    """Account fields for the dashboard, which carries the user separately."""
+
+    class Meta:
+        model = Account
+        fields = ['id', 'account_name', 'account_number', 'balance']
+
 
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -148,15 +178,16 @@ class FundCardSerializer(serializers.Serializer):
     def validate(self, data):
         user = self.context["request"].user
 
-        try:
-            account = Account.objects.get(id=data["account_id"], user=user)
-        except Account.DoesNotExist:
-            raise serializers.ValidationError({"account": "Invalid account selection."})
-
-        try:
-            card = Card.objects.get(id=data["card_id"], account=account)
-        except Card.DoesNotExist:
+        card = (
+            Card.objects.select_related("account")
+            .filter(id=data["card_id"], account_id=data["account_id"], account__user=user)
+            .first()
+        )
+        if card is None:
+            if not Account.objects.filter(id=data["account_id"], user=user).exists():
+                raise serializers.ValidationError({"account": "Invalid account selection."})
             raise serializers.ValidationError({"card": "Invalid card selection."})
+        account = card.account
 
         if account.balance < data["amount"]:
             raise serializers.ValidationError({"amount": "Insufficient funds in account."})
@@ -166,15 +197,12 @@ class FundCardSerializer(serializers.Serializer):
         return data
 
     def create(self, validated_data):
-        account = validated_data["account"]
-        card = validated_data["card"]
-        amount = validated_data["amount"]
-
-        account.balance -= amount
-        account.save()
-
-        card.card_balance = (card.card_balance or 0) + amount
-        card.save()
+        try:
+            account, card = fund_card(
+                validated_data["account"].id, validated_data["card"].id, validated_data["amount"]
+            )
+        except TransferError as e:
+            raise serializers.ValidationError({"amount": str(e)})
 
         return {
             "message": "Card funded successfully",
@@ -182,6 +210,15 @@ class FundCardSerializer(serializers.Serializer):
             "account_balance": account.balance,
         }
 
+class PayoutItemSerializer(serializers.Serializer):
+    customer_id = serializers.UUIDField()
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2)
+
+
+class BulkPayoutSerializer(serializers.Serializer):
+    payments = PayoutItemSerializer(many=True, allow_empty=False)
+
+
 class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
@@ -197,32 +234,33 @@ class DebitTransactionSerializer(serializers.ModelSerializer):
     def validate(self, data):
         user = self.context["request"].user
 
-        try:
-            account = Account.objects.get(id=data["account"].id, user=user)
-        except Account.DoesNotExist:
+        if data["account"].user_id != user.id:
             raise serializers.ValidationError({"account": "Invalid account selection."})
 
-        if account.balance < data["amount"]:
+        if data["account"].balance < data["amount"]:
             raise serializers.ValidationError({"amount": "Insufficient balance."})
 
-        data["account"] = account
         return data
 
     def create(self, validated_data):
-        account = validated_data["account"]
         amount = validated_data["amount"]
 
-        account.balance -= amount
-        account.save()
-
-        transaction = Transaction.objects.create(
-            account=account,
-            amount=amount,
-            transaction_type="debit",
-            subtype="expenditure",
-            description=validated_data.get("description", ""),
-        )
-        return transaction
+        try:
+            with transaction.atomic():
+                account = Account.objects.select_for_update().get(pk=validated_data["account"].pk)
+                before = account.balance
+                debit_account(account, amount)
+                return Transaction.objects.create(
+                    account=account,
+                    amount=amount,
+                    transaction_type="debit",
+                    subtype="expenditure",
+                    description=validated_data.get("description", ""),
+                    amount_before=before,
+                    amount_after=account.balance,
+                )
+        except TransferError as e:
+            raise serializers.ValidationError({"amount": str(e)})
 
 
 
@@ -235,29 +273,27 @@ class CreditTransactionSerializer(serializers.ModelSerializer):
     def validate(self, data):
         user = self.context["request"].user
 
-        try:
-            account = Account.objects.get(id=data["account"].id, user=user)
-        except Account.DoesNotExist:
+        if data["account"].user_id != user.id:
             raise serializers.ValidationError({"account": "Invalid account selection."})
 
-        data["account"] = account
         return data
 
     def create(self, validated_data):
-        account = validated_data["account"]
         amount = validated_data["amount"]
 
-        account.balance += amount
-        account.save()
-
-        transaction = Transaction.objects.create(
-            account=account,
-            amount=amount,
-            transaction_type="deposit",
-            subtype="income",
-            description=validated_data.get("description", ""),
-        )
-        return transaction
+        with transaction.atomic():
+            account = Account.objects.select_for_update().get(pk=validated_data["account"].pk)
+            before = account.balance
+            credit_account(account, amount)
+            return Transaction.objects.create(
+                account=account,
+                amount=amount,
+                transaction_type="deposit",
+                subtype="income",
+                description=validated_data.get("description", ""),
+                amount_before=before,
+                amount_after=account.balance,
+            )
 
 
 
@@ -0,0 +1,283 @@
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.db.models.functions import Coalesce
+
+from .cache import bump_on_commit
+from .models import Account, Card, Transaction
+from .realtime import push_on_commit
+from .signals import transactions_created
+
+
+class TransferError(Exception):
+    """Base error for money movements that were rejected before touching the ledger."""
+
+    status_code = 400
+
+
+class InvalidAmount(TransferError):
+    pass
+
+
+class InsufficientFunds(TransferError):
+    pass
+
+
+class AccountNotFound(TransferError):
+    status_code = 404
+
+
+def parse_amount(amount):
+    """
+    Convert user input into a positive two-decimal Decimal.
+    Floats are routed through str() so binary rounding never reaches the ledger.
+    """
+    if amount is None or amount == "":
+        raise InvalidAmount("Amount is required")
+
+    try:
+        amount = Decimal(str(amount))
+    except (InvalidOperation, ValueError):
+        raise InvalidAmount("Invalid amount format")
+
+    if not amount.is_finite() or amount <= 0:
+        raise InvalidAmount("Invalid amount")
+
+    if amount != amount.quantize(Decimal("0.01")):
+        raise InvalidAmount("Amount cannot have more than two decimal places")
+
+    return amount
+
+
+def lock_accounts(user_ids):
+    """
+    Lock the accounts of the given users and return them keyed by user id.
+    Rows are always locked in primary-key order so two transfers running in
+    opposite directions can never deadlock on each other.
+    """
+    accounts = (
+        Account.objects.select_for_update()
+        .filter(user_id__in=set(user_ids))
+        .order_by("id")
+    )
+    return {account.user_id: account for account in accounts}
+
+
+def debit_account(account, amount):
+    """
+    Subtract amount from the account in the database, but only if the balance covers it.
+    The check and the write are one conditional UPDATE, so concurrent debits cannot overdraw.
+    """
+    updated = Account.objects.filter(pk=account.pk, balance__gte=amount).update(
+        balance=F("balance") - amount
+    )
+    if not updated:
+        raise InsufficientFunds("Insufficient funds")
+    account.balance -= amount
+    bump_on_commit([account.pk])
+
+
+def credit_account(account, amount):
+    Account.objects.filter(pk=account.pk).update(balance=F("balance") + amount)
+    account.balance += amount
+    bump_on_commit([account.pk])
+
+
+@transaction.atomic
+def transfer_funds(
+    sender_id,
+    receiver_id,
+    amount,
+    debit_description="Payment to customer",
+    credit_description="Payment from user",
+):
+    """
+    Move money from the sender's account to the receiver's account.
+
+    Both accounts are locked in a fixed order, balances are changed with
+    database-side arithmetic and the two ledger rows are written in a single
+    bulk insert. Returns the (debit, credit) transactions.
+    """
+    amount = parse_amount(amount)
+
+    if sender_id == receiver_id:
+        raise TransferError("You cannot send money to yourself")
+
+    accounts = lock_accounts([sender_id, receiver_id])
+    sender_account = accounts.get(sender_id)
+    receiver_account = accounts.get(receiver_id)
+
+    if sender_account is None:
+        raise AccountNotFound("Account not found")
+    if receiver_account is None:
+        raise AccountNotFound("Customer not found")
+
+    sender_before = sender_account.balance
+    receiver_before = receiver_account.balance
+
+    debit_account(sender_account, amount)
+    credit_account(receiver_account, amount)
+
+    debit = Transaction(
+        account=sender_account,
+        amount=amount,
+        transaction_type="debit",
+        subtype="expenditure",
+        description=debit_description,
+        amount_before=sender_before,
+        amount_after=sender_account.balance,
+    )
+    credit = Transaction(
+        account=receiver_account,
+        amount=amount,
+        transaction_type="deposit",
+        subtype="income",
+        description=credit_description,
+        amount_before=receiver_before,
+        amount_after=receiver_account.balance,
+    )
+    Transaction.objects.bulk_create([debit, credit])
+    transactions_created.send(sender=Transaction, transactions=[debit, credit])
+
+    return debit, credit
+
+
+class PayoutRejected(TransferError):
+    """Raised when a payout batch is not applied; ``results`` holds the per-item outcome."""
+
+    def __init__(self, message, results):
+        super().__init__(message)
+        self.results = results
+
+
+def pay_customers(
+    sender_id,
+    payments,
+    debit_description="Payment to customer",
+    credit_description="Payment from user",
+):
+    """
+    Pay many customers from one account in a single database transaction.
+
+    ``payments`` is an iterable of (customer_id, amount) pairs. Recipients are
+    resolved and locked in one query, the sender is debited once for the batch
+    total, all recipients are credited with one UPDATE and every ledger row is
+    written with one bulk insert. The batch is all-or-nothing: if any item is
+    invalid or the total is not covered, nothing is applied and PayoutRejected
+    carries the per-item results. Returns the per-item results on success.
+    """
+    payments = list(payments)
+    max_items = getattr(settings, "BULK_PAYOUT_MAX_ITEMS", 5000)
+
+    if not payments:
+        raise InvalidAmount("At least one payment is required")
+    if len(payments) > max_items:
+        raise TransferError(f"A payout batch cannot contain more than {max_items} payments")
+
+    results = []
+    for index, (customer_id, amount) in enumerate(payments):
+        result = {"index": index, "customer_id": str(customer_id), "amount": amount, "status": "pending"}
+        try:
+            result["amount"] = parse_amount(amount)
+            if customer_id == sender_id:
+                raise TransferError("You cannot send money to yourself")
+        except TransferError as e:
+            result.update(status="rejected", error=str(e))
+        results.append(result)
+
+    with transaction.atomic():
+        accounts = lock_accounts([sender_id, *(customer_id for customer_id, _ in payments)])
+        sender_account = accounts.get(sender_id)
+        if sender_account is None:
+            raise AccountNotFound("Account not found")
+
+        for (customer_id, _), result in zip(payments, results):
+            if result["status"] == "pending" and customer_id not in accounts:
+                result.update(status="rejected", error="Customer not found")
+
+        if any(result["status"] == "rejected" for result in results):
+            for result in results:
+                if result["status"] == "pending":
+                    result["status"] = "skipped"
+            raise PayoutRejected("Payout batch rejected", results)
+
+        total = sum((result["amount"] for result in results), Decimal("0.00"))
+        try:
+            debit_account(sender_account, total)
+        except InsufficientFunds:
+            for result in results:
+                result.update(status="rejected", error="Insufficient funds for the whole batch")
+            raise PayoutRejected("Insufficient funds", results)
+
+        credits = {}
+        for (customer_id, _), result in zip(payments, results):
+            pk = accounts[customer_id].pk
+            credits[pk] = credits.get(pk, Decimal("0.00")) + result["amount"]
+
+        Account.objects.filter(pk__in=credits).update(
+            balance=F("balance") + Case(
+                *(When(pk=pk, then=Value(amount)) for pk, amount in credits.items()),
+                output_field=DecimalField(max_digits=15, decimal_places=2),
+            )
+        )
+        bump_on_commit(credits)
+
+        ledger = []
+        running_sender = sender_account.balance + total
+        for (customer_id, _), result in zip(payments, results):
+            receiver_account = accounts[customer_id]
+            amount = result["amount"]
+            ledger.append(Transaction(
+                account=sender_account,
+                amount=amount,
+                transaction_type="debit",
+                subtype="expenditure",
+                description=debit_description,
+                amount_before=running_sender,
+                amount_after=running_sender - amount,
+            ))
+            ledger.append(Transaction(
+                account=receiver_account,
+                amount=amount,
+                transaction_type="deposit",
+                subtype="income",
+                description=credit_description,
+                amount_before=receiver_account.balance,
+                amount_after=receiver_account.balance + amount,
+            ))
+            running_sender -= amount
+            receiver_account.balance += amount
+            result.update(status="paid", transaction_id=str(ledger[-2].id))
+
+        Transaction.objects.bulk_create(ledger)
+        transactions_created.send(sender=Transaction, transactions=ledger)
+
+    return results
+
+
+@transaction.atomic
+def fund_card(account_id, card_id, amount):
+    """
+    Move money from an account onto one of its cards.
+    The account row is locked before the card row, matching the order used by transfers.
+    """
+    amount = parse_amount(amount)
+
+    account = Account.objects.select_for_update().filter(pk=account_id).first()
+    if account is None:
+        raise AccountNotFound("Account not found")
+
+    card = Card.objects.select_for_update().filter(pk=card_id, account=account).first()
+    if card is None:
+        raise AccountNotFound("Card not found")
+
+    debit_account(account, amount)
+    Card.objects.filter(pk=card.pk).update(
+        card_balance=Coalesce(F("card_balance"), Value(Decimal("0.00"))) + amount
+    )
+    card.card_balance = (card.card_balance or Decimal("0.00")) + amount
+    push_on_commit(account_ids=[account.pk])
+
+    return account, card
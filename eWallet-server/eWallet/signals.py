@@ -1,13 +1,20 @@
 import random
 import re
 from django.conf import settings
-import qrcode
 from django.core.exceptions import ValidationError
-from io import BytesIO
-from django.core.files.base import ContentFile
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from .models import Card, CustomUser, Account, IncomeExpenditureAnalysis, QRCode, SpendingLog, Transaction
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from common.authentication import forget_cached_user
+from .cache import bump_account_versions, bump_on_commit, forget_user_accounts
+from .qr import scanned_profiles, schedule_qr_code
+from .realtime import push_on_commit
+from .models import Card, CustomUser, Account, DailyTransactionSummary, IncomeExpenditureAnalysis, SpendingLog, Transaction
+
+
+# Sent after Transaction rows are written with bulk_create, which bypasses post_save.
+# Receivers get the saved instances as ``transactions``.
+transactions_created = Signal()
 
 def clean_phone_number(phone_number):
     """Remove all non-numeric characters from phone number and extract last 10 digits."""
@@ -40,45 +47,115 @@ def create_user_account(sender, instance, created, **kwargs):
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def generate_qr_code(sender, instance, created, **kwargs):
     """
-    Generate and store QR Code when a new user is created.
+    QR codes are rendered on first access (see eWallet.qr). With
+    QR_CODE_GENERATION = "background" they are rendered on a worker thread
+    once the new user is committed instead.
     """
-    if created:
+    if created and getattr(settings, "QR_CODE_GENERATION", "lazy") == "background":
+        user_id = instance.pk
+        transaction.on_commit(lambda: schedule_qr_code(user_id))
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def forget_scanned_profile(sender, instance, **kwargs):
+    """Drop this process's cached scan profile so name or email changes show up at once."""
+    scanned_profiles.discard(instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_authenticated_user(sender, instance, raw=False, **kwargs):
+    """Blocking, password and profile changes reach authenticated requests at once."""
+    if not raw:
+        forget_cached_user(instance.pk)
 
-        qr_data = (
-            f"User ID: {instance.id}\n"
-            f"Full Name: {instance.full_name}\n"
-            f"Email: {instance.email}\n"
-            f"Phone Number: {instance.phone_number}\n"
+
+def record_spending(transactions):
+    """
+    Create SpendingLogs for expenditure transactions in the same database transaction.
+    """
+    logs = [
+        SpendingLog(
+            transaction=instance,
+            category=instance.description or "miscellaneous",
+            timestamp=instance.created_at,
         )
-        
-        qr = qrcode.make(qr_data)
+        for instance in transactions
+        if instance.subtype == "expenditure"
+    ]
+    if logs:
+        SpendingLog.objects.bulk_create(logs)
+
+
+def update_aggregates(transactions, sign=1):
+    """
+    Fold transactions into the daily summaries and IncomeExpenditureAnalysis totals once the
+    surrounding database transaction commits. A batch is coalesced so each summary row and
+    each user's totals are updated once, with database-side increments. The accounts' cache
+    versions are bumped after the totals are written. The ledger is append-only, so rows are
+    only ever added (sign=1) or removed with their account (sign=-1).
+    """
+    summary_deltas = DailyTransactionSummary.objects.summary_deltas(transactions, sign)
+    totals_deltas = IncomeExpenditureAnalysis.objects.totals_deltas(transactions, sign)
+    account_ids = {instance.account_id for instance in transactions}
 
-        buffer = BytesIO()
-        qr.save(buffer, format="PNG")
-        qr_image = ContentFile(buffer.getvalue(), name=f"qr_code_{instance.id}.png")
+    def apply():
+        DailyTransactionSummary.objects.apply_deltas(summary_deltas)
+        IncomeExpenditureAnalysis.objects.apply_deltas(totals_deltas)
+        bump_account_versions(account_ids)
+
+    transaction.on_commit(apply)
 
-        QRCode.objects.create(user=instance, qr_image=qr_image)
 
 @receiver(post_save, sender=Transaction)
-def create_spending_log_and_analysis(sender, instance, created, **kwargs):
+def create_spending_log_and_analysis(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal to create a SpendingLog for expenditure transactions and update the aggregates.
+    """
+    if raw or not created:
+        return
+    record_spending([instance])
+    update_aggregates([instance])
+    push_on_commit([instance])
+
+
+@receiver(transactions_created, sender=Transaction)
+def record_bulk_transactions(sender, transactions, **kwargs):
     """
-    Signal to create a SpendingLog for expenditure transactions and update IncomeExpenditureAnalysis.
+    Apply the same bookkeeping to transactions written with bulk_create.
     """
+    record_spending(transactions)
+    update_aggregates(transactions)
+    push_on_commit(transactions)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_aggregates_on_delete(sender, instance, **kwargs):
+    update_aggregates([instance], sign=-1)
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def forget_cached_accounts(sender, instance, created=True, **kwargs):
     if created:
-        analysis, _ = IncomeExpenditureAnalysis.objects.get_or_create(user=instance.account.user)
+        forget_user_accounts(instance.user_id)
 
-        if instance.transaction_type == "income":
-            analysis.total_income += instance.amount
-        elif instance.transaction_type == "expenditure":
-            analysis.total_expenditure += instance.amount
 
-            SpendingLog.objects.create(
-                transaction=instance,
-                category=instance.description,  
-                timestamp=instance.created_at   
-            )
+@receiver(post_save, sender=Account)
+def bump_saved_account_version(sender, instance, created, raw=False, **kwargs):
+    """
+    Balance writes through Account.save() (the admin). The services helpers bump for
+    their queryset updates themselves.
+    """
+    if not created and not raw:
+        bump_on_commit([instance.pk])
+
 
-        analysis.save()
+@receiver(post_save, sender=Card)
+@receiver(post_delete, sender=Card)
+def bump_card_account_version(sender, instance, raw=False, **kwargs):
+    """Card details are part of versioned responses such as the dashboard."""
+    if not raw:
+        bump_on_commit([instance.account_id])
 
 
 @receiver(post_save, sender=Account)
@@ -1,3 +1,1513 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import uuid
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from time import sleep
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from common.authentication import resolved_users
+from common.benchmarks import explicit_timestamps
+from common.encoders import row_encoder
+from common.idempotency import _inflight, recent_keys
+from common.instrumentation import endpoint_metrics
+from common.models import IdempotencyKey
+from common.revocation import RevocationStore, revocation_store
+from common.throttling import get_buckets
+from common.versioned_cache import cache_stats
+from .exports import CONTENT_TYPES, EXPORT_FIELDS, EXPORTERS, export_queryset
+from .management.commands.backfill_qr_codes import Command as BackfillCommand
+from .managers import increment_rows
+from .models import (
+    Account, Card, CustomUser, DailyTransactionSummary, IncomeExpenditureAnalysis, QRCode, Transaction,
+)
+from .qr import _flights as qr_flights
+from .qr import png_cache, qr_payload, render_qr_png, save_qr_code, scanned_profiles, single_flight
+from .realtime import group_name
+from .seeding import seed_users
+from .serializers import (
+    CardSerializer, CreditTransactionSerializer, CustomUserSerializer, DashboardAccountSerializer,
+    DebitTransactionSerializer, TransactionSerializer,
+)
+from .services import InsufficientFunds, transfer_funds
+
+try:
+    # channels.testing needs daphne (see requirements.txt).
+    from channels.testing import WebsocketCommunicator
+except ImportError:
+    WebsocketCommunicator = None
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix="ewallet-tests-")
+SUMMARY_FIELDS = DailyTransactionSummary.objects.AMOUNT_FIELDS + DailyTransactionSummary.objects.COUNT_FIELDS
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    REALTIME_PUSH_ENABLED=False,
+)
+class WalletTestCase(TestCase):
+    """
+    Shared fixtures: a payee and two payers, one with a couple of transactions and one
+    with a long history, and per-process caches emptied before every test.
+    """
+
+    LIGHT_HISTORY = 2
+    HEAVY_HISTORY = 60
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.payee = cls.make_user("payee", balance=Decimal("0.00"))
+        cls.light = cls.make_user("light", balance=Decimal("1000.00"))
+        cls.heavy = cls.make_user("heavy", balance=Decimal("1000.00"))
+
+        with cls.captureOnCommitCallbacks(execute=True):
+            for user, count in ((cls.light, cls.LIGHT_HISTORY), (cls.heavy, cls.HEAVY_HISTORY)):
+                for index in range(count):
+                    if index % 2:
+                        transfer_funds(cls.payee.id, user.id, Decimal("1.00"))
+                    else:
+                        transfer_funds(user.id, cls.payee.id, Decimal("2.50"))
+                    Account.objects.filter(user=cls.payee).update(balance=Decimal("500.00"))
+
+    @classmethod
+    def make_user(cls, name, balance):
+        cls.phone_numbers = getattr(cls, "phone_numbers", 0) + 1
+        user = CustomUser.objects.create_user(
+            email=f"{name}@example.com",
+            username=f"{name}@example.com",
+            password="secret-pass",
+            full_name=name.title(),
+            phone_number=f"0803{cls.phone_numbers:07d}",
+        )
+        Account.objects.filter(user=user).update(balance=balance)
+        return user
+
+    def setUp(self):
+        cache.clear()
+        caches["versions"].clear()
+        recent_keys.clear()
+        resolved_users.clear()
+        revocation_store.clear()
+        get_buckets().clear()
+        scanned_profiles.clear()
+        png_cache.clear()
+
+    def assertQueryBudget(self, budget, method, path, data=None, user="each", **extra):
+        """
+        Request path as the light and the heavy user (or anonymously with user=None) and
+        fail, listing the SQL, if either run exceeds budget or the two runs differ.
+        Returns the responses.
+        """
+        users = [self.light, self.heavy] if user == "each" else [user]
+        counts, responses = [], []
+
+        for current in users:
+            client = APIClient()
+            if current is not None:
+                client.force_authenticate(current)
+            url = path(current) if callable(path) else path
+            payload = data(current) if callable(data) else data
+
+            with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = getattr(client, method)(url, payload, format="json", **extra)
+                    if getattr(response, "streaming", False):
+                        b"".join(response.streaming_content)
+
+            label = current.email if current is not None else "anonymous"
+            if len(queries) > budget:
+                sql = "\n".join(f"  {index}. {query['sql']}" for index, query in enumerate(queries, 1))
+                self.fail(f"{method.upper()} {url} as {label} ran {len(queries)} queries (budget {budget}):\n{sql}")
+            counts.append((label, len(queries)))
+            responses.append(response)
+
+        if len({count for _, count in counts}) > 1:
+            self.fail(f"{method.upper()} {path} query count depends on the user's history: {counts}")
+        return responses
+
+    def assertStatus(self, responses, expected):
+        for response in responses:
+            self.assertEqual(response.status_code, expected, getattr(response, "data", None))
+
+    def make_staff(self, user):
+        CustomUser.objects.filter(pk=user.pk).update(is_staff=True)
+        return CustomUser.objects.get(pk=user.pk)
+
+    def latest(self, user, transaction_type):
+        return Transaction.objects.filter(account__user=user, transaction_type=transaction_type).latest("created_at")
+
+
+class QueryBudgetTests(WalletTestCase):
+    """
+    Every endpoint in eWallet/urls.py runs within a fixed number of SQL queries, and the
+    number does not change with how much history the user has. Each case runs once for a
+    user with a couple of transactions and once for a user with a long history; on-commit
+    work (aggregates, cache bumps) is executed inside the measurement.
+    """
+
+    def test_user_list(self):
+        staff = self.make_staff(self.payee)
+        self.assertStatus(self.assertQueryBudget(2, "get", "/api/v1/users/", user=staff), 200)
+
+    def test_user_detail(self):
+        responses = self.assertQueryBudget(1, "get", lambda user: f"/api/v1/users/{user.id}/")
+        self.assertStatus(responses, 200)
+
+    def test_user_create(self):
+        data = {"full_name": "New", "email": "new@example.com", "phone_number": "08055555555", "password": "pw-12345"}
+        self.assertStatus(self.assertQueryBudget(6, "post", "/api/v1/users/", data, user=None), 201)
+
+    def test_user_update(self):
+        responses = self.assertQueryBudget(
+            2, "patch", lambda user: f"/api/v1/users/{user.id}/", {"full_name": "Renamed"}
+        )
+        self.assertStatus(responses, 200)
+
+    def test_authenticated_user(self):
+        self.assertStatus(self.assertQueryBudget(0, "get", "/api/v1/users/me/"), 200)
+
+    def test_login(self):
+        data = lambda user: {"email": user.email, "password": "secret-pass"}
+        self.assertStatus(self.assertQueryBudget(1, "post", "/api/v1/login/", data), 200)
+
+    def test_refresh(self):
+        # Load the revocation filter first; then a refresh is the user lookup and the
+        # INSERT revoking the rotated token (wrapped in a savepoint).
+        revocation_store.is_revoked("warm-up")
+        data = lambda user: {"refresh": str(RefreshToken.for_user(user))}
+        self.assertStatus(self.assertQueryBudget(4, "post", "/api/v1/refresh/", data), 200)
+
+    def test_account_detail(self):
+        self.assertStatus(self.assertQueryBudget(2, "get", "/api/v1/account/"), 200)
+
+    def test_card_detail(self):
+        self.assertStatus(self.assertQueryBudget(2, "get", "/api/v1/card/"), 200)
+
+    def test_card_create(self):
+        # Signup already issued a card; ask for an issuer the user does not have yet.
+        def data(user):
+            current = user.accounts.get().cards.get().card_issuer
+            return {"card_issuer": next(issuer for issuer, _ in Card.CARD_ISSUERS if issuer != current)}
+
+        self.assertStatus(self.assertQueryBudget(3, "post", "/api/v1/card/", data), 201)
+
+    def test_fund_card(self):
+        def data(user):
+            account = user.accounts.get()
+            return {"account_id": str(account.id), "card_id": str(account.cards.get().id), "amount": "5.00"}
+
+        self.assertStatus(self.assertQueryBudget(7, "post", "/api/v1/card/fund/", data), 200)
+
+    def test_transaction_list(self):
+        responses = self.assertQueryBudget(2, "get", "/api/v1/transactions/?page_size=20")
+        self.assertStatus(responses, 200)
+        for user, response in zip((self.light, self.heavy), responses):
+            history = Transaction.objects.filter(account__user=user).count()
+            self.assertEqual(len(response.data["results"]), min(20, history))
+            self.assertEqual(response.data["next"] is not None, history > 20)
+
+    def test_debit_list(self):
+        self.assertStatus(self.assertQueryBudget(2, "get", "/api/v1/transactions/debit/"), 200)
+
+    def test_credit_list(self):
+        self.assertStatus(self.assertQueryBudget(2, "get", "/api/v1/transactions/credit/"), 200)
+
+    def test_debit_create(self):
+        data = lambda user: {"account": str(user.accounts.get().id), "amount": "3.00", "description": "grocery_shopping"}
+        self.assertStatus(self.assertQueryBudget(12, "post", "/api/v1/transactions/debit/", data), 201)
+        for user in (self.light, self.heavy):
+            debit = self.latest(user, "debit")
+            self.assertEqual(debit.amount_before - debit.amount, debit.amount_after)
+            self.assertEqual(debit.amount_after, Account.objects.get(user=user).balance)
+
+    def test_credit_create(self):
+        data = lambda user: {"account": str(user.accounts.get().id), "amount": "3.00", "description": "salary_payment"}
+        self.assertStatus(self.assertQueryBudget(11, "post", "/api/v1/transactions/credit/", data), 201)
+
+    def test_export(self):
+        self.assertStatus(self.assertQueryBudget(1, "get", "/api/v1/transactions/export/ndjson/"), 200)
+
+    def test_income_expenditure(self):
+        self.assertStatus(self.assertQueryBudget(2, "get", "/api/v1/transactions/income-expenditure/"), 200)
+
+    def test_income_expenditure_by_date(self):
+        path = "/api/v1/transactions/income-expenditure-by-date/?start_date=2000-01-01&end_date=2100-01-01"
+        self.assertStatus(self.assertQueryBudget(2, "get", path), 200)
+
+    def test_monthly_comparison(self):
+        path = "/api/v1/transactions/monthly-comparison/?duration=all"
+        self.assertStatus(self.assertQueryBudget(2, "get", path), 200)
+
+    def test_cached_analytics_skip_the_database(self):
+        self.assertQueryBudget(2, "get", "/api/v1/transactions/income-expenditure/")
+        self.assertStatus(self.assertQueryBudget(0, "get", "/api/v1/transactions/income-expenditure/"), 200)
+
+    def test_dashboard(self):
+        self.assertStatus(self.assertQueryBudget(4, "get", "/api/v1/dashboard/"), 200)
+
+    def test_qr_code(self):
+        self.assertStatus(self.assertQueryBudget(5, "get", "/api/v1/qr-code/"), 200)
+
+    def test_qr_code_image(self):
+        self.assertStatus(self.assertQueryBudget(5, "get", "/api/v1/qr-code/image/"), 200)
+
+    def test_scan_qr_code(self):
+        data = {"qr_data": qr_payload(self.payee)}
+        self.assertStatus(self.assertQueryBudget(1, "post", "/api/v1/scan-qr-code/", data, user=None), 200)
+
+    def test_send_money_via_qr(self):
+        data = {"qr_data": qr_payload(self.payee), "amount": "4.00"}
+        self.assertStatus(self.assertQueryBudget(12, "post", "/api/v1/send-money-via-qr/", data), 200)
+
+    def test_pay_customer(self):
+        path = f"/api/v1/pay-customer/{self.payee.id}"
+        self.assertStatus(self.assertQueryBudget(12, "post", path, {"amount": "4.00"}), 200)
+
+    @override_settings(IDEMPOTENCY_PURGE_INTERVAL=0)
+    def test_pay_customer_with_idempotency_key(self):
+        path = f"/api/v1/pay-customer/{self.payee.id}"
+        key = lambda: str(uuid.uuid4())
+        responses = self.assertQueryBudget(19, "post", path, {"amount": "4.00"}, HTTP_IDEMPOTENCY_KEY=key())
+        self.assertStatus(responses, 200)
+
+    def test_pay_customers(self):
+        others = [self.make_user(f"batch{index}", balance=Decimal("0.00")) for index in range(5)]
+        data = {"payments": [{"customer_id": str(user.id), "amount": "1.00"} for user in others]}
+        self.assertStatus(self.assertQueryBudget(12, "post", "/api/v1/pay-customers/", data), 200)
+
+    def test_pay_customers_scales_with_batch_not_items(self):
+        small = [self.make_user(f"small{index}", balance=Decimal("0.00")) for index in range(2)]
+        large = [self.make_user(f"large{index}", balance=Decimal("0.00")) for index in range(20)]
+        counts = []
+        for recipients in (small, large):
+            data = {"payments": [{"customer_id": str(user.id), "amount": "1.00"} for user in recipients]}
+            with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+                with self.captureOnCommitCallbacks(execute=True):
+                    client = APIClient()
+                    client.force_authenticate(self.light)
+                    self.assertEqual(client.post("/api/v1/pay-customers/", data, format="json").status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1], counts)
+
+
+class UserDirectoryTests(WalletTestCase):
+    """GET /users/: keyset pages, prefix search and who may list whom."""
+
+    def test_user_directory_requires_staff_or_a_search(self):
+        self.assertIn(APIClient().get("/api/v1/users/?search=").status_code, (401, 403))
+        self.assertIn(APIClient().get("/api/v1/users/?search=light").status_code, (401, 403))
+
+        self.assertStatus(self.assertQueryBudget(0, "get", "/api/v1/users/"), 403)
+        self.assertStatus(self.assertQueryBudget(0, "get", "/api/v1/users/?search=li"), 403)
+        (response, _) = self.assertQueryBudget(2, "get", "/api/v1/users/?search=lig")
+        self.assertEqual([user["full_name"] for user in response.data["results"]], ["Light"])
+
+    def test_user_directory_hides_private_fields_from_non_staff(self):
+        (response,) = self.assertQueryBudget(2, "get", "/api/v1/users/?search=light@", user=self.payee)
+        self.assertEqual(response.data["results"], [{"id": str(self.light.id), "full_name": "Light"}])
+
+        staff = self.make_staff(self.payee)
+        (response,) = self.assertQueryBudget(2, "get", "/api/v1/users/?search=light@", user=staff)
+        self.assertLessEqual(
+            {"email", "phone_number", "is_verified", "is_blocked"}, set(response.data["results"][0])
+        )
+
+    def test_user_directory_pages_by_cursor(self):
+        staff = self.make_staff(self.payee)
+        names, url = [], "/api/v1/users/?page_size=1"
+        while url:
+            (response,) = self.assertQueryBudget(2, "get", url, user=staff)
+            self.assertStatus([response], 200)
+            self.assertEqual((response.data["count"], response.data["count_exact"]), (3, True))
+            names += [user["full_name"] for user in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(names, ["Heavy", "Light", "Payee"])
+
+    def test_user_directory_prefix_search(self):
+        staff = self.make_staff(self.payee)
+        searches = {
+            "search=LI": ["Light"],
+            "search=hea&search_by=email": ["Heavy"],
+            "search=payee@": ["Payee"],
+            "search=0803": ["Payee", "Light", "Heavy"],
+            "search=08030000002": ["Light"],
+            "search=x": [],
+        }
+        for query, expected in searches.items():
+            (response,) = self.assertQueryBudget(2, "get", f"/api/v1/users/?{query}", user=staff)
+            self.assertEqual([user["full_name"] for user in response.data["results"]], expected, query)
+            self.assertEqual(response.data["count"], len(expected))
+
+        client = APIClient()
+        client.force_authenticate(staff)
+        response = client.get("/api/v1/users/?search=a&search_by=username")
+        self.assertEqual(response.status_code, 400)
+
+
+class KeysetPaginationTests(WalletTestCase):
+    """Cursor pages over /transactions/: complete, in order, and safe against bad cursors."""
+
+    def walk(self, user, page_size):
+        """Follow next links from the first page; returns the ids in page order and the query counts."""
+        client = APIClient()
+        client.force_authenticate(user)
+        ids, queries, url = [], [], f"/api/v1/transactions/?page_size={page_size}"
+        while url:
+            with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as captured:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertLessEqual(len(response.data["results"]), page_size)
+            ids += [row["id"] for row in response.data["results"]]
+            queries.append(len(captured))
+            url = response.data["next"]
+        return ids, queries
+
+    def ordered_ids(self, user):
+        transactions = Transaction.objects.filter(account__user=user).order_by("-created_at", "-id")
+        return [str(pk) for pk in transactions.values_list("id", flat=True)]
+
+    def test_deep_pages_cover_the_history_once_at_a_flat_cost(self):
+        ids, queries = self.walk(self.heavy, page_size=7)
+        self.assertEqual(ids, self.ordered_ids(self.heavy))
+        self.assertEqual(len(queries), -(-self.HEAVY_HISTORY // 7))
+        self.assertEqual(set(queries[1:]), {queries[1]})
+
+    def test_rows_with_equal_timestamps_are_split_across_pages_by_id(self):
+        account = Account.objects.get(user=self.light)
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(5):
+                transfer_funds(self.light.id, self.payee.id, Decimal("1.00"))
+        tied = timezone.now().replace(microsecond=0) - timedelta(days=1)
+        Transaction.objects.filter(account=account).update(created_at=tied)
+
+        for page_size in (1, 2, 3):
+            with self.subTest(page_size=page_size):
+                ids, _ = self.walk(self.light, page_size)
+                self.assertEqual(ids, self.ordered_ids(self.light))
+                self.assertEqual(len(ids), self.LIGHT_HISTORY + 5)
+
+    def test_malformed_cursors_are_not_found(self):
+        def cursor(raw):
+            return base64.urlsafe_b64encode(raw.encode()).decode()
+
+        cursors = {
+            "not base64": "%%%",
+            "not json": cursor("not json"),
+            "not a pair": cursor('["2024-01-01T00:00:00+00:00"]'),
+            "not a list": cursor("7"),
+            "bad timestamp": cursor(f'["yesterday", "{uuid.uuid4()}"]'),
+            "bad id": cursor('["2024-01-01T00:00:00+00:00", "not-a-uuid"]'),
+            "numeric id": cursor('["2024-01-01T00:00:00+00:00", 7]'),
+            "null id": cursor('["2024-01-01T00:00:00+00:00", null]'),
+        }
+        client = APIClient()
+        client.force_authenticate(self.light)
+        for name, value in cursors.items():
+            with self.subTest(name):
+                response = client.get("/api/v1/transactions/", {"cursor": value})
+                self.assertEqual(response.status_code, 404)
+
+
+class RowEncoderTests(WalletTestCase):
+    """The .values() fast path renders the same JSON bytes as the DRF serializers."""
+
+    def test_encoded_rows_match_the_serializers_byte_for_byte(self):
+        account = Account.objects.get(user=self.light)
+        created_at = timezone.now().replace(microsecond=0) - timedelta(days=3)
+        with explicit_timestamps(Transaction, "created_at"):
+            Transaction.objects.bulk_create([
+                Transaction(account=account, amount=Decimal("12.5"), transaction_type="deposit", subtype=None,
+                            description=None, created_at=created_at),
+                Transaction(account=account, amount=Decimal("0.01"), transaction_type="debit", subtype="expenditure",
+                            description="", created_at=created_at + timedelta(microseconds=123456)),
+                Transaction(account=account, amount=Decimal("99999.99"), transaction_type="debit", subtype="transfer",
+                            description="rent_payment", created_at=created_at + timedelta(seconds=1)),
+                Transaction(account=account, amount=Decimal("7"), transaction_type="deposit", subtype="income",
+                            description="Payment from user", created_at=created_at + timedelta(seconds=2)),
+            ])
+        Card.objects.filter(account=account).update(card_balance=None)
+        Card.objects.filter(account__user=self.heavy).update(card_balance=Decimal("1.1"))
+        CustomUser.objects.filter(pk=self.heavy.pk).update(is_verified=True, is_blocked=True)
+
+        cases = {
+            TransactionSerializer: Transaction.objects.order_by("-created_at", "-id"),
+            DebitTransactionSerializer: Transaction.objects.filter(transaction_type="debit").order_by("id"),
+            CreditTransactionSerializer: Transaction.objects.filter(transaction_type="deposit").order_by("id"),
+            CardSerializer: Card.objects.order_by("id"),
+            DashboardAccountSerializer: Account.objects.order_by("id"),
+            CustomUserSerializer: CustomUser.objects.order_by("id"),
+        }
+        renderer, bodies = JSONRenderer(), {}
+        for serializer_class, queryset in cases.items():
+            with self.subTest(serializer_class.__name__):
+                encoder = row_encoder(serializer_class)
+                expected = renderer.render(serializer_class(queryset, many=True).data)
+                bodies[serializer_class] = renderer.render(encoder.encode_many(queryset.values(*encoder.columns)))
+                self.assertEqual(bodies[serializer_class], expected)
+
+        # The rows above really do carry the awkward values.
+        self.assertIn(b'"subtype":null,"description":null', bodies[TransactionSerializer])
+        self.assertIn(b'"amount":"12.50"', bodies[TransactionSerializer])
+        self.assertIn(b'.123456Z"', bodies[TransactionSerializer])
+        self.assertIn(b'"card_balance":null', bodies[CardSerializer])
+        self.assertIn(f'"account":"{account.id}"'.encode(), bodies[TransactionSerializer])
+
+class UserPermissionTests(WalletTestCase):
+    """Single user records are visible to and changeable by their owner or staff only."""
+
+    def test_user_records_are_owner_or_staff_only(self):
+        path = f"/api/v1/users/{self.payee.id}/"
+        self.assertEqual(APIClient().patch(path, {"full_name": "Anon"}, format="json").status_code, 401)
+        self.assertEqual(APIClient().delete(path).status_code, 401)
+
+        client = APIClient()
+        client.force_authenticate(self.light)
+        for method in ("get", "put", "patch", "delete"):
+            self.assertEqual(getattr(client, method)(path, {"full_name": "Other"}, format="json").status_code, 403)
+
+        # Owners cannot unblock or verify themselves; staff can.
+        own = f"/api/v1/users/{self.light.id}/"
+        response = client.patch(own, {"is_blocked": True, "is_verified": True}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["is_blocked"], response.data["is_verified"]), (False, False))
+
+        client.force_authenticate(self.make_staff(self.heavy))
+        response = client.patch(path, {"is_verified": True}, format="json")
+        self.assertEqual((response.status_code, response.data["is_verified"]), (200, True))
+
+
+class AuthenticationTests(WalletTestCase):
+    """JWT users resolved from the per-process cache, refresh rotation and revocation."""
+
+    def bearer_get(self, user, path):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+            response = client.get(path)
+        return response, len(queries)
+
+    def test_token_user_is_resolved_from_cache(self):
+        response, queries = self.bearer_get(self.light, "/api/v1/users/me/")
+        self.assertEqual((response.status_code, queries), (200, 1))
+        response, queries = self.bearer_get(self.light, "/api/v1/users/me/")
+        self.assertEqual((response.status_code, queries), (200, 0))
+
+    def test_blocking_a_user_takes_effect_at_once(self):
+        self.assertEqual(self.bearer_get(self.light, "/api/v1/users/me/")[0].status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            user = CustomUser.objects.get(pk=self.light.pk)
+            user.is_blocked = True
+            user.save(update_fields=["is_blocked"])
+        self.assertEqual(self.bearer_get(self.light, "/api/v1/users/me/")[0].status_code, 401)
+
+    def test_version_counters_need_a_shared_cache_with_several_workers(self):
+        with override_settings(WEB_CONCURRENCY=2), self.assertRaises(ImproperlyConfigured):
+            self.bearer_get(self.light, "/api/v1/users/me/")
+
+        location = tempfile.mkdtemp(prefix="ewallet-versions-")
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        shared = {**settings.CACHES, "versions": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location,
+        }}
+        with override_settings(WEB_CONCURRENCY=2, CACHES=shared):
+            self.test_blocking_a_user_takes_effect_at_once()
+            self.assertTrue(os.listdir(location))
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        stale = RevocationStore()
+        stale.is_revoked("warm-up")
+        refresh = str(RefreshToken.for_user(self.light))
+        client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post("/api/v1/refresh/", {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data["refresh"], refresh)
+
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+            response = client.post("/api/v1/refresh/", {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(queries), 0, [query["sql"] for query in queries])
+
+        # A process whose filter predates the revocation is stopped by the unique row.
+        token = RefreshToken(refresh)
+        self.assertFalse(stale.is_revoked(token["jti"]))
+        self.assertFalse(stale.revoke(token["jti"], token.current_time))
+        self.assertTrue(stale.is_revoked(token["jti"]))
+
+
+class ThrottlingTests(WalletTestCase):
+    """Token-bucket throttles on login and payments."""
+
+    def throttle_rates(self, rates):
+        return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates})
+
+    def test_login_burst_is_throttled_before_hashing(self):
+        client = APIClient()
+        data = {"email": "Light@Example.com", "password": "wrong"}
+        with self.throttle_rates({"login.email": "2/min"}):
+            statuses = [client.post("/api/v1/login/", data, format="json").status_code for _ in range(2)]
+            self.assertEqual(statuses, [400, 400])
+
+            with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+                response = client.post("/api/v1/login/", {**data, "email": "light@example.com"}, format="json")
+            self.assertEqual(response.status_code, 429)
+            self.assertIn("Retry-After", response)
+            self.assertEqual(len(queries), 0)
+
+            other = client.post("/api/v1/login/", {"email": "heavy@example.com", "password": "secret-pass"}, format="json")
+            self.assertEqual(other.status_code, 200)
+
+    def test_payments_are_throttled_per_user(self):
+        path = f"/api/v1/pay-customer/{self.payee.id}"
+        with self.throttle_rates({"pay-customer.user": "1/min"}):
+            for user, expected in ((self.light, 200), (self.light, 429), (self.heavy, 200)):
+                client = APIClient()
+                client.force_authenticate(user)
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.assertEqual(client.post(path, {"amount": "1.00"}, format="json").status_code, expected)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"], REALTIME_PUSH_ENABLED=False)
+class ConcurrentTransferTests(TransactionTestCase):
+    """
+    Transfers and debits racing on real threads and connections: balances never go
+    negative and every committed ledger row is reflected in them exactly once.
+    """
+
+    THREADS = 6
+    ATTEMPTS = 8
+    AMOUNT = Decimal("10.00")
+    # Enough for half of the attempts, so the rest are refused.
+    OPENING_BALANCE = THREADS * ATTEMPTS * AMOUNT / 2
+
+    def setUp(self):
+        self.sender = self.make_user("sender", self.OPENING_BALANCE)
+        self.receivers = [self.make_user(f"receiver{index}", Decimal("0.00")) for index in range(self.THREADS)]
+
+    def make_user(self, name, balance):
+        user = CustomUser.objects.create_user(
+            email=f"{name}@example.com",
+            username=f"{name}@example.com",
+            password="secret-pass",
+            full_name=name.title(),
+            phone_number=f"0809{len(CustomUser.objects.all()):07d}",
+        )
+        Account.objects.filter(user=user).update(balance=balance)
+        return user
+
+    def race(self, attempt):
+        """
+        Run attempt(thread_index) ATTEMPTS times on each of THREADS threads started together.
+        The in-memory test database refuses a writer while another holds the lock instead
+        of queueing it, so those attempts are retried; a refusal for funds ends the attempt.
+        """
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def worker(index):
+            try:
+                barrier.wait()
+                for _ in range(self.ATTEMPTS):
+                    while True:
+                        try:
+                            attempt(index)
+                        except InsufficientFunds:
+                            pass
+                        except OperationalError as error:
+                            if "locked" not in str(error):
+                                raise
+                            sleep(0.001)
+                            continue
+                        break
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def assertDrainedByTheLedger(self):
+        """
+        The attempts ask for twice the opening balance, so the sender ends at exactly zero,
+        and the debits on the ledger account for every cent that left. Returns the total.
+        """
+        sender = Account.objects.get(user=self.sender)
+        debits = Transaction.objects.filter(account=sender, transaction_type="debit")
+        spent = sum(debits.values_list("amount", flat=True), Decimal("0.00"))
+        self.assertEqual(sender.balance, Decimal("0.00"))
+        self.assertEqual(spent, self.OPENING_BALANCE)
+        return spent
+
+    def test_concurrent_transfers_never_overdraw_or_lose_updates(self):
+        def attempt(index):
+            transfer_funds(self.sender.id, self.receivers[index].id, self.AMOUNT)
+
+        self.race(attempt)
+        spent = self.assertDrainedByTheLedger()
+        received = Account.objects.filter(user__in=self.receivers).values_list("balance", flat=True)
+        self.assertEqual(sum(received, Decimal("0.00")), spent)
+        for receiver in self.receivers:
+            account = Account.objects.get(user=receiver)
+            credits = Transaction.objects.filter(account=account, transaction_type="deposit")
+            self.assertEqual(account.balance, sum(credits.values_list("amount", flat=True), Decimal("0.00")))
+
+    def test_concurrent_debits_never_overdraw_or_lose_updates(self):
+        def attempt(index):
+            client = APIClient()
+            client.force_authenticate(self.sender)
+            data = {"account": str(account.id), "amount": str(self.AMOUNT)}
+            response = client.post("/api/v1/transactions/debit/", data, format="json")
+            if response.status_code == 400 and "amount" in response.data:
+                raise InsufficientFunds(response.data["amount"])
+            self.assertEqual(response.status_code, 201, response.data)
+
+        account = Account.objects.get(user=self.sender)
+        self.race(attempt)
+        self.assertDrainedByTheLedger()
+
+
+class BenchmarkSmokeTests(SimpleTestCase):
+    """
+    The SQLite benchmarks, run tiny in their own process: benchmark_database swaps
+    the connection's database, which would pull the test database out from under the
+    rest of the suite.
+    """
+
+    def bench(self, command, *args):
+        result = subprocess.run(
+            [sys.executable, "manage.py", command, *args],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=120,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout)
+
+    def test_bench_transfers(self):
+        report = self.bench("bench_transfers", "--threads=2", "--transfers=5", "--accounts=3")
+        self.assertEqual((report["attempted"], report["lock_errors"]), (10, 0))
+        self.assertEqual(report["succeeded"] + report["insufficient_funds"], 10)
+        self.assertTrue(report["consistent"])
+        self.assertEqual(report["sqlite_profile"], "production")
+
+    def test_bench_sqlite(self):
+        reports = self.bench("bench_sqlite", "--threads=2", "--operations=5", "--accounts=3")
+        self.assertEqual(set(reports), {"default", "production"})
+        self.assertEqual(reports["production"]["journal_mode"], "wal")
+        self.assertTrue(all(report["consistent"] for report in reports.values()))
+
+
+class ExportTests(WalletTestCase):
+    """Streamed CSV and NDJSON exports read back into the rows they were made from."""
+
+    def export(self, user, export_format, query=""):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(f"/api/v1/transactions/export/{export_format}/{query}")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], CONTENT_TYPES[export_format])
+        return b"".join(response.streaming_content).decode()
+
+    def ledger_rows(self, user, **filters):
+        """The user's transactions as typed records, oldest first, like the export orders them."""
+        transactions = Transaction.objects.filter(account__user=user, **filters).order_by("created_at", "id")
+        return [dict(zip(EXPORT_FIELDS, row)) for row in transactions.values_list(*EXPORT_FIELDS)]
+
+    def parse(self, record):
+        """Turn an exported record of strings back into the values stored in the database."""
+        parsers = {
+            "id": uuid.UUID,
+            "account_id": uuid.UUID,
+            "amount": Decimal,
+            "amount_before": Decimal,
+            "amount_after": Decimal,
+            "created_at": datetime.fromisoformat,
+        }
+        return {
+            field: None if record[field] in (None, "") else parsers.get(field, str)(record[field])
+            for field in EXPORT_FIELDS
+        }
+
+    def test_exports_read_back_into_the_ledger_rows(self):
+        account = Account.objects.get(user=self.heavy)
+        with explicit_timestamps(Transaction, "created_at"):
+            Transaction.objects.create(
+                account=account, amount=Decimal("3.10"), transaction_type="deposit", subtype=None,
+                description='Refund, "quoted"\nsecond line', created_at=timezone.now() - timedelta(days=2),
+            )
+        expected = self.ledger_rows(self.heavy)
+        self.assertEqual(len(expected), self.HEAVY_HISTORY + 1)
+
+        body = self.export(self.heavy, "csv")
+        reader = csv.DictReader(io.StringIO(body, newline=""))
+        self.assertEqual(reader.fieldnames, EXPORT_FIELDS)
+        self.assertEqual([self.parse(record) for record in reader], expected)
+
+        body = self.export(self.heavy, "ndjson")
+        lines = body.splitlines()
+        self.assertEqual(len(lines), len(expected))
+        self.assertEqual([self.parse(json.loads(line)) for line in lines], expected)
+
+        # Chunk boundaries do not change the output.
+        rows = export_queryset({}, account__user=self.heavy)
+        self.assertEqual("".join(EXPORTERS["ndjson"](rows, chunk_size=7)), body)
+
+    def test_filtered_exports_hold_only_the_matching_rows(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        account = Account.objects.get(user=self.light)
+        with explicit_timestamps(Transaction, "created_at"):
+            Transaction.objects.create(
+                account=account, amount=Decimal("8.00"), transaction_type="debit", subtype="expenditure",
+                description="rent_payment", created_at=timezone.make_aware(datetime.combine(yesterday, time(23, 59))),
+            )
+
+        query = f"?start_date={yesterday}&end_date={yesterday}"
+        for export_format in ("csv", "ndjson"):
+            with self.subTest(export_format):
+                body = self.export(self.light, export_format, query)
+                if export_format == "csv":
+                    records = list(csv.DictReader(io.StringIO(body, newline="")))
+                else:
+                    records = [json.loads(line) for line in body.splitlines()]
+                self.assertEqual(
+                    [self.parse(record) for record in records],
+                    self.ledger_rows(self.light, created_at__date=yesterday),
+                )
+                self.assertEqual(len(records), 1)
+
+        body = self.export(self.light, "ndjson", "?type=deposit")
+        self.assertEqual(
+            [self.parse(json.loads(line)) for line in body.splitlines()],
+            self.ledger_rows(self.light, transaction_type="deposit"),
+        )
+
+
+class LedgerTests(WalletTestCase):
+    """Ledger rows are append-only and the derived summaries follow them."""
+
+    def test_ledger_rows_cannot_be_edited_or_deleted(self):
+        for kind, transaction_type in (("debit", "debit"), ("credit", "deposit")):
+            instance = self.latest(self.light, transaction_type)
+            path = f"/api/v1/transactions/{kind}/{instance.id}/"
+            for method, data in (("patch", {"amount": "0.01"}), ("put", {"amount": "0.01"}), ("delete", None)):
+                with self.subTest(kind=kind, method=method):
+                    self.assertStatus(self.assertQueryBudget(0, method, path, data, user=self.light), 404)
+            self.assertEqual(Transaction.objects.get(pk=instance.pk).amount, instance.amount)
+
+    def record(self, user, transaction_type, amount, day):
+        """Write one ledger row dated day at noon, through the model's save signals."""
+        created_at = timezone.make_aware(datetime.combine(day, time(12)))
+        subtype = "income" if transaction_type == "deposit" else "expenditure"
+        with explicit_timestamps(Transaction, "created_at"):
+            return Transaction.objects.create(
+                account=Account.objects.get(user=user),
+                amount=Decimal(amount),
+                transaction_type=transaction_type,
+                subtype=subtype,
+                amount_before=Decimal("0.00"),
+                amount_after=Decimal("0.00"),
+                created_at=created_at,
+            )
+
+    def ledger_summaries(self, users):
+        """Per-account, per-day totals added up in Python from the raw ledger rows."""
+        expected = {}
+        rows = Transaction.objects.filter(account__user__in=users).values(
+            "account_id", "created_at", "amount", "transaction_type", "subtype"
+        )
+        for row in rows:
+            day = timezone.localtime(row["created_at"]).date()
+            totals = expected.setdefault((row["account_id"], day), dict.fromkeys(SUMMARY_FIELDS, 0))
+            kind = "deposit" if row["transaction_type"] == "deposit" else "debit"
+            totals[f"total_{kind}s"] += row["amount"]
+            totals[f"{kind}_count"] += 1
+            if row["subtype"] in ("income", "expenditure"):
+                totals[f"total_{row['subtype']}"] += row["amount"]
+        return expected
+
+    def stored_summaries(self, users):
+        """The stored summary rows, leaving out days whose transactions were all removed."""
+        rows = DailyTransactionSummary.objects.filter(account__user__in=users).values(
+            "account_id", "date", *SUMMARY_FIELDS
+        )
+        return {
+            (row["account_id"], row["date"]): {field: row[field] for field in SUMMARY_FIELDS}
+            for row in rows
+            if any(row[field] for field in SUMMARY_FIELDS)
+        }
+
+    def test_daily_summaries_follow_inserts_and_deletes_across_days(self):
+        users = [self.payee, self.light, self.heavy]
+        today = timezone.localdate()
+        days = [today - timedelta(days=offset) for offset in (40, 3, 2, 1)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            written = [
+                self.record(user, transaction_type, amount, day)
+                for day in days
+                for user, transaction_type, amount in (
+                    (self.light, "deposit", "30.00"),
+                    (self.light, "debit", "12.50"),
+                    (self.heavy, "debit", "7.25"),
+                )
+            ]
+            transfer_funds(self.light.id, self.heavy.id, Decimal("3.00"))
+        self.assertEqual(self.stored_summaries(users), self.ledger_summaries(users))
+
+        # One row leaves a day that keeps others; all of one account's rows leave another day.
+        with self.captureOnCommitCallbacks(execute=True):
+            written[0].delete()
+            for instance in written[3:6]:
+                instance.delete()
+        self.assertEqual(self.stored_summaries(users), self.ledger_summaries(users))
+
+        client = APIClient()
+        client.force_authenticate(self.light)
+        for start, end in ((days[0], days[-1]), (days[1], days[2]), (days[0], today)):
+            with self.subTest(start=start, end=end):
+                path = f"/api/v1/transactions/income-expenditure-by-date/?start_date={start}&end_date={end}"
+                response = client.get(path)
+                in_range = [
+                    totals for (account_id, day), totals in self.ledger_summaries([self.light]).items()
+                    if start <= day <= end
+                ]
+                self.assertEqual(response.data, {
+                    "total_income": f"{sum((t['total_income'] for t in in_range), Decimal('0.00')):.2f}",
+                    "total_expenditure": f"{sum((t['total_expenditure'] for t in in_range), Decimal('0.00')):.2f}",
+                })
+
+    def test_rebuild_repairs_summaries_after_edits_behind_the_signals(self):
+        users = [self.light, self.heavy]
+        yesterday = timezone.localdate() - timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            light_row = self.record(self.light, "deposit", "20.00", yesterday)
+            heavy_row = self.record(self.heavy, "debit", "5.00", yesterday)
+
+        # Queryset updates skip the signals, so the summaries drift from the ledger.
+        Transaction.objects.filter(pk=light_row.pk).update(amount=Decimal("25.00"))
+        Transaction.objects.filter(pk=heavy_row.pk).update(created_at=light_row.created_at - timedelta(days=5))
+        self.assertNotEqual(self.stored_summaries(users), self.ledger_summaries(users))
+
+        light_account = Account.objects.get(user=self.light)
+        call_command("rebuild_daily_summaries", "--account", str(light_account.id), stdout=StringIO())
+        self.assertEqual(self.stored_summaries([self.light]), self.ledger_summaries([self.light]))
+        self.assertNotEqual(self.stored_summaries([self.heavy]), self.ledger_summaries([self.heavy]))
+
+        call_command("rebuild_daily_summaries", "--chunk-size", "1", stdout=StringIO())
+        self.assertEqual(self.stored_summaries(users), self.ledger_summaries(users))
+
+    def ledger_totals(self, users):
+        """Each user's all-time income and expenditure, added up in Python from the raw ledger rows."""
+        expected = {user.id: {"total_income": 0, "total_expenditure": 0} for user in users}
+        rows = Transaction.objects.filter(account__user__in=users).values("account__user_id", "amount", "subtype")
+        for row in rows:
+            if row["subtype"] in ("income", "expenditure"):
+                expected[row["account__user_id"]][f"total_{row['subtype']}"] += row["amount"]
+        return expected
+
+    def stored_totals(self, users):
+        stored = {user.id: {"total_income": 0, "total_expenditure": 0} for user in users}
+        for row in IncomeExpenditureAnalysis.objects.filter(user__in=users).values(
+            "user_id", "total_income", "total_expenditure"
+        ):
+            stored[row["user_id"]] = {"total_income": row["total_income"], "total_expenditure": row["total_expenditure"]}
+        return stored
+
+    def test_income_expenditure_totals_follow_inserts_and_deletes(self):
+        users = [self.payee, self.light, self.heavy]
+        today = timezone.localdate()
+        self.assertEqual(self.stored_totals(users), self.ledger_totals(users))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            written = [
+                self.record(user, transaction_type, amount, today - timedelta(days=offset))
+                for offset in (0, 31, 400)
+                for user, transaction_type, amount in (
+                    (self.light, "deposit", "40.00"),
+                    (self.light, "debit", "9.99"),
+                    (self.payee, "debit", "1.01"),
+                )
+            ]
+            transfer_funds(self.heavy.id, self.light.id, Decimal("6.00"))
+        self.assertEqual(self.stored_totals(users), self.ledger_totals(users))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for instance in written[::2]:
+                instance.delete()
+        self.assertEqual(self.stored_totals(users), self.ledger_totals(users))
+
+        client = APIClient()
+        client.force_authenticate(self.light)
+        response = client.get("/api/v1/transactions/income-expenditure/")
+        expected = self.ledger_totals([self.light])[self.light.id]
+        self.assertEqual(response.data, {field: f"{value:.2f}" for field, value in expected.items()})
+
+    def test_verify_income_expenditure_repairs_edits_behind_the_signals(self):
+        users = [self.payee, self.light, self.heavy]
+        with self.captureOnCommitCallbacks(execute=True):
+            row = self.record(self.light, "deposit", "20.00", timezone.localdate())
+
+        # Queryset updates skip the signals, so the totals drift from the ledger.
+        Transaction.objects.filter(pk=row.pk).update(amount=Decimal("50.00"))
+        Transaction.objects.filter(account__user=self.heavy, subtype="expenditure").update(subtype="transfer")
+        self.assertNotEqual(self.stored_totals(users), self.ledger_totals(users))
+
+        out = StringIO()
+        call_command("verify_income_expenditure", "--chunk-size", "1", stdout=out)
+        self.assertIn("Checked 3 users, found 2 mismatches.", out.getvalue())
+        self.assertNotEqual(self.stored_totals(users), self.ledger_totals(users))
+
+        out = StringIO()
+        call_command("verify_income_expenditure", "--repair", stdout=out)
+        self.assertIn("Checked 3 users, repaired 2 mismatches.", out.getvalue())
+        self.assertEqual(self.stored_totals(users), self.ledger_totals(users))
+
+        out = StringIO()
+        call_command("verify_income_expenditure", stdout=out)
+        self.assertIn("Checked 3 users, found 0 mismatches.", out.getvalue())
+
+    def test_summary_increments_touch_only_the_given_days(self):
+        light, heavy = Account.objects.get(user=self.light), Account.objects.get(user=self.heavy)
+        first, second = date(2020, 1, 1), date(2020, 1, 2)
+        for account in (light, heavy):
+            for day in (first, second):
+                DailyTransactionSummary.objects.create(account=account, date=day)
+
+        deltas = {(light.id, first): {"deposit_count": 1}, (heavy.id, second): {"debit_count": 2}}
+        self.assertEqual(increment_rows(DailyTransactionSummary.objects, ("account_id", "date"), deltas), 2)
+        counts = {
+            (row.account_id, row.date): (row.deposit_count, row.debit_count)
+            for row in DailyTransactionSummary.objects.filter(date__in=(first, second))
+        }
+        self.assertEqual(counts, {
+            (light.id, first): (1, 0), (light.id, second): (0, 0),
+            (heavy.id, first): (0, 0), (heavy.id, second): (0, 2),
+        })
+
+
+class LatestCardTests(WalletTestCase):
+    """The card endpoint and the dashboard show the most recently created card."""
+
+    def test_latest_card_is_chosen_by_creation_time_not_id(self):
+        account = Account.objects.get(user=self.light)
+        signup_card = account.cards.get()
+        # Random UUIDs say nothing about age: the newest card gets the smallest id and an
+        # older one the largest.
+        Card.objects.filter(pk=signup_card.pk).update(created_at=timezone.now() - timedelta(days=30))
+        older = Card.objects.create(
+            id=uuid.UUID(int=2**128 - 1), account=account, card_holder_name="Light", card_issuer="amex"
+        )
+        Card.objects.filter(pk=older.pk).update(created_at=timezone.now() - timedelta(days=10))
+        newest = Card.objects.create(id=uuid.UUID(int=1), account=account, card_holder_name="Light", card_issuer="rupay")
+
+        client = APIClient()
+        client.force_authenticate(self.light)
+        self.assertEqual(client.get("/api/v1/card/").data["id"], str(newest.id))
+        self.assertEqual(client.get("/api/v1/dashboard/").data["card"]["id"], str(newest.id))
+
+
+class ConditionalGetTests(WalletTestCase):
+    """ETag revalidation of versioned responses."""
+
+    def get_with_etag(self, user, path, etag=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.get(path, **headers)
+        return response, len(queries)
+
+    def test_unchanged_resources_are_not_modified(self):
+        for path in ("/api/v1/account/", "/api/v1/card/", "/api/v1/transactions/?page_size=20",
+                     "/api/v1/transactions/debit/", "/api/v1/transactions/credit/"):
+            with self.subTest(path=path):
+                response, _ = self.get_with_etag(self.heavy, path)
+                self.assertEqual(response.status_code, 200)
+                response, queries = self.get_with_etag(self.heavy, path, response["ETag"])
+                self.assertEqual((response.status_code, queries), (304, 0))
+
+    def test_balance_writes_change_the_etag(self):
+        account = self.light.accounts.get()
+        card = account.cards.get()
+        writes = [
+            ("post", "/api/v1/transactions/debit/", {"account": str(account.id), "amount": "1.00", "description": "dining_out"}),
+            ("post", "/api/v1/card/fund/", {"account_id": str(account.id), "card_id": str(card.id), "amount": "1.00"}),
+            ("post", f"/api/v1/pay-customer/{self.payee.id}", {"amount": "1.00"}),
+        ]
+        for method, path, data in writes:
+            with self.subTest(path=path):
+                before, _ = self.get_with_etag(self.light, "/api/v1/account/")
+                client = APIClient()
+                client.force_authenticate(self.light)
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.assertLess(getattr(client, method)(path, data, format="json").status_code, 300)
+                after, _ = self.get_with_etag(self.light, "/api/v1/account/", before["ETag"])
+                self.assertEqual(after.status_code, 200)
+                self.assertNotEqual(after.data["balance"], before.data["balance"])
+
+    def test_unchanged_dashboard_is_not_modified(self):
+        etags = {}
+        for response in self.assertQueryBudget(4, "get", "/api/v1/dashboard/"):
+            etags[response.data["user"]["id"]] = response["ETag"]
+
+        for user in (self.light, self.heavy):
+            client = APIClient()
+            client.force_authenticate(user)
+            with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+                response = client.get("/api/v1/dashboard/", HTTP_IF_NONE_MATCH=etags[str(user.id)])
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(len(queries), 0, [query["sql"] for query in queries])
+
+
+class RealtimeTests(WalletTestCase):
+    """Wallet WebSocket authentication and pushes."""
+
+    def wallet_socket(self, query_string=""):
+        from core.asgi import application
+
+        return WebsocketCommunicator(
+            application, f"/ws/wallet/?{query_string}", headers=[(b"origin", b"http://testserver")]
+        )
+
+    @skipUnless(WebsocketCommunicator, "channels.testing needs daphne")
+    def test_websocket_connects_with_a_jwt_only(self):
+        async def connect(query_string):
+            communicator = self.wallet_socket(query_string)
+            accepted, code = await communicator.connect()
+            await communicator.disconnect()
+            return accepted, code
+
+        token = AccessToken.for_user(self.light)
+        self.assertEqual(async_to_sync(connect)(f"token={token}"), (True, None))
+        self.assertEqual(async_to_sync(connect)(""), (False, 4401))
+        self.assertEqual(async_to_sync(connect)("token=not-a-jwt"), (False, 4401))
+
+    @skipUnless(WebsocketCommunicator, "channels.testing needs daphne")
+    @override_settings(
+        REALTIME_PUSH_ENABLED=True,
+        CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    )
+    def test_websocket_receives_a_push_once_a_transfer_commits(self):
+        def transfer():
+            with self.captureOnCommitCallbacks() as callbacks:
+                transfer_funds(self.light.id, self.payee.id, Decimal("4.00"))
+            return callbacks
+
+        def commit(callbacks):
+            for callback in callbacks:
+                callback()
+
+        async def scenario():
+            communicator = self.wallet_socket(f"token={AccessToken.for_user(self.payee)}")
+            accepted, _ = await communicator.connect()
+            self.assertTrue(accepted)
+            callbacks = await database_sync_to_async(transfer)()
+            self.assertTrue(await communicator.receive_nothing(timeout=0.1))
+            await database_sync_to_async(commit)(callbacks)
+            messages = [await communicator.receive_json_from(timeout=2) for _ in range(2)]
+            await communicator.disconnect()
+            return messages
+
+        transaction, balance = async_to_sync(scenario)()
+        account = Account.objects.get(user=self.payee)
+        self.assertEqual(transaction["type"], "transaction")
+        self.assertEqual((transaction["transaction"]["transaction_type"], transaction["transaction"]["amount"]),
+                         ("deposit", "4.00"))
+        self.assertEqual(balance, {"type": "balance", "account": str(account.id), "balance": f"{account.balance:f}"})
+
+    @override_settings(
+        REALTIME_PUSH_ENABLED=True,
+        CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    )
+    def test_pushed_messages_are_json_primitives(self):
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(group_name(self.payee.id), channel)
+        self.addCleanup(async_to_sync(layer.flush))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transfer_funds(self.light.id, self.payee.id, Decimal("4.00"))
+
+        receive = async_to_sync(layer.receive)
+        messages = [receive(channel), receive(channel)]
+        # channels_redis packs messages with msgpack, which only carries primitives.
+        for message in messages:
+            self.assertEqual(json.loads(json.dumps(message)), message)
+
+        pushed, balance = messages
+        account = Account.objects.get(user=self.payee)
+        self.assertEqual(pushed["type"], "wallet.transaction")
+        self.assertEqual(pushed["transaction"]["account"], str(account.id))
+        self.assertEqual(pushed["transaction"]["amount"], "4.00")
+        self.assertEqual(balance, {"type": "wallet.balance", "account": str(account.id), "balance": f"{account.balance:f}"})
+
+
+class QRCodeTests(WalletTestCase):
+    """Scanning signed QR payloads and reissuing legacy ones."""
+
+    def test_scan_rejects_tampered_and_forged_qr_codes_without_a_query(self):
+        version, encoded_id, signature = qr_payload(self.payee).split(".")
+        other_id = qr_payload(self.light).split(".")[1]
+        with override_settings(QR_SIGNING_KEY="another-key"):
+            foreign = qr_payload(self.payee)
+        forged = {
+            "tampered id": f"{version}.{other_id}.{signature}",
+            "tampered signature": f"{version}.{encoded_id}.{signature[::-1]}",
+            "foreign key": foreign,
+            "no signature": f"{version}.{encoded_id}.",
+        }
+        with override_settings(QR_ACCEPT_LEGACY_PAYLOADS=False):
+            forged["legacy"] = f"User ID: {self.payee.id}"
+            for name, qr_data in forged.items():
+                with self.subTest(name):
+                    responses = self.assertQueryBudget(
+                        0, "post", "/api/v1/scan-qr-code/", {"qr_data": qr_data}, user=None
+                    )
+                    self.assertStatus(responses, 400)
+                    responses = self.assertQueryBudget(
+                        0, "post", "/api/v1/send-money-via-qr/", {"qr_data": qr_data, "amount": "4.00"}
+                    )
+                    self.assertStatus(responses, 400)
+
+    def test_stored_legacy_codes_scan_until_reissued(self):
+        legacy = (
+            f"User ID: {self.payee.id}\n"
+            f"Full Name: {self.payee.full_name}\n"
+            f"Email: {self.payee.email}\n"
+            f"Phone Number: {self.payee.phone_number}\n"
+        )
+        save_qr_code(self.payee, render_qr_png(legacy))
+        stored = QRCode.objects.get(user=self.payee)
+        with stored.qr_image.open("rb") as image:
+            self.assertEqual(image.read(), render_qr_png(legacy))
+
+        data = {"qr_data": legacy}
+        self.assertStatus(self.assertQueryBudget(1, "post", "/api/v1/scan-qr-code/", data, user=None), 200)
+        payment = {"qr_data": legacy, "amount": "4.00"}
+        self.assertStatus(self.assertQueryBudget(12, "post", "/api/v1/send-money-via-qr/", payment), 200)
+
+        call_command("backfill_qr_codes", "--reissue", "--workers=1", stdout=StringIO())
+        reissued = QRCode.objects.get(user=self.payee)
+        self.assertNotEqual(reissued.qr_image.name, stored.qr_image.name)
+        self.assertFalse(stored.qr_image.storage.exists(stored.qr_image.name))
+        with reissued.qr_image.open("rb") as image:
+            self.assertEqual(image.read(), render_qr_png(qr_payload(self.payee)))
+
+        out = StringIO()
+        call_command("backfill_qr_codes", "--reissue", "--workers=1", stdout=out)
+        self.assertIn("Done: 0 QR codes reissued.", out.getvalue())
+
+    def test_backfill_counts_and_keeps_only_inserted_codes(self):
+        original = save_qr_code(self.light, render_qr_png(qr_payload(self.light)))
+
+        # Codes rendered for light (who got one meanwhile) and heavy; only heavy's row goes in.
+        command = BackfillCommand()
+        rendered = [
+            QRCode(user=user, qr_image=command.store(user, render_qr_png(qr_payload(user))))
+            for user in (self.light, self.heavy)
+        ]
+        self.assertEqual(command.insert(rendered), 1)
+        storage = original.qr_image.storage
+        self.assertFalse(storage.exists(rendered[0].qr_image.name))
+        self.assertTrue(storage.exists(original.qr_image.name))
+        self.assertEqual(QRCode.objects.get(user=self.light).qr_image.name, original.qr_image.name)
+        self.assertEqual(QRCode.objects.get(user=self.heavy).qr_image.name, rendered[1].qr_image.name)
+
+        out = StringIO()
+        call_command("backfill_qr_codes", "--workers=1", stdout=out)
+        self.assertIn("Done: 1 QR codes.", out.getvalue())
+        for qr_code in QRCode.objects.all():
+            self.assertTrue(storage.exists(qr_code.qr_image.name))
+
+    def test_single_flight_runs_one_caller_per_key_at_a_time(self):
+        running, peaks, lock = Counter(), Counter(), threading.Lock()
+        barrier = threading.Barrier(8)
+
+        def work(key):
+            barrier.wait()
+            with single_flight(key):
+                with lock:
+                    running[key] += 1
+                    peaks[key] = max(peaks[key], running[key])
+                    peaks["all"] = max(peaks["all"], sum(running.values()))
+                sleep(0.01)
+                with lock:
+                    running[key] -= 1
+
+        threads = [threading.Thread(target=work, args=(index % 2,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual((peaks[0], peaks[1]), (1, 1))
+        self.assertEqual(peaks["all"], 2)
+        self.assertEqual(qr_flights, {})
+
+        # The lock is re-entrant, as get_qr_png holds it around get_or_create_qr_code.
+        with single_flight("nested"), single_flight("nested"):
+            pass
+        self.assertEqual(qr_flights, {})
+
+
+class IdempotencyTests(WalletTestCase):
+    """Idempotency-Key handling on payments."""
+
+    def pay_with_key(self, key, amount="4.00"):
+        client = APIClient()
+        client.force_authenticate(self.light)
+        with self.captureOnCommitCallbacks(execute=True):
+            return client.post(
+                f"/api/v1/pay-customer/{self.payee.id}", {"amount": amount}, format="json", HTTP_IDEMPOTENCY_KEY=key
+            )
+
+    def light_balance(self):
+        return Account.objects.get(user=self.light).balance
+
+    def test_idempotency_key_replays_the_stored_response(self):
+        first = self.pay_with_key("replay")
+        self.assertEqual(first.status_code, 200)
+        balance = self.light_balance()
+        # From this process's recent keys, then from the database.
+        for forget in (False, True):
+            if forget:
+                recent_keys.clear()
+            replay = self.pay_with_key("replay")
+            self.assertEqual((replay.status_code, replay.data), (first.status_code, first.data))
+            self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(self.light_balance(), balance)
+
+    def test_idempotency_key_reused_for_another_request_is_rejected(self):
+        self.assertEqual(self.pay_with_key("reused").status_code, 200)
+        balance = self.light_balance()
+        self.assertEqual(self.pay_with_key("reused", amount="5.00").status_code, 422)
+        self.assertEqual(self.light_balance(), balance)
+
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0.05, IDEMPOTENCY_RETRY_AFTER=2)
+    def test_concurrent_duplicate_conflicts_after_one_wait(self):
+        balance = self.light_balance()
+
+        # The first request is still running in another thread of this process...
+        cache_key = (self.light.pk, "busy-here")
+        _inflight[cache_key] = threading.Event()
+        self.addCleanup(_inflight.pop, cache_key, None)
+        response = self.pay_with_key("busy-here")
+        self.assertEqual((response.status_code, response["Retry-After"]), (409, "2"))
+
+        # ...or in another process, which holds the key's row.
+        IdempotencyKey.objects.create(
+            user=self.light, key="busy-elsewhere", fingerprint="", expires_at=timezone.now() + timedelta(minutes=5)
+        )
+        response = self.pay_with_key("busy-elsewhere")
+        self.assertEqual((response.status_code, response["Retry-After"]), (409, "2"))
+        self.assertEqual(self.light_balance(), balance)
+
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0.05, IDEMPOTENCY_LEASE_TIMEOUT=30)
+    def test_key_left_in_progress_past_its_lease_is_reclaimed(self):
+        balance = self.light_balance()
+        abandoned = IdempotencyKey.objects.create(
+            user=self.light, key="crashed", fingerprint="", expires_at=timezone.now() + timedelta(hours=1)
+        )
+
+        # Within the lease the first request may still be running.
+        self.assertEqual(self.pay_with_key("crashed").status_code, 409)
+        self.assertEqual(self.light_balance(), balance)
+
+        # Past it, the request is presumed dead and the next one with the key runs.
+        IdempotencyKey.objects.filter(pk=abandoned.pk).update(created_at=timezone.now() - timedelta(seconds=31))
+        response = self.pay_with_key("crashed")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.light_balance(), balance - Decimal("4.00"))
+        row = IdempotencyKey.objects.get(user=self.light, key="crashed")
+        self.assertEqual((row.state, row.status_code), (IdempotencyKey.COMPLETED, 200))
+        self.assertNotEqual(row.pk, abandoned.pk)
+
+        replay = self.pay_with_key("crashed")
+        self.assertEqual((replay.status_code, replay["Idempotent-Replayed"]), (200, "true"))
+        self.assertEqual(self.light_balance(), balance - Decimal("4.00"))
+
+    def test_recent_keys_are_not_replayed_past_the_key_expiry(self):
+        self.assertEqual(self.pay_with_key("expiring").status_code, 200)
+        balance = self.light_balance()
+        cache_key = (self.light.pk, "expiring")
+        _, fingerprint, status_code, body = recent_keys.get(cache_key)
+        recent_keys.set(cache_key, (timezone.now() - timedelta(seconds=1), fingerprint, status_code, body))
+        IdempotencyKey.objects.filter(user=self.light, key="expiring").update(expires_at=timezone.now())
+
+        response = self.pay_with_key("expiring")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEqual(self.light_balance(), balance - Decimal("4.00"))
+
+    def test_concurrent_duplicate_replays_once_the_first_request_finishes(self):
+        first = self.pay_with_key("racing")
+        balance = self.light_balance()
+        cache_key = (self.light.pk, "racing")
+        entry = recent_keys.get(cache_key)
+        recent_keys.clear()
+
+        # Replay the first request finishing while the duplicate waits for it.
+        event = _inflight[cache_key] = threading.Event()
+        self.addCleanup(_inflight.pop, cache_key, None)
+
+        def finish():
+            recent_keys.set(cache_key, entry)
+            event.set()
+
+        threading.Timer(0.05, finish).start()
+        response = self.pay_with_key("racing")
+        self.assertEqual((response.status_code, response.data), (200, first.data))
+        self.assertEqual(response["Idempotent-Replayed"], "true")
+        self.assertEqual(self.light_balance(), balance)
+
+
+class InstrumentationTests(WalletTestCase):
+    """Server-Timing headers and the Prometheus endpoint fed by PerformanceMiddleware."""
+
+    def setUp(self):
+        super().setUp()
+        endpoint_metrics.clear()
+        cache_stats.clear()
+
+    def test_server_timing_reports_the_request_queries(self):
+        client = APIClient()
+        client.force_authenticate(self.heavy)
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+            response = client.get("/api/v1/transactions/")
+        self.assertEqual(response.status_code, 200)
+
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'^db;dur=\d+\.\d{2};desc="\d+ queries", serialize;dur=\d+\.\d{2}, total;dur=\d+\.\d{2}$')
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        durations = dict(re.findall(r"(\w+);dur=([\d.]+)", timing))
+        self.assertLessEqual(float(durations["db"]), float(durations["total"]))
+
+        with override_settings(SERVER_TIMING_HEADER=False):
+            client = APIClient()
+            client.force_authenticate(self.heavy)
+            self.assertFalse(client.get("/api/v1/transactions/").has_header("Server-Timing"))
+
+    def test_metrics_endpoint_renders_prometheus_summaries_for_staff(self):
+        client = APIClient()
+        client.force_authenticate(self.light)
+        for _ in range(3):
+            client.get("/api/v1/transactions/")
+        client.generic("PURGE", "/api/v1/transactions/")
+        client.generic("BREW", "/api/v1/transactions/")
+        self.assertEqual(client.get("/api/v1/metrics/").status_code, 403)
+
+        staff = APIClient()
+        staff.force_authenticate(self.make_staff(self.payee))
+        response = staff.get("/api/v1/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        body = response.content.decode()
+
+        labels = 'view="UserTransactionsAPIView",method="GET"'
+        self.assertIn("# TYPE ewallet_request_duration_seconds summary", body)
+        self.assertIn(f'ewallet_request_duration_seconds{{{labels},quantile="0.95"}}', body)
+        self.assertIn(f"ewallet_request_queries_count{{{labels}}} 3", body)
+        self.assertIn('ewallet_request_queries_count{view="UserTransactionsAPIView",method="other"} 2', body)
+        self.assertNotIn("PURGE", body)
+        self.assertNotIn("BREW", body)
+        # Every sample line is "name{labels} value".
+        for line in body.splitlines():
+            if not line.startswith("#"):
+                self.assertRegex(line, r'^[a-z_]+\{[^}]*\} [0-9.e+-]+$')
+
+
+class AdminTests(WalletTestCase):
+    """Admin change lists stay within a query budget on large tables."""
+
+    def admin_client(self):
+        admin = CustomUser.objects.filter(email="admin@example.com").first() or CustomUser.objects.create_superuser(
+            email="admin@example.com", username="admin", password="secret-pass", phone_number="0999"
+        )
+        client = Client()
+        client.force_login(admin)
+        return client
+
+    def admin_get(self, path, budget):
+        client = self.admin_client()
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+            response = client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), budget, "\n".join(query["sql"] for query in queries))
+        return response
+
+    def test_admin_change_lists(self):
+        budgets = {"customuser": 5, "account": 5, "card": 5, "spendinglog": 5, "transaction": 10}
+        for model, budget in budgets.items():
+            self.admin_get(f"/admin/eWallet/{model}/", budget)
+        year = Transaction.objects.values_list("created_at__year", flat=True).first()
+        self.admin_get(f"/admin/eWallet/transaction/?created_at__year={year}", 10)
+
+    def test_admin_search_is_exact_or_prefix(self):
+        response = self.admin_get("/admin/eWallet/customuser/?q=HEA", 5)
+        self.assertEqual([user.email for user in response.context["cl"].result_list], ["heavy@example.com"])
+        response = self.admin_get(f"/admin/eWallet/customuser/?q={self.light.id}", 5)
+        self.assertEqual(list(response.context["cl"].result_list), [self.light])
+        response = self.admin_get("/admin/eWallet/account/?q=eavy", 5)
+        self.assertEqual(list(response.context["cl"].result_list), [])
+
+        account = Account.objects.get(user=self.heavy)
+        response = self.admin_get("/admin/eWallet/transaction/?q=heavy@", 10)
+        self.assertTrue(response.context["cl"].result_list)
+        self.assertTrue(all(row.account_id == account.id for row in response.context["cl"].result_list))
+
+    def test_transaction_admin_is_read_only(self):
+        transaction = Transaction.objects.first()
+        response = self.admin_get(f"/admin/eWallet/transaction/{transaction.id}/change/", 10)
+        self.assertFalse(response.context["has_change_permission"])
+        client = self.admin_client()
+        self.assertEqual(client.get("/admin/eWallet/transaction/add/").status_code, 403)
+        self.assertEqual(client.post(f"/admin/eWallet/transaction/{transaction.id}/delete/").status_code, 403)
+
+
+class SeedingTests(WalletTestCase):
+    """Synthetic data for load tests."""
+
+    def test_seeding_with_two_prefixes_keeps_phone_numbers_unique(self):
+        first = seed_users(3, prefix="alpha")
+        second = seed_users(2, prefix="beta")
+        again = seed_users(1, prefix="alpha")
+        phones = [account.user.phone_number for account in first + second + again]
+        self.assertEqual(phones, [f"07{n:09d}" for n in range(6)])
+        self.assertEqual(again[0].user.email, "alpha3@example.com")
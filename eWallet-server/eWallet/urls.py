@@ -3,15 +3,18 @@ from .views import (CardAPIView, CompareMonthlyDepositsDebitsAPIView, CreditTran
                     CustomUserAPIView, DebitTransactionAPIView, GetAuthenticatedUserAPIView, 
                     IncomeExpenditureAPIView, IncomeExpenditureByDateAPIView, LoginAPIView, 
                     ScanQRCodeView, SendMoneyViaQRView, UserAccountDetailView, FundCardView, 
-                    UserQRCodeAPIView, UserTransactionsAPIView, PayCustomerAPIView)
+                    UserQRCodeAPIView, UserTransactionsAPIView, PayCustomerAPIView, PayCustomersAPIView,
+                    ExportTransactionsAPIView, UserQRCodeImageView, DashboardAPIView)
 from rest_framework_simplejwt.views import TokenRefreshView
 
 urlpatterns = [
     path('users/', CustomUserAPIView.as_view()),
-    path('users/<int:user_id>/', CustomUserAPIView.as_view()),
+    path('users/<uuid:user_id>/', CustomUserAPIView.as_view()),
 
     path("users/me/", GetAuthenticatedUserAPIView.as_view()),
 
+    path("dashboard/", DashboardAPIView.as_view(), name="dashboard"),
+
     path('login/', LoginAPIView.as_view(), name='login'),
     path('refresh/', TokenRefreshView.as_view()),
 
@@ -21,16 +24,15 @@ urlpatterns = [
     path("card/fund/", FundCardView.as_view()),
 
     path("transactions/debit/", DebitTransactionAPIView.as_view()),
-    path("transactions/debit/<uuid:transaction_id>/", DebitTransactionAPIView.as_view()),
-
     path("transactions/credit/", CreditTransactionAPIView.as_view()),
-    path("transactions/credit/<uuid:transaction_id>/", CreditTransactionAPIView.as_view()),
 
     path("qr-code/", UserQRCodeAPIView.as_view(), name="user-qr-code"),
+    path("qr-code/image/", UserQRCodeImageView.as_view(), name="user-qr-code-image"),
     path("scan-qr-code/", ScanQRCodeView.as_view()),
     path("send-money-via-qr/", SendMoneyViaQRView.as_view()),
 
     path("transactions/", UserTransactionsAPIView.as_view(), name="user-transactions"),
+    path("transactions/export/<str:export_format>/", ExportTransactionsAPIView.as_view()),
 
     path("transactions/income-expenditure/", IncomeExpenditureAPIView.as_view()),
     path("transactions/income-expenditure-by-date/", IncomeExpenditureByDateAPIView.as_view()),
@@ -38,6 +40,7 @@ urlpatterns = [
     path("transactions/monthly-comparison/", CompareMonthlyDepositsDebitsAPIView.as_view()),
 
     path("pay-customer/<str:customer_id>", PayCustomerAPIView.as_view()),
+    path("pay-customers/", PayCustomersAPIView.as_view()),
 
 ]
 
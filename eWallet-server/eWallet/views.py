@@ -1,39 +1,61 @@
 from datetime import datetime
 import uuid
-from decimal import Decimal
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import NotFound
-from rest_framework.generics import ListAPIView, RetrieveAPIView
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.generics import ListAPIView
 from django.shortcuts import get_object_or_404
-from django.apps import apps
-from django.db import transaction
-
-from common.filters import filter_transactions_by_duration
-from eWallet.managers import IncomeExpenditureAnalysisManager
-from .models import Account, Card, CustomUser, Transaction, QRCode
-from .serializers import AccountSerializer, CardSerializer, CreditTransactionSerializer, CustomUserSerializer, DebitTransactionSerializer, FundCardSerializer, GetUserSerializer, IncomeExpenditureSerializer, LoginSerializer, QRCodeSerializer, TransactionSerializer
+from django.db import router
+from django.http import HttpResponse, StreamingHttpResponse
+
+from common.encoders import row_encoder
+from common.filters import filter_transactions_by_duration, filter_transactions_by_type
+from common.idempotency import idempotent
+from common.pagination import KeysetPagination
+from common.permissions import IsSelfOrStaff
+from common.replicas import read_replica
+from common.throttling import EmailThrottle, IPThrottle, UserThrottle
+from .cache import cached_response, conditional_response, conditional_user_response
+from .dashboard import build_dashboard, dashboard_etag
+from .directory import build_directory
+from .models import Account, Card, CustomUser, Transaction
+from .qr import InvalidQRCode, get_or_create_qr_code, get_qr_png, parse_qr_payload, scanned_profile
+from .exports import CONTENT_TYPES, EXPORTERS, export_queryset
+from .services import PayoutRejected, TransferError, pay_customers, transfer_funds
+from .serializers import AccountSerializer, BulkPayoutSerializer, CardSerializer, CreditTransactionSerializer, CustomUserSerializer, DebitTransactionSerializer, FundCardSerializer, GetUserSerializer, IncomeExpenditureSerializer, LoginSerializer, QRCodeSerializer, TransactionSerializer
 
 
 
 class CustomUserAPIView(APIView):
-    
+
+    def get_permissions(self):
+        # Signing up needs no account; the directory needs one (see eWallet/directory.py),
+        # and a single user record is only visible to and changeable by that user or staff.
+        if self.request.method == "POST":
+            return [AllowAny()]
+        if self.kwargs.get("user_id") is None:
+            return [IsAuthenticated()]
+        return [IsAuthenticated(), IsSelfOrStaff()]
+
+    def get_user(self, request, user_id):
+        user = get_object_or_404(CustomUser, id=user_id)
+        self.check_object_permissions(request, user)
+        return user
+
     def get(self, request, user_id=None):
-        """Retrieve a single user (if ID is provided) or all users"""
+        """Retrieve a single user (if ID is provided) or a page of the user directory"""
         if user_id:
-            user = get_object_or_404(CustomUser, id=user_id)
-            serializer = CustomUserSerializer(user)
-        else:
-            users = CustomUser.objects.all()
-            serializer = CustomUserSerializer(users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+            serializer = CustomUserSerializer(self.get_user(request, user_id))
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        paginator, users = build_directory(request, view=self)
+        return paginator.get_paginated_response(users)
 
     def post(self, request):
         """Create a new user"""
-        serializer = CustomUserSerializer(data=request.data)
+        serializer = CustomUserSerializer(data=request.data, context={"request": request})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -41,8 +63,8 @@ class CustomUserAPIView(APIView):
 
     def put(self, request, user_id):
         """Update a user (full update)"""
-        user = get_object_or_404(CustomUser, id=user_id)
-        serializer = CustomUserSerializer(user, data=request.data)
+        user = self.get_user(request, user_id)
+        serializer = CustomUserSerializer(user, data=request.data, context={"request": request})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -50,8 +72,8 @@ class CustomUserAPIView(APIView):
 
     def patch(self, request, user_id):
         """Update a user (partial update)"""
-        user = get_object_or_404(CustomUser, id=user_id)
-        serializer = CustomUserSerializer(user, data=request.data, partial=True)
+        user = self.get_user(request, user_id)
+        serializer = CustomUserSerializer(user, data=request.data, partial=True, context={"request": request})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -59,7 +81,7 @@ class CustomUserAPIView(APIView):
 
     def delete(self, request, user_id):
         """Delete a user"""
-        user = get_object_or_404(CustomUser, id=user_id)
+        user = self.get_user(request, user_id)
         user.delete()
         return Response({"message": "User deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
 
@@ -75,6 +97,10 @@ class GetAuthenticatedUserAPIView(APIView):
 
 
 class LoginAPIView(APIView):
+    # Checked before the serializer runs authenticate() and its password hashing.
+    throttle_classes = [IPThrottle, EmailThrottle]
+    throttle_scope = "login"
+
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid():
@@ -86,10 +112,11 @@ class LoginAPIView(APIView):
 class UserAccountDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @conditional_user_response("account")
     def get(self, request):
         """Fetch the authenticated user's account details."""
         try:
-            account = Account.objects.get(user=request.user)
+            account = Account.objects.select_related("user").get(user=request.user)
             serializer = AccountSerializer(account)
             return Response(serializer.data, status=200)
         except Account.DoesNotExist:
@@ -102,17 +129,18 @@ class CardAPIView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @conditional_user_response("card")
     def get(self, request):
         """
         Get the last created card for the authenticated user.
         """
-        card = Card.objects.filter(account__user=request.user).order_by("-id").first() 
+        encoder = row_encoder(CardSerializer)
+        card = Card.objects.filter(account__user=request.user).order_by("-created_at", "-id").values(*encoder.columns).first()
         
         if not card:
             return Response({"error": "No card found for this user."}, status=status.HTTP_404_NOT_FOUND)
         
-        serializer = CardSerializer(card)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(encoder.encode(card), status=status.HTTP_200_OK)
 
     def post(self, request):
         """
@@ -133,6 +161,7 @@ class CardAPIView(APIView):
 class FundCardView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         serializer = FundCardSerializer(data=request.data, context={"request": request})
         if serializer.is_valid():
@@ -143,15 +172,24 @@ class FundCardView(APIView):
 
 
 class DebitTransactionAPIView(APIView):
-    """Handles debit transactions (expenditure)"""
+    """
+    Handles debit transactions (expenditure). The ledger is append-only: a transaction
+    cannot be edited or deleted once its balance change has been applied.
+    """
     permission_classes = [IsAuthenticated]
 
+    @read_replica
+    @conditional_user_response("debits")
     def get(self, request):
         """Retrieve all debit transactions for the authenticated user"""
-        transactions = Transaction.objects.filter(account__user=request.user, transaction_type="expenditure")
-        serializer = DebitTransactionSerializer(transactions, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
+        transactions = Transaction.objects.filter(account__user=request.user, transaction_type="debit")
+        transactions = filter_transactions_by_type(transactions, request.query_params)
+        encoder = row_encoder(DebitTransactionSerializer)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(transactions.values(*encoder.columns), request, view=self)
+        return paginator.get_paginated_response(encoder.encode_many(page))
+
+    @idempotent
     def post(self, request):
         """Create a new debit transaction"""
         serializer = DebitTransactionSerializer(data=request.data, context={"request": request})
@@ -160,38 +198,21 @@ class DebitTransactionAPIView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    def patch(self, request, transaction_id):
-        """Update a specific debit transaction"""
-        try:
-            transaction = Transaction.objects.get(id=transaction_id, account__user=request.user, transaction_type="expenditure")
-        except Transaction.DoesNotExist:
-            return Response({"error": "Transaction not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        serializer = DebitTransactionSerializer(transaction, data=request.data, partial=True, context={"request": request})
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-    def delete(self, request, transaction_id):
-        """Delete a specific debit transaction"""
-        try:
-            transaction = Transaction.objects.get(id=transaction_id, account__user=request.user, transaction_type="expenditure")
-            transaction.delete()
-            return Response({"message": "Transaction deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
-        except Transaction.DoesNotExist:
-            return Response({"error": "Transaction not found"}, status=status.HTTP_404_NOT_FOUND)
-
 
 class CreditTransactionAPIView(APIView):
-    """Handles credit transactions (income)"""
+    """Handles credit transactions (income); append-only like DebitTransactionAPIView."""
     permission_classes = [IsAuthenticated]
 
+    @read_replica
+    @conditional_user_response("credits")
     def get(self, request):
         """Retrieve all credit transactions for the authenticated user"""
-        transactions = Transaction.objects.filter(account__user=request.user, transaction_type="income")
-        serializer = CreditTransactionSerializer(transactions, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        transactions = Transaction.objects.filter(account__user=request.user, transaction_type="deposit")
+        transactions = filter_transactions_by_type(transactions, request.query_params)
+        encoder = row_encoder(CreditTransactionSerializer)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(transactions.values(*encoder.columns), request, view=self)
+        return paginator.get_paginated_response(encoder.encode_many(page))
 
     def post(self, request):
         """Create a new credit transaction"""
@@ -200,28 +221,6 @@ class CreditTransactionAPIView(APIView):
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-    def patch(self, request, transaction_id):
-        """Update a specific credit transaction"""
-        try:
-            transaction = Transaction.objects.get(id=transaction_id, account__user=request.user, transaction_type="income")
-        except Transaction.DoesNotExist:
-            return Response({"error": "Transaction not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        serializer = CreditTransactionSerializer(transaction, data=request.data, partial=True, context={"request": request})
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-    def delete(self, request, transaction_id):
-        """Delete a specific credit transaction"""
-        try:
-            transaction = Transaction.objects.get(id=transaction_id, account__user=request.user, transaction_type="income")
-            transaction.delete()
-            return Response({"message": "Transaction deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
-        except Transaction.DoesNotExist:
-            return Response({"error": "Transaction not found"}, status=status.HTTP_404_NOT_FOUND)
         
 
 
@@ -238,15 +237,15 @@ class ScanQRCodeView(APIView):
             return Response({"error": "QR data is required"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            user_id = qr_data.split(":")[1]
-            user = CustomUser.objects.get(id=user_id)
-            return Response(
-                {"user_id": user.id, "email": user.email, "name": user.full_name},
-                status=status.HTTP_200_OK,
-            )
+            user_id = parse_qr_payload(qr_data)
+        except InvalidQRCode as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        except CustomUser.DoesNotExist:
+        profile = scanned_profile(user_id)
+        if profile is None:
             return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(profile, status=status.HTTP_200_OK)
         
 
 
@@ -255,7 +254,10 @@ class SendMoneyViaQRView(APIView):
     API to send money by scanning a QR code.
     """
     permission_classes = [IsAuthenticated]  
+    throttle_classes = [UserThrottle, IPThrottle]
+    throttle_scope = "send-money-via-qr"
 
+    @idempotent
     def post(self, request):
         sender = request.user  
         qr_data = request.data.get("qr_data")
@@ -265,35 +267,22 @@ class SendMoneyViaQRView(APIView):
             return Response({"error": "QR data and amount are required"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            amount = float(amount) 
-            if amount <= 0:
-                return Response({"error": "Invalid amount"}, status=status.HTTP_400_BAD_REQUEST)
-
-            receiver_id = qr_data.split(":")[1] 
-            receiver = CustomUser.objects.get(id=receiver_id)
-
-            sender_account = sender.account
-            receiver_account = receiver.account
-
-            if sender_account.balance < amount:
-                return Response({"error": "Insufficient funds"}, status=status.HTTP_400_BAD_REQUEST)
-
-            sender_account.balance -= amount
-            sender_account.save()
+            receiver_id = parse_qr_payload(qr_data)
+        except InvalidQRCode as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            receiver_account.balance += amount
-            receiver_account.save()
-
-            Transaction.objects.create(account=sender_account, amount=amount, transaction_type="expenditure", description="QR Payment")
-            Transaction.objects.create(account=receiver_account, amount=amount, transaction_type="income", description="QR Payment")
-
-            return Response({"message": "Payment successful!"}, status=status.HTTP_200_OK)
-
-        except CustomUser.DoesNotExist:
-            return Response({"error": "Receiver not found"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            transfer_funds(
+                sender.id,
+                receiver_id,
+                amount,
+                debit_description="QR Payment",
+                credit_description="QR Payment",
+            )
+        except TransferError as e:
+            return Response({"error": str(e)}, status=e.status_code)
 
-        except ValueError:
-            return Response({"error": "Invalid amount format"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": "Payment successful!"}, status=status.HTTP_200_OK)
         
 
 
@@ -303,9 +292,11 @@ class IncomeExpenditureAPIView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @read_replica
+    @cached_response("income-expenditure")
     def get(self, request):
         user = request.user
-        data = Transaction.analysis.get_income_expenditure(user)
+        data = Transaction.objects.get_income_expenditure(user)
         serializer = IncomeExpenditureSerializer(data)
         return Response(serializer.data)
 
@@ -316,6 +307,8 @@ class IncomeExpenditureByDateAPIView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @read_replica
+    @cached_response("income-expenditure-by-date")
     def get(self, request):
         user = request.user
         start_date_str = request.query_params.get("start_date")
@@ -330,7 +323,7 @@ class IncomeExpenditureByDateAPIView(APIView):
         except ValueError:
             return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
 
-        data = Transaction.analysis.get_income_expenditure_by_date(user, start_date, end_date)
+        data = Transaction.objects.get_income_expenditure_by_date(user, start_date, end_date)
         serializer = IncomeExpenditureSerializer(data)
         return Response(serializer.data)
     
@@ -341,18 +334,54 @@ class UserTransactionsAPIView(ListAPIView):
     """
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        return Transaction.objects.filter(account__user=self.request.user).order_by('-created_at')
+        transactions = Transaction.objects.filter(account__user=self.request.user)
+        return filter_transactions_by_type(transactions, self.request.query_params)
+
+    @read_replica
+    @conditional_user_response("transactions")
+    def list(self, request, *args, **kwargs):
+        """Read-only fast path: encode .values() rows instead of serializing model instances."""
+        encoder = row_encoder(self.get_serializer_class())
+        transactions = self.filter_queryset(self.get_queryset()).values(*encoder.columns)
+        page = self.paginate_queryset(transactions)
+        return self.get_paginated_response(encoder.encode_many(page))
     
 
 
+class ExportTransactionsAPIView(APIView):
+    """
+    Stream the authenticated user's transactions as CSV or NDJSON without building the list in memory.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @read_replica
+    def get(self, request, export_format):
+        if export_format not in EXPORTERS:
+            return Response({"error": "Format must be csv or ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            rows = export_queryset(request.query_params, account__user=request.user)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The rows are read while streaming, after the handler returns, so pin the database now.
+        rows = rows.using(router.db_for_read(Transaction))
+        response = StreamingHttpResponse(EXPORTERS[export_format](rows), content_type=CONTENT_TYPES[export_format])
+        response["Content-Disposition"] = f'attachment; filename="transactions.{export_format}"'
+        return response
+
+
 class CompareMonthlyDepositsDebitsAPIView(APIView):
     """
     API View to compare deposits and debits for the authenticated user within a selected duration.
     """
     permission_classes = [IsAuthenticated]
 
+    @read_replica
+    @cached_response("monthly-comparison")
     def get(self, request):
         user = request.user
         duration = request.query_params.get("duration", "all") 
@@ -369,71 +398,87 @@ class UserQRCodeAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        try:
-            qr_code = QRCode.objects.get(user=request.user)
-            serializer = QRCodeSerializer(qr_code)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except QRCode.DoesNotExist:
-            return Response({"error": "QR Code not found for this user."}, status=status.HTTP_404_NOT_FOUND)
+        qr_code = get_or_create_qr_code(request.user)
+        serializer = QRCodeSerializer(qr_code)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class UserQRCodeImageView(APIView):
+    """
+    Serve the authenticated user's QR code PNG, rendering it on first access.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        response = HttpResponse(get_qr_png(request.user), content_type="image/png")
+        response["Cache-Control"] = "private, max-age=3600"
+        return response
         
 
 class PayCustomerAPIView(APIView):
     permission_classes = [IsAuthenticated,]
+    throttle_classes = [UserThrottle, IPThrottle]
+    throttle_scope = "pay-customer"
 
+    @idempotent
     def post(self, request, customer_id):
-        with transaction.atomic():
-            try:
-                amount = self.request.data["amount"]
-                amount = Decimal(amount)
-            except KeyError:
-                return Response({"error": "Amount is required"}, status=status.HTTP_400_BAD_REQUEST)
-            
-            try:
-                customer_id = uuid.UUID(customer_id)
-            except ValueError:
-                return Response({"error": "Invalid customer ID"}, status=status.HTTP_400_BAD_REQUEST)
-            
-            try:
-                receiving_user = CustomUser.objects.get(id=customer_id)
-            except CustomUser.DoesNotExist:
-                return Response({"error": "Customer not found"}, status=status.HTTP_404_NOT_FOUND)
-            
-            user = self.request.user
-
-            sending_user_wallet = Account.objects.get(user=user)
-
-            receiving_user_wallet = Account.objects.get(user=receiving_user)
-
-            if sending_user_wallet.balance < amount:
-                return Response({"error": "Insufficient funds"}, status=status.HTTP_400_BAD_REQUEST)
-            
-            sending_user_wallet.balance -= amount
-            sending_user_wallet.save()
-
-            receiving_user_wallet.balance += amount
-            receiving_user_wallet.save()
-
-            Transaction.objects.create(
-                account=sending_user_wallet,
-                amount=amount,
-                transaction_type="expenditure",
-                description="Payment to customer",
-                amount_before=sending_user_wallet.balance + amount,
-                amount_after=sending_user_wallet.balance
-            )
+        if "amount" not in request.data:
+            return Response({"error": "Amount is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-            Transaction.objects.create(
-                account=receiving_user_wallet,
-                amount=amount,
-                transaction_type="income",
-                description="Payment from user",
-                amount_before=receiving_user_wallet.balance - amount,
-                amount_after=receiving_user_wallet.balance
-            )
+        try:
+            customer_id = uuid.UUID(customer_id)
+        except ValueError:
+            return Response({"error": "Invalid customer ID"}, status=status.HTTP_400_BAD_REQUEST)
 
-            return Response({"message": "Payment successful!"}, status=status.HTTP_200_OK)
-            
+        try:
+            transfer_funds(request.user.id, customer_id, request.data["amount"])
+        except TransferError as e:
+            return Response({"error": str(e)}, status=e.status_code)
 
+        return Response({"message": "Payment successful!"}, status=status.HTTP_200_OK)
 
 
+class PayCustomersAPIView(APIView):
+    """
+    Pay many customers in one request. The batch is applied atomically or not at all.
+    """
+    permission_classes = [IsAuthenticated,]
+    throttle_classes = [UserThrottle, IPThrottle]
+    throttle_scope = "pay-customers"
+
+    @idempotent
+    def post(self, request):
+        serializer = BulkPayoutSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        payments = [(item["customer_id"], item["amount"]) for item in serializer.validated_data["payments"]]
+
+        try:
+            results = pay_customers(request.user.id, payments)
+        except PayoutRejected as e:
+            return Response({"error": str(e), "results": e.results}, status=status.HTTP_400_BAD_REQUEST)
+        except TransferError as e:
+            return Response({"error": str(e)}, status=e.status_code)
+
+        return Response(
+            {
+                "message": "Payout successful!",
+                "total": sum(result["amount"] for result in results),
+                "results": results,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class DashboardAPIView(APIView):
+    """
+    Everything the home screen needs in one round trip: profile, account, latest card,
+    recent transactions, income/expenditure totals, monthly comparison and QR code.
+    Send the returned ETag as If-None-Match to get a 304 while nothing changed.
+    """
+    permission_classes = [IsAuthenticated]
 
+    @conditional_response(dashboard_etag)
+    def get(self, request):
+        return Response(build_dashboard(request), status=status.HTTP_200_OK)